@@ -1,221 +1,194 @@
-from flask import *
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
 import os
-from models.models import User, Project, db # Import models
-from routes.user_routes import user_routes  # Import user routes
-from routes.project_routes import project_routes # Import project routes
-from routes.application_routes import application_routes # Import application routes
-from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
-from datetime import timedelta
-
-
-app = Flask(__name__)
-
-
-# Enable CORS
-CORS(app)
-
-# Configure the app's secret key and database URI
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'  # SQLite database (for development)
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable modification tracking
-app.config['JWT_SECRET_KEY'] = 'secret_key'  # Optional JWT secret key
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)  # Token expires in 30 minutes
-
-
-jwt = JWTManager(app)
-
-# Initialize the db and Flask-Migrate with the app
-db.init_app(app)
-migrate = Migrate(app, db)
-
-# Register Blueprints
-app.register_blueprint(user_routes)
-app.register_blueprint(project_routes)
-app.register_blueprint(application_routes)
-
-# Test route
-@app.route("/")
-def index():
-    return """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Volunteer Matching API Documentation</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            margin: 0;
-            padding: 0;
-            background-color: #121212;
-            color: #e0e0e0;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            min-height: 100vh;
-        }
-        .container {
-            max-width: 900px;
-            background: #1e1e1e;
-            padding: 20px;
-            border-radius: 8px;
-            box-shadow: 0px 0px 15px rgba(255, 255, 255, 0.1);
-            text-align: center;
-        }
-        h1, h2, h3 {
-            color: #bb86fc;
-        }
-        p {
-            color: #b0b0b0;
-        }
-        code {
-            background: #333;
-            padding: 4px 8px;
-            border-radius: 4px;
-            font-weight: bold;
-            color: #bb86fc;
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 10px;
-            background: #292929;
-            border-radius: 5px;
-            overflow: hidden;
-        }
-        th, td {
-            border: 1px solid #444;
-            padding: 10px;
-            text-align: left;
-        }
-        th {
-            background: #2a2a2a;
-            color: #bb86fc;
-        }
-        .auth-required {
-            background: #cf6679;
-            color: white;
-            padding: 4px;
-            border-radius: 3px;
-            font-size: 12px;
-        }
-        .footer {
-            margin-top: 20px;
-            font-size: 14px;
-            color: #b0b0b0;
-        }
-        a {
-            color: #bb86fc;
-            text-decoration: none;
-        }
-        a:hover {
-            text-decoration: underline;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>Volunteer Matching API Documentation</h1>
-        <p>Welcome to the Volunteer Matching API! This API helps organizations and volunteers connect through projects. Below is a list of available endpoints with their usage details.</p>
-
-        <div class="section">
-            <h2>Authentication</h2>
-            <table>
-                <tr>
-                    <th>Endpoint</th>
-                    <th>Method</th>
-                    <th>Description</th>
-                    <th>Auth</th>
-                </tr>
-                <tr>
-                    <td><code>/register</code></td>
-                    <td>POST</td>
-                    <td>Registers a new user (volunteer or organization).</td>
-                    <td>❌</td>
-                </tr>
-                <tr>
-                    <td><code>/login</code></td>
-                    <td>POST</td>
-                    <td>Authenticates user & returns JWT token.</td>
-                    <td>❌</td>
-                </tr>
-                <tr>
-                    <td><code>/details</code></td>
-                    <td>GET</td>
-                    <td>Fetches authenticated user details.</td>
-                    <td><span class="auth-required">✔️ JWT</span></td>
-                </tr>
-                <tr>
-                    <td><code>/update</code></td>
-                    <td>PUT</td>
-                    <td>Updates user details.</td>
-                    <td><span class="auth-required">✔️ JWT</span></td>
-                </tr>
-                <tr>
-                    <td><code>/delete</code></td>
-                    <td>DELETE</td>
-                    <td>Deletes user account.</td>
-                    <td><span class="auth-required">✔️ JWT</span></td>
-                </tr>
-            </table>
-        </div>
-
-        <div class="section">
-            <h2>Projects</h2>
-            <table>
-                <tr>
-                    <th>Endpoint</th>
-                    <th>Method</th>
-                    <th>Description</th>
-                    <th>Auth</th>
-                </tr>
-                <tr>
-                    <td><code>/projects</code></td>
-                    <td>POST</td>
-                    <td>Creates a new project.</td>
-                    <td><span class="auth-required">✔️ Org</span></td>
-                </tr>
-                <tr>
-                    <td><code>/projects</code></td>
-                    <td>GET</td>
-                    <td>Fetches all projects.</td>
-                    <td><span class="auth-required">✔️ JWT</span></td>
-                </tr>
-                <tr>
-                    <td><code>/projects/:id/apply</code></td>
-                    <td>POST</td>
-                    <td>Apply for a project.</td>
-                    <td><span class="auth-required">✔️ Volunteer</span></td>
-                </tr>
-                <tr>
-                    <td><code>/user/applications</code></td>
-                    <td>GET</td>
-                    <td>View user's applications.</td>
-                    <td><span class="auth-required">✔️ Volunteer</span></td>
-                </tr>
-                <tr>
-                    <td><code>/projects/:id/cancel</code></td>
-                    <td>DELETE</td>
-                    <td>Cancel application.</td>
-                    <td><span class="auth-required">✔️ Volunteer</span></td>
-                </tr>
-            </table>
-        </div>
-
-        <div class="footer">
-            <p>For any questions or support, contact us at <a href="mailto:support@volunteerapi.com">support@volunteerapi.com</a></p>
-            <p>&copy; 2025 Volunteer Matching API</p>
-        </div>
-    </div>
-</body>
-</html>
+from datetime import datetime, timedelta
 
+import click
+from flask import Flask
+
+from config import Config
+from models.models import ChangeEvent, MailOutbox, db, recount_application_counts, READ_BIND_KEY # Import models
+from models.query_plans import check_query_plans
+from models.replication import replicate
+from models.sqlite_profile import apply_sqlite_profile, read_only_pragmas
+from seed import seed_command
+
+
+def create_app(config=Config, **settings):
+    """Builds the application: `config` is loaded with app.config.from_object and `settings` override single values.
+
+    Only what every request needs is set up here. Flask-Migrate (and Alembic)
+    is loaded for the `flask` command line only, Flask-Mail by `flask
+    mail-worker`, the skill matcher (numpy) on the first recommendations
+    request and the documentation page on its first request.
+
+    With PRELOAD_APP the app is meant to be built once in a prefork server's
+    master process (`gunicorn --preload 'app:create_app()'`); see preload().
     """
+    # Imported here rather than at module level so importing app.py stays cheap
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from routes.application_routes import application_routes
+    from routes.auth import token_revoked
+    from routes.change_routes import change_routes
+    from routes.docs_routes import docs_routes
+    from routes.project_routes import project_routes
+    from routes.user_routes import user_routes
+    from services.compression import Compression
+    from services.metrics import Instrumentation
+    from services.passwords import check_hash_config
+    from services.rate_limit import rate_limiter
+    from services.response_cache import project_response_cache
+    from services.serialization import FastJSONProvider
+
+    app = Flask(__name__)
+
+    # Fast JSON encoding (orjson) and MessagePack responses for clients that ask for them
+    app.json = FastJSONProvider(app)
+
+    # Enable CORS
+    CORS(app)
+
+    # Load settings (database URI, pool sizing, SQLite profile, JWT, hashing, metrics) from config.py
+    app.config.from_object(config)
+    app.config.update(settings)
+    check_hash_config(app.config)
+
+    # Tokens of deleted users and revoked tokens are refused on every route
+    jwt = JWTManager(app)
+    jwt.token_in_blocklist_loader(token_revoked)
+
+    # gzip / brotli response compression; registered first so it runs after the other after_request hooks
+    compression = Compression(app)
+
+    # Request metrics, exposed at /metrics
+    instrumentation = Instrumentation(app)
+    instrumentation.register_collector(project_response_cache.metrics)
+    instrumentation.register_collector(rate_limiter.metrics)
+    instrumentation.register_collector(compression.metrics)
+
+    # Initialize the db with the app; Flask-Migrate only for the `flask` command line (flask db ...)
+    db.init_app(app)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Tune every SQLite connection (WAL, busy timeout, cache, mmap, foreign keys)
+    with app.app_context():
+        apply_sqlite_profile(db.engine, app.config['SQLITE_PRAGMAS'])
+        if READ_BIND_KEY in db.engines:
+            apply_sqlite_profile(db.engines[READ_BIND_KEY], read_only_pragmas(app.config['SQLITE_PRAGMAS']))
+
+    # Register Blueprints
+    app.register_blueprint(user_routes)
+    app.register_blueprint(project_routes)
+    app.register_blueprint(application_routes)
+    app.register_blueprint(change_routes)
+    app.register_blueprint(docs_routes)
+
+    register_commands(app)
+
+    if app.config.get('PRELOAD_APP'):
+        preload(app)
+    return app
+
+
+def preload(app):
+    """Prepares an app built in the master process of a prefork server, before the workers fork.
+
+    Loads what is otherwise loaded lazily so that the workers share it
+    copy-on-write, closes any connection the master opened, and gives every
+    forked worker empty connection pools so no SQLite connection is ever used
+    by two processes.
+    """
+    import services.matching  # noqa: F401 (numpy and the matcher's session events)
+    from services.compression import ENCODERS
+
+    # Render the docs page and fill the compressed body cache with its encodings
+    client = app.test_client()
+    for encoding in ENCODERS:
+        client.get('/', headers={'Accept-Encoding': encoding})
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def reset_pools():
+        for engine in engines:
+            engine.dispose(close=False)  # Leave the parent's connections to the parent
+
+    for engine in engines:
+        engine.dispose()
+    os.register_at_fork(after_in_child=reset_pools)
+
+
+def register_commands(app):
+    """Adds the maintenance commands to the `flask` command line."""
+
+    # CLI command that bulk loads synthetic data (flask seed --users N --projects M ...)
+    app.cli.add_command(seed_command)
+
+    # CLI command that verifies the hot route queries are served by an index
+    @app.cli.command("check-indexes")
+    def check_indexes():
+        """Runs EXPLAIN QUERY PLAN on the route queries and fails on full table scans."""
+        failed = False
+        for name, plan, uses_index in check_query_plans():
+            print(f"{'OK  ' if uses_index else 'SCAN'} {name}")
+            for line in plan:
+                print(f"       {line}")
+            failed = failed or not uses_index
+
+        if failed:
+            raise SystemExit(1)
+
+    # CLI command that recomputes the per-project application counters and reports drift
+    @app.cli.command("repair-counters")
+    def repair_counters():
+        """Recomputes the projects' application counters from the applications table."""
+        drifted = recount_application_counts()
+        for project_id, stored, actual in drifted:
+            print(f"project {project_id}: stored (pending, approved, rejected) {stored} -> actual {actual}")
+        print(f"{len(drifted)} project(s) had drifted counters; all counters have been recomputed.")
+
+    # CLI command that keeps a local SQLite replica for READ_DATABASE_URL up to date
+    @app.cli.command("replicate")
+    @click.argument("replica_path")
+    @click.option("--interval", default=1.0, show_default=True, help="Seconds between copies.")
+    @click.option("--once", is_flag=True, help="Copy once and exit.")
+    def replicate_command(replica_path, interval, once):
+        """Copies the primary SQLite database to REPLICA_PATH on an interval."""
+        primary_path = db.engine.url.database
+        if db.engine.dialect.name != 'sqlite' or not primary_path or primary_path == ':memory:':
+            raise click.ClickException("replicate only supports a file-backed SQLite primary")
+        for elapsed in replicate(primary_path, replica_path, interval, once=once):
+            print(f"copied {primary_path} -> {replica_path} in {elapsed * 1000:.1f}ms")
+
+    # CLI command that trims the change log (the /changes feed) to its recent history
+    @app.cli.command("prune-changes")
+    @click.option("--days", default=30, show_default=True, help="Keep events newer than this many days.")
+    def prune_changes(days):
+        """Deletes change events, and sent or failed emails, older than --days."""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = ChangeEvent.query.filter(ChangeEvent.created_at < cutoff).delete(synchronize_session=False)
+        outbox = MailOutbox.query.filter(
+            MailOutbox.status.in_(('sent', 'failed')), MailOutbox.next_attempt_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        print(f"Deleted {deleted} change event(s) and {outbox} sent or failed email(s) older than {days} day(s).")
+
+    # CLI command that sends the emails queued in the mail outbox
+    @app.cli.command("mail-worker")
+    @click.option("--once", is_flag=True, help="Send everything that is due and exit.")
+    def mail_worker(once):
+        """Sends queued notification emails in batches over one SMTP connection."""
+        # Flask-Mail is only needed by this worker, not by the web processes
+        from services.mail_outbox import MailOutboxWorker
+
+        worker = MailOutboxWorker(app)
+        for sent, retried, failed in worker.run(app.config['MAIL_POLL_SECONDS'], once=once):
+            print(f"sent {sent}, retrying {retried}, failed {failed} queued email(s)")
+
 
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
         db.create_all()  # Ensure tables are created before running the app
 
@@ -0,0 +1,11 @@
+"""ASGI entry point, e.g. `uvicorn asgi:application --workers 4`.
+
+Serves the same app as app.py. Endpoints with an async view (see
+routes/async_user_routes.py) run on the event loop over async database
+sessions; all others run the synchronous views on a thread pool.
+"""
+from app import create_app
+from routes.async_dispatch import AsyncDispatcher
+import routes.async_user_routes  # Registers the async views
+
+application = AsyncDispatcher(create_app())
@@ -0,0 +1,154 @@
+"""Concurrent-connection throughput of the WSGI and ASGI serving modes.
+
+Seeds one database per mode, serves the app on a local port either with the
+threaded WSGI server (as `app.run`) or with uvicorn through asgi.py, and drives
+each endpoint from --connections keep-alive client connections. Reports
+requests per second, p50/p95 latency and errors for each mode.
+
+That both modes answer every route identically is checked by
+tests/test_async_parity.py, not here.
+
+    python -m benchmarks.asgi_benchmark --connections 64 --requests 400
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+import uvicorn
+from werkzeug.serving import make_server
+
+from benchmarks.routes_benchmark import bearer, build_app
+from models.models import User, db
+from routes.async_dispatch import AsyncDispatcher
+from routes.auth import identity_cache
+from seed import SEED_PASSWORD, seed_database
+from services.matching import matching_engine
+import routes.async_user_routes  # Registers the async views
+
+
+def serve_wsgi(app):
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_port, server.shutdown
+
+
+def serve_asgi(app):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    server = uvicorn.Server(uvicorn.Config(AsyncDispatcher(app), log_level='warning', lifespan='on'))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return sock.getsockname()[1], stop
+
+
+MODES = {'wsgi': serve_wsgi, 'asgi': serve_asgi}
+
+
+def request(connection, method, path, body=None, headers=None):
+    headers = dict(headers or {})
+    payload = None
+    if body is not None:
+        payload = json.dumps(body)
+        headers['Content-Type'] = 'application/json'
+    connection.request(method, path, body=payload, headers=headers)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(f"sqlite:///{os.path.join(directory, 'bench.db')}", args.hash_iterations)
+        matching_engine.reset()
+        identity_cache.clear()
+
+        with app.app_context():
+            seed_database(users=max(args.projects // 10, 20), projects=args.projects,
+                          applications=args.projects, seed=args.seed)
+            volunteer = User.query.filter_by(role='volunteer').first()
+            volunteer_headers = bearer(volunteer)
+            login = {'email': volunteer.email, 'password': SEED_PASSWORD}
+
+        port, stop = MODES[mode](app)
+        try:
+            endpoints = [
+                ('POST /register', lambda i: ('POST', '/register', {
+                    'name': 'Bench', 'email': f'register-{i}@example.org', 'password': 'benchpass', 'role': 'volunteer'
+                }, {})),
+                ('POST /login', lambda i: ('POST', '/login', login, {})),
+                ('GET /details', lambda i: ('GET', '/details', None, volunteer_headers)),
+                ('GET /projects', lambda i: ('GET', '/projects?limit=20', None, volunteer_headers)),
+            ]
+            results = {name: drive(port, build, args) for name, build in endpoints}
+        finally:
+            stop()
+            with app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+    return results
+
+
+def drive(port, build, args):
+    """Sends --requests requests over --connections concurrent keep-alive connections."""
+    local = threading.local()
+
+    def send(i):
+        if not hasattr(local, 'connection'):
+            local.connection = HTTPConnection('127.0.0.1', port)
+        sent = time.perf_counter()
+        status, _ = request(local.connection, *build(i))
+        return time.perf_counter() - sent, status >= 400
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.connections) as pool:
+        outcomes = list(pool.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'errors': sum(failed for _, failed in outcomes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=32, help='concurrent client connections')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--projects', type=int, default=1000, help='projects (and applications) to seed')
+    parser.add_argument('--hash-iterations', type=int, default=100000,
+                        help='PBKDF2 iterations for the seeded and registered users')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {mode: run_mode(mode, args) for mode in MODES}
+
+    print(f"{'endpoint':<20}{'mode':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for name in results['wsgi']:
+        for mode in MODES:
+            row = results[mode][name]
+            print(f"{name:<20}{mode:>6}{row['throughput_rps']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['errors']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'connections': args.connections, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
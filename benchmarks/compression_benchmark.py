@@ -0,0 +1,73 @@
+"""Size and cost of compressed project lists and the docs page.
+
+Seeds --projects projects and requests `/projects?limit=--limit` pages and the
+docs page through the Flask test client with each Accept-Encoding. Pages are
+timed twice: cold, with the compressed body cache cleared before every
+request, and warm, where the body is served from the cache by its ETag.
+Reports the median body size, compression ratio and latency, and the CPU time
+spent compressing from the compression metrics.
+
+    python -m benchmarks.compression_benchmark --projects 10000 --limit 100
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import os
+
+from benchmarks.routes_benchmark import bearer, build_app
+from models.models import User
+from seed import seed_database
+from services.compression import ENCODERS
+
+
+def timed(client, path, headers):
+    started = time.perf_counter()
+    response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.status_code
+    return elapsed, len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=10000)
+    parser.add_argument('--limit', type=int, default=100, help='Projects per page')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(f"sqlite:///{os.path.join(directory, 'bench.db')}", 1000)
+        compression = app.extensions['compression']
+        with app.app_context():
+            seed_database(users=max(args.projects // 100, 20), projects=args.projects, applications=0)
+            headers = bearer(User.query.filter_by(role='volunteer').first())
+
+        client = app.test_client()
+        pages = [f"/projects?limit={args.limit}&cursor={cursor}" for cursor in range(0, args.projects, args.limit)]
+        print(f"{args.requests} requests per row; {args.limit} projects per page")
+        print(f"{'path':<10}{'encoding':<10}{'bytes':>9}{'ratio':>8}{'cold ms':>10}{'warm ms':>10}{'cpu ms/body':>13}")
+        for name, paths in (('projects', pages), ('docs', ['/'])):
+            identity_size = None
+            for encoding in ['identity', *ENCODERS]:
+                request_headers = {**headers, 'Accept-Encoding': encoding}
+                cpu_before = compression.cpu_seconds
+                cold, sizes = [], []
+                for i in range(args.requests):
+                    compression.clear()
+                    elapsed, size = timed(client, paths[i % len(paths)], request_headers)
+                    cold.append(elapsed)
+                    sizes.append(size)
+                cpu = (compression.cpu_seconds - cpu_before) / args.requests
+                for i in range(args.requests):
+                    timed(client, paths[i % len(paths)], request_headers)  # Fill the compressed body cache
+                warm = [timed(client, paths[i % len(paths)], request_headers)[0] for i in range(args.requests)]
+
+                size = statistics.median(sizes)
+                identity_size = identity_size or size
+                print(f"{name:<10}{encoding:<10}{size:>9.0f}{identity_size / size:>8.2f}"
+                      f"{statistics.median(cold) * 1000:>10.3f}{statistics.median(warm) * 1000:>10.3f}{cpu * 1000:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Latency of GET /projects/nearby against a naive scan of every project.
+
+Seeds --projects projects around the seed cities and, for each radius, times
+find_nearby (R*Tree bounding box prefilter plus a vectorized haversine over the
+candidates), the whole /projects/nearby request through the Flask test client,
+and the naive approach: Project.query.all() and a Python distance check per
+project. Reports median milliseconds and the average number of projects
+within the radius.
+
+    python -m benchmarks.geo_benchmark --projects 100000
+"""
+import argparse
+import math
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.routes_benchmark import bearer, build_app
+from models.models import Project, User
+from seed import CITIES, seed_database
+from services.geo import EARTH_RADIUS_KM, find_nearby
+
+
+def naive_nearby(latitude, longitude, radius_km, count):
+    """Every project loaded and checked in Python, the way it would be done without an index."""
+    lat1 = math.radians(latitude)
+    matches = []
+    for project in Project.query.all():
+        if project.latitude is None or project.longitude is None:
+            continue
+        lat2 = math.radians(project.latitude)
+        a = math.sin((lat2 - lat1) / 2) ** 2 \
+            + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(project.longitude - longitude) / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        if distance <= radius_km:
+            matches.append((distance, project.project_id))
+    return sorted(matches)[:count]
+
+
+def median_ms(function, points, repeat):
+    timings = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        function(*points[i % len(points)])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--radii', default='5,25,100', help='Comma separated radii in km')
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--naive-requests', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(f"sqlite:///{os.path.join(directory, 'bench.db')}", 1000)
+        with app.app_context():
+            started = time.perf_counter()
+            seed_database(users=max(args.projects // 100, 20), projects=args.projects, applications=0)
+            print(f"seeded {args.projects} projects in {time.perf_counter() - started:.1f}s")
+            headers = bearer(User.query.filter_by(role='volunteer').first())
+
+        client = app.test_client()
+        print(f"{'radius km':>10}{'matches':>10}{'index ms':>10}{'endpoint ms':>13}{'naive ms':>10}")
+        for radius in (float(value) for value in args.radii.split(',')):
+            with app.app_context():
+                matches = statistics.mean(len(find_nearby(lat, lon, radius, args.projects)[0]) for lat, lon in CITIES)
+                index_ms = median_ms(lambda lat, lon: find_nearby(lat, lon, radius, args.limit + 1), CITIES, args.requests)
+                naive_ms = median_ms(lambda lat, lon: naive_nearby(lat, lon, radius, args.limit + 1), CITIES,
+                                     args.naive_requests)
+
+            def request(lat, lon):
+                response = client.get(f"/projects/nearby?lat={lat}&lon={lon}&radius={radius}&limit={args.limit}",
+                                      headers=headers)
+                assert response.status_code == 200, response.status_code
+
+            endpoint_ms = median_ms(request, CITIES, args.requests)
+            print(f"{radius:>10g}{matches:>10.0f}{index_ms:>10.2f}{endpoint_ms:>13.2f}{naive_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Cost of one rate limit check on /login and /register.
+
+Times RateLimiter.check (an IP bucket and an email bucket) against the
+in-memory store and the shared SQLite store, cycling through --keys distinct
+clients so the stores hold realistic numbers of buckets. Each measurement is
+the best of --repeat runs of --checks checks; `limited` counts the checks
+of the last run that were refused.
+
+    python -m benchmarks.rate_limit_benchmark --keys 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from services.rate_limit import RateLimiter
+
+
+def measure(app, keys, checks, repeat):
+    limiter = RateLimiter()
+    clients = [(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", f"user{i}@example.org") for i in range(keys)]
+    timings = []
+    with app.app_context():
+        for _ in range(repeat):
+            limited = 0
+            started = time.perf_counter()
+            for i in range(checks):
+                ip, email = clients[i % keys]
+                if limiter.check(ip, email):
+                    limited += 1
+            timings.append(time.perf_counter() - started)
+        buckets = limiter.store.size()
+    return min(timings) / checks, limited, buckets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=10000, help='Distinct client IPs / emails')
+    parser.add_argument('--checks', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['RATE_LIMIT_PER_IP'] = (20, 30)
+    app.config['RATE_LIMIT_PER_EMAIL'] = (5, 5)
+
+    print(f"{args.keys} clients, {args.checks} checks, best of {args.repeat}")
+    print(f"{'store':<10}{'us/check':>12}{'checks/s':>14}{'limited':>10}{'buckets':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for store, path in (('memory', None), ('sqlite', os.path.join(directory, 'limits.db'))):
+            app.config['RATE_LIMIT_STORE'] = path
+            per_check, limited, buckets = measure(app, args.keys, args.checks, args.repeat)
+            print(f"{store:<10}{per_check * 1e6:>12.2f}{1 / per_check:>14,.0f}{limited:>10}{buckets:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""Per-endpoint latency benchmark for the user, project and application routes.
+
+Seeds a fresh SQLite database for every scale, drives each route through the
+Flask test client and through a multi-threaded HTTP load generator, and reports
+p50/p95/p99 latency, throughput and SQL statements per request.
+
+    python -m benchmarks.routes_benchmark --scales 1000,100000 --output bench.json
+    python -m benchmarks.routes_benchmark --baseline benchmarks/baseline.json
+
+With --baseline the run exits with status 1 when any endpoint's p95 latency
+grows by more than --threshold, or when it issues more SQL statements per
+request than the baseline recorded (beyond a small allowance for one-off
+statements such as cache fills).
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+from app import create_app
+from config import Config, engine_options, read_database_uri
+from models.models import db, User, Project, READ_BIND_KEY
+from routes.auth import identity_cache, identity_claims
+from seed import SEED_PASSWORD, seed_database
+from services.matching import matching_engine
+
+DEFAULT_SCALES = "1000"
+DEFAULT_REQUESTS = 100
+DEFAULT_THREADS = 8
+DEFAULT_THRESHOLD = 0.25
+# One-off statements (cache fills, matcher load) are amortized over the run, so allow for them
+STATEMENT_TOLERANCE = 0.5
+
+
+def build_app(database_uri, hash_iterations, sqlite_pragmas=None):
+    """The application from app.create_app, bound to the benchmark database.
+
+    `sqlite_pragmas` overrides the configured SQLite profile ({} disables it).
+    Request metrics and rate limiting are off so they do not skew the timings.
+    """
+    read_uri = read_database_uri(database_uri)
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(database_uri),
+        'SQLALCHEMY_BINDS': {READ_BIND_KEY: {'url': read_uri, **engine_options(read_uri)}} if read_uri else {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-of-sufficient-length',
+        'PASSWORD_HASH_ITERATIONS': hash_iterations,
+        'RATE_LIMIT_ENABLED': False,  # The benchmarks hammer /login from one address
+        'METRICS_ENABLED': False,
+        'PRELOAD_APP': False,
+    }
+    if sqlite_pragmas is not None:
+        settings['SQLITE_PRAGMAS'] = sqlite_pragmas
+    return create_app(Config, **settings)
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the engines (primary and read)."""
+
+    def __init__(self, *engines):
+        self.count = 0
+        self.lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        with self.lock:
+            self.count += 1
+
+
+def bearer(user):
+    return {'Authorization': 'Bearer ' + create_access_token(identity=str(user.user_id), additional_claims=identity_claims(user))}
+
+
+def prepare_fixtures(app, requests):
+    """Creates the users and projects the write endpoints consume and returns the request builders.
+
+    Each builder takes a request number and returns (method, path, json body, headers).
+    """
+    with app.app_context():
+        organization = User.query.filter_by(role='organization').first()
+        volunteer = User.query.filter_by(role='volunteer').first()
+        owned_project = Project.query.filter_by(organization_id=organization.user_id).first()
+
+        # Users for DELETE /delete and projects for apply -> cancel -> DELETE /projects/<id>
+        run = time.time_ns()
+        disposable_users = [User(f'Bench {i}', f'bench-{run}-{i}@example.org', None, 'volunteer', password_hash='x')
+                            for i in range(requests)]
+        targets = [Project(f'Bench target {i}', 'Benchmark project', organization.user_id, 'Active', ['coding'])
+                   for i in range(requests)]
+        db.session.add_all(disposable_users + targets)
+        db.session.commit()
+
+        org_headers = bearer(organization)
+        volunteer_headers = bearer(volunteer)
+        disposable_headers = [bearer(user) for user in disposable_users]
+        target_ids = [project.project_id for project in targets]
+        owned_project_id = owned_project.project_id
+        login = {'email': volunteer.email, 'password': SEED_PASSWORD}
+
+    # Endpoints run in this order; apply/cancel/delete share the target projects
+    return [
+        ('POST /register', lambda i: ('POST', '/register', {
+            'name': 'Bench', 'email': f'register-{run}-{i}@example.org', 'password': 'benchpass', 'role': 'volunteer'
+        }, {})),
+        ('POST /login', lambda i: ('POST', '/login', login, {})),
+        ('POST /logout', lambda i: ('POST', '/logout', None, volunteer_headers)),
+        ('GET /details', lambda i: ('GET', '/details', None, volunteer_headers)),
+        ('PUT /update', lambda i: ('PUT', '/update', {'name': f'Bench {i}'}, volunteer_headers)),
+        ('POST /projects', lambda i: ('POST', '/projects', {'title': f'Bench {i}', 'description': 'Benchmark'}, org_headers)),
+        ('GET /projects', lambda i: ('GET', '/projects', None, volunteer_headers)),
+        ('GET /projects?fields=project_id,title', lambda i: ('GET', '/projects?fields=project_id,title', None, volunteer_headers)),
+        ('GET /projects/<id>', lambda i: ('GET', f'/projects/{owned_project_id}', None, org_headers)),
+        ('PUT /projects/<id>', lambda i: ('PUT', f'/projects/{owned_project_id}', {'status': 'Active'}, org_headers)),
+        ('GET /projects/search', lambda i: ('GET', '/projects/search?q=community', None, volunteer_headers)),
+        ('GET /projects/nearby', lambda i: ('GET', '/projects/nearby?lat=-1.2921&lon=36.8219&radius=25', None, volunteer_headers)),
+        ('GET /user/recommendations', lambda i: ('GET', '/user/recommendations', None, volunteer_headers)),
+        ('POST /projects/<id>/apply', lambda i: ('POST', f'/projects/{target_ids[i]}/apply', None, volunteer_headers)),
+        ('GET /user/applications', lambda i: ('GET', '/user/applications', None, volunteer_headers)),
+        ('DELETE /projects/<id>/cancel', lambda i: ('DELETE', f'/projects/{target_ids[i]}/cancel', None, volunteer_headers)),
+        ('DELETE /projects/<id>', lambda i: ('DELETE', f'/projects/{target_ids[i]}', None, org_headers)),
+        ('DELETE /delete', lambda i: ('DELETE', '/delete', None, disposable_headers[i])),
+    ]
+
+
+def summarize(latencies, elapsed, statements, errors):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'statements_per_request': round(statements / len(latencies), 2),
+    }
+
+
+def run_client(app, endpoints, requests, counter):
+    """Sends every request sequentially through the Flask test client."""
+    client = app.test_client()
+    results = {}
+    for name, build in endpoints:
+        latencies, errors = [], 0
+        statements = counter.count
+        started = time.perf_counter()
+        for i in range(requests):
+            method, path, body, headers = build(i)
+            sent = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=headers)
+            latencies.append(time.perf_counter() - sent)
+            errors += response.status_code >= 400
+        results[name] = summarize(latencies, time.perf_counter() - started, counter.count - statements, errors)
+    return results
+
+
+def run_http(app, endpoints, requests, counter, threads):
+    """Serves the app on a local port and drives it with a pool of client threads."""
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    serving = threading.Thread(target=server.serve_forever, daemon=True)
+    serving.start()
+    local = threading.local()
+
+    def send(build, i):
+        if not hasattr(local, 'connection'):
+            local.connection = HTTPConnection('127.0.0.1', server.server_port)
+        method, path, body, headers = build(i)
+        headers = dict(headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        sent = time.perf_counter()
+        local.connection.request(method, path, body=payload, headers=headers)
+        response = local.connection.getresponse()
+        response.read()
+        return time.perf_counter() - sent, response.status >= 400
+
+    results = {}
+    try:
+        for name, build in endpoints:
+            statements = counter.count
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                outcomes = list(pool.map(send, itertools.repeat(build), range(requests)))
+            elapsed = time.perf_counter() - started
+            local = threading.local()  # Pool threads are gone; drop their connections
+            results[name] = summarize([latency for latency, _ in outcomes], elapsed,
+                                      counter.count - statements, sum(error for _, error in outcomes))
+    finally:
+        server.shutdown()
+    return results
+
+
+def run_scale(scale, args):
+    """Seeds a database with `scale` projects and applications and benchmarks every route on it."""
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(f"sqlite:///{os.path.join(directory, 'bench.db')}", args.hash_iterations)
+        matching_engine.reset()
+        identity_cache.clear()
+
+        with app.app_context():
+            seed_database(users=max(scale // 10, 20), projects=scale, applications=scale, seed=args.seed)
+            counter = StatementCounter(*db.engines.values())
+
+        results = {'client': run_client(app, prepare_fixtures(app, args.requests), args.requests, counter)}
+        if not args.no_http:
+            endpoints = prepare_fixtures(app, args.requests)
+            results['http'] = run_http(app, endpoints, args.requests, counter, args.threads)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        return results
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of human readable regressions against the baseline."""
+    regressions = []
+    for scale, modes in results.items():
+        for mode, endpoints in modes.items():
+            for name, current in endpoints.items():
+                previous = baseline.get(scale, {}).get(mode, {}).get(name)
+                if previous is None:
+                    continue
+                if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+                    regressions.append(f"{scale} {mode} {name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+                if current['statements_per_request'] > previous['statements_per_request'] + STATEMENT_TOLERANCE:
+                    regressions.append(f"{scale} {mode} {name}: statements/request "
+                                       f"{previous['statements_per_request']} -> {current['statements_per_request']}")
+    return regressions
+
+
+def print_table(results):
+    for scale, modes in results.items():
+        for mode, endpoints in modes.items():
+            print(f"\nscale={scale} mode={mode}")
+            print(f"{'endpoint':<38}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'sql/req':>9}{'errors':>8}")
+            for name, stats in endpoints.items():
+                print(f"{name:<38}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                      f"{stats['throughput_rps']:>9}{stats['statements_per_request']:>9}{stats['errors']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="Comma separated row counts, e.g. 1000,100000,1000000")
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help="Requests per endpoint")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help="HTTP load generator threads")
+    parser.add_argument('--no-http', action='store_true', help="Only run through the Flask test client")
+    parser.add_argument('--hash-iterations', type=int, default=600000, help="PBKDF2 iterations used by the app")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic data")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against this JSON file and fail on regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative p95 increase before an endpoint counts as regressed")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in (int(value) for value in args.scales.split(',')):
+        print(f"Benchmarking scale {scale}...", file=sys.stderr)
+        results[str(scale)] = run_scale(scale, args)
+
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'requests': args.requests,
+                    'threads': args.threads,
+                    'hash_iterations': args.hash_iterations,
+                },
+                'results': results,
+            }, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
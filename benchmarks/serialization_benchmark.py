@@ -0,0 +1,86 @@
+"""Encoding throughput of the serialization layer on a page of N projects.
+
+Seeds an in-memory database with --projects projects, selects them once, then
+times each stage of producing a response body separately:
+
+    rows -> dicts   the hand-written `row._mapping` loop the routes used before
+                    versus the compiled PROJECT_SCHEMA row encoder
+    dicts -> bytes  the stdlib JSON provider versus FastJSONProvider (orjson)
+                    and MessagePack
+
+Each measurement is the best of --repeat runs.
+
+    python -m benchmarks.serialization_benchmark --projects 100000
+"""
+import argparse
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.routes_benchmark import build_app
+from models.models import db
+from seed import seed_database
+from services.serialization import PROJECT_SCHEMA, FastJSONProvider, msgpack, orjson
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def mapping_encoder(names):
+    """The per-row dict building the routes did before the schemas."""
+    def to_dict(row):
+        project = {name: row._mapping[name] for name in names}
+        if 'skills' in project:
+            project['skills'] = project['skills'].split(',') if project['skills'] else []
+        return project
+    return to_dict
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    app = build_app('sqlite://', 1000)
+    with app.app_context():
+        seed_database(users=max(args.projects // 100, 20), projects=args.projects, applications=0, seed=args.seed)
+        names = PROJECT_SCHEMA.names()
+        rows = db.session.query(*PROJECT_SCHEMA.columns()).order_by('project_id').all()
+
+        stdlib = DefaultJSONProvider(app)
+        fast = FastJSONProvider(app)
+        mapping_to_dict = mapping_encoder(names)
+        row_encoder = PROJECT_SCHEMA.row_encoder()
+
+        results = []
+        elapsed, dicts = best_of(args.repeat, lambda: [mapping_to_dict(row) for row in rows])
+        results.append(('rows -> dicts', 'row._mapping loop', elapsed, None))
+        elapsed, dicts = best_of(args.repeat, lambda: [row_encoder(row) for row in rows])
+        results.append(('rows -> dicts', 'schema row encoder', elapsed, None))
+
+        body = {'projects': dicts, 'next_cursor': None}
+        elapsed, encoded = best_of(args.repeat, lambda: stdlib.dumps(body, separators=(',', ':')))
+        results.append(('dicts -> bytes', 'stdlib json', elapsed, len(encoded.encode())))
+        if orjson is not None:
+            elapsed, encoded = best_of(args.repeat, lambda: fast._orjson(body))
+            results.append(('dicts -> bytes', 'orjson', elapsed, len(encoded)))
+        if msgpack is not None:
+            elapsed, encoded = best_of(args.repeat, lambda: msgpack.packb(body))
+            results.append(('dicts -> bytes', 'msgpack', elapsed, len(encoded)))
+
+    print(f"{len(rows)} projects, best of {args.repeat}")
+    print(f"{'stage':<16}{'encoder':<24}{'ms':>10}{'rows/s':>14}{'bytes':>12}")
+    for stage, encoder, elapsed, size in results:
+        print(f"{stage:<16}{encoder:<24}{elapsed * 1000:>10.1f}{len(rows) / elapsed:>14,.0f}{size if size else '':>12}")
+
+
+if __name__ == '__main__':
+    main()
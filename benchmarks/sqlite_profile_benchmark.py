@@ -0,0 +1,119 @@
+"""Mixed read/write throughput with and without the tuned SQLite profile.
+
+Seeds one database per profile, then runs worker threads against it through
+the Flask test client for a fixed time. Each request is a read
+(GET /projects, GET /user/applications) or, with probability --write-ratio, a
+write (POST /projects, apply + cancel). Reports requests per second, p95
+latency and failed requests (e.g. "database is locked") for each profile.
+
+    python -m benchmarks.sqlite_profile_benchmark --threads 8 --seconds 10
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks.routes_benchmark import build_app
+from config import Config
+from models.models import db, User, Project
+from routes.auth import identity_cache, identity_claims
+from seed import seed_database
+from services.matching import matching_engine
+
+
+def run_profile(name, pragmas, args):
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(f"sqlite:///{os.path.join(directory, 'bench.db')}", 1000, pragmas)
+        matching_engine.reset()
+        identity_cache.clear()
+
+        with app.app_context():
+            seed_database(users=max(args.projects // 10, 20) + args.threads * 10, projects=args.projects,
+                          applications=args.projects, seed=args.seed)
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+            organization = User.query.filter_by(role='organization').first()
+            volunteers = User.query.filter_by(role='volunteer').limit(args.threads).all()
+            project_ids = [pid for (pid,) in db.session.query(Project.project_id).limit(1000)]
+
+            def bearer(user):
+                return {'Authorization': 'Bearer ' + create_access_token(
+                    identity=str(user.user_id), additional_claims=identity_claims(user))}
+            org_headers = bearer(organization)
+            volunteer_headers = [bearer(volunteer) for volunteer in volunteers]
+
+        latencies, failures, lock = [], [0], threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+
+        def worker(index):
+            client = app.test_client()
+            rng = random.Random(args.seed + index)
+            headers = volunteer_headers[index]
+            local_latencies, local_failures = [], 0
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                if rng.random() < args.write_ratio:
+                    if rng.random() < 0.5:
+                        statuses = [client.post('/projects', json={'title': 'Load', 'description': 'Benchmark'},
+                                                headers=org_headers).status_code]
+                    else:
+                        project_id = rng.choice(project_ids)
+                        statuses = [client.post(f'/projects/{project_id}/apply', headers=headers).status_code,
+                                    client.delete(f'/projects/{project_id}/cancel', headers=headers).status_code]
+                else:
+                    path = '/projects?limit=50' if rng.random() < 0.5 else '/user/applications'
+                    statuses = [client.get(path, headers=headers).status_code]
+                local_latencies.append(time.perf_counter() - sent)
+                local_failures += any(status >= 500 for status in statuses)
+            with lock:
+                latencies.extend(local_latencies)
+                failures[0] += local_failures
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+    return {
+        'profile': name,
+        'journal_mode': journal_mode,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p95_ms': round(statistics.quantiles(latencies, n=20)[18] * 1000, 2),
+        'failed': failures[0],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--projects', type=int, default=10000)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = [run_profile('default', {}, args), run_profile('tuned', Config.SQLITE_PRAGMAS, args)]
+
+    print(f"{'profile':<10}{'journal':>9}{'requests':>10}{'req/s':>9}{'p95 ms':>9}{'failed':>8}")
+    for result in results:
+        print(f"{result['profile']:<10}{result['journal_mode']:>9}{result['requests']:>10}"
+              f"{result['throughput_rps']:>9}{result['p95_ms']:>9}{result['failed']:>8}")
+    print(f"speedup: {results[1]['throughput_rps'] / results[0]['throughput_rps']:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Worker cold start time and per-worker memory of the application.
+
+Cold start runs `from app import create_app; create_app()` and a first request
+in --runs fresh interpreters and reports the median import, create_app and
+first request times and the resulting RSS.
+
+The prefork part imitates a prefork server with --workers workers, twice:
+
+    lazy     every worker builds its own app after the fork (gunicorn without --preload)
+    preload  the master builds the app with PRELOAD_APP before forking (gunicorn --preload)
+
+Each worker then serves the docs page, a login and a recommendations request,
+and reports its RSS and private (unshared) memory from /proc/self/smaps_rollup,
+which is what every additional worker really costs.
+
+    python -m benchmarks.startup_benchmark --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import traceback
+
+COLD_START = """
+import json, resource, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def memory_mb():
+    """(RSS, private) memory of this process in MiB."""
+    values = {}
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[name] = int(rest.split()[0])
+    return values['Rss'] / 1024, (values['Private_Clean'] + values['Private_Dirty']) / 1024
+
+
+def serve(app):
+    """The requests every worker answers before reporting its memory."""
+    from flask_jwt_extended import create_access_token
+    from models.models import User
+    from routes.auth import identity_claims
+    from seed import SEED_PASSWORD
+
+    with app.app_context():
+        volunteer = User.query.filter_by(role='volunteer').first()
+        headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=str(volunteer.user_id), additional_claims=identity_claims(volunteer))}
+        email = volunteer.email
+    client = app.test_client()
+    for path in ('/', '/'):
+        assert client.get(path, headers={'Accept-Encoding': 'gzip'}).status_code == 200
+    assert client.post('/login', json={'email': email, 'password': SEED_PASSWORD}).status_code == 200
+    assert client.get('/user/recommendations', headers=headers).status_code == 200
+
+
+def prefork(mode, workers, settings):
+    """Forks `workers` workers against the DATABASE_URL database and returns their (RSS, private) memory."""
+    app = None
+    if mode == 'preload':
+        from app import create_app
+        app = create_app(**settings, PRELOAD_APP=True)
+    read, write = os.pipe()
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                if app is None:
+                    from app import create_app  # Nothing is imported before the fork
+                    app = create_app(**settings)
+                serve(app)
+                os.write(write, (json.dumps(memory_mb()) + '\n').encode())
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+    os.close(write)
+    with os.fdopen(read) as results:
+        return [json.loads(line) for line in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters for the cold start')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', choices=['lazy', 'preload'], help=argparse.SUPPRESS)  # One prefork run
+    args = parser.parse_args()
+
+    if args.mode:
+        settings = {'PASSWORD_HASH_ITERATIONS': 1000, 'RATE_LIMIT_ENABLED': False}
+        print(json.dumps(prefork(args.mode, args.workers, settings)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'startup.db')}"
+        env = {**os.environ, 'DATABASE_URL': database_uri, 'READ_ENGINE': 'off', 'PASSWORD_HASH_WORKERS': '0'}
+
+        seed = "from app import create_app; from seed import seed_database\n" \
+               "with create_app().app_context(): seed_database(users=200, projects=1000, applications=1000)"
+        subprocess.run([sys.executable, '-c', seed], env={**env, 'PASSWORD_HASH_ITERATIONS': '1000'}, check=True)
+
+        runs = [json.loads(subprocess.run([sys.executable, '-c', COLD_START], env=env, check=True,
+                                          capture_output=True, text=True).stdout) for _ in range(args.runs)]
+        print(f"cold start, median of {args.runs}")
+        for key in runs[0]:
+            print(f"  {key:<18}{statistics.median(run[key] for run in runs):>10.1f}")
+
+        print(f"\n{args.workers} forked workers{'':<6}{'rss MB':>10}{'private MB':>12}")
+        for mode in ('lazy', 'preload'):
+            # Each mode in its own interpreter so neither inherits the other's imports
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.startup_benchmark', '--mode', mode,
+                                     '--workers', str(args.workers)], env=env, check=True,
+                                    capture_output=True, text=True).stdout
+            memory = json.loads(output.strip().splitlines()[-1])
+            print(f"  {mode:<25}{statistics.mean(m[0] for m in memory):>10.1f}{statistics.mean(m[1] for m in memory):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import os
+from datetime import timedelta
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def engine_options(database_uri):
+    """SQLAlchemy engine options for the configured database.
+
+    Pool sizing only applies to pooled (file or server) databases; an in-memory
+    SQLite database uses a single shared connection.
+    """
+    if database_uri.startswith('sqlite') and (':memory:' in database_uri or database_uri in ('sqlite://', 'sqlite:///')):
+        return {}
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 3600),
+        'pool_pre_ping': False,
+    }
+
+
+def read_database_uri(database_uri):
+    """URI of the engine that serves read-only requests, or None to read from the primary.
+
+    READ_DATABASE_URL points at a replica. Without it, a file-backed SQLite
+    database gets a separate read-only connection pool on the same file.
+    READ_ENGINE=off disables the split.
+    """
+    if os.environ.get('READ_ENGINE') == 'off':
+        return None
+    if os.environ.get('READ_DATABASE_URL'):
+        return os.environ['READ_DATABASE_URL']
+    if database_uri.startswith('sqlite:///') and engine_options(database_uri) and '?' not in database_uri:
+        return f"sqlite:///file:{database_uri[len('sqlite:///'):]}?mode=ro&uri=true"
+    return None
+
+
+class Config:
+    """Application settings, read from the environment with development defaults."""
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///app.db')  # SQLite database (for development)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False  # Disable modification tracking
+
+    # Engine for read-only requests (see RoutingSession in models/models.py)
+    READ_DATABASE_URI = read_database_uri(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = {'read': {'url': READ_DATABASE_URI, **engine_options(READ_DATABASE_URI)}} if READ_DATABASE_URI else {}
+
+    # Applied to every new SQLite connection (see models/sqlite_profile.py); set SQLITE_PROFILE=off to disable
+    SQLITE_PRAGMAS = {} if os.environ.get('SQLITE_PROFILE') == 'off' else {
+        'journal_mode': 'WAL',  # Readers no longer block behind a writer
+        'synchronous': 'NORMAL',  # Safe with WAL; fsync only at checkpoints
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),  # Wait for the write lock instead of failing
+        'cache_size': -_env_int('SQLITE_CACHE_KB', 65536),  # Negative values are KiB
+        'mmap_size': _env_int('SQLITE_MMAP_BYTES', 268435456),
+        'foreign_keys': 'ON',
+        'temp_store': 'MEMORY',
+    }
+
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'secret_key')  # Optional JWT secret key
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)  # Token expires in 30 minutes
+
+    # Password hashing (see services/passwords.py). Stored hashes made with other
+    # parameters are upgraded on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    PASSWORD_HASH_ITERATIONS = _env_int('PASSWORD_HASH_ITERATIONS', 600000)
+    PASSWORD_HASH_WORKERS = _env_int('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)  # 0 hashes on the request thread
+    PASSWORD_HASH_QUEUE_DEPTH = _env_int('PASSWORD_HASH_QUEUE_DEPTH', 64)  # Pending hashes before answering 503
+
+    # Token bucket limits on /login and /register as (burst, refills per minute); see services/rate_limit.py.
+    # RATE_LIMIT_STORE names a SQLite file to share the buckets between worker processes.
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED') not in ('0', 'off', 'false')
+    RATE_LIMIT_PER_IP = (_env_int('RATE_LIMIT_IP_BURST', 20), _env_int('RATE_LIMIT_IP_PER_MINUTE', 30))
+    RATE_LIMIT_PER_EMAIL = (_env_int('RATE_LIMIT_EMAIL_BURST', 5), _env_int('RATE_LIMIT_EMAIL_PER_MINUTE', 5))
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE') or None
+    RATE_LIMIT_MAX_KEYS = _env_int('RATE_LIMIT_MAX_KEYS', 100000)  # In-memory buckets kept per process
+
+    # Longest a /changes Server-Sent Events stream stays open before the client has to reconnect
+    CHANGE_STREAM_SECONDS = _env_int('CHANGE_STREAM_SECONDS', 300)
+
+    # Response compression (services/compression.py); set COMPRESS_ENABLED=off to disable
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED') not in ('0', 'off', 'false')
+    COMPRESS_MIN_SIZE = _env_int('COMPRESS_MIN_SIZE', 1024)  # Smaller bodies go out as they are
+    COMPRESS_CACHE_SIZE = _env_int('COMPRESS_CACHE_SIZE', 256)  # Compressed bodies kept by ETag
+
+    # Build the app for a prefork server's master process (gunicorn --preload); see preload() in app.py
+    PRELOAD_APP = os.environ.get('PRELOAD_APP') == '1'
+
+    # ASGI mode (asgi.py): threads running the synchronous views
+    ASGI_SYNC_THREADS = _env_int('ASGI_SYNC_THREADS', 32)
+
+    # Email notifications (Flask-Mail). With MAIL_ENABLED=1, application events are queued in the
+    # mail_outbox table and sent by `flask mail-worker` (see services/mail_outbox.py).
+    MAIL_ENABLED = os.environ.get('MAIL_ENABLED', '') not in ('', '0', 'off', 'false')
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'localhost')
+    MAIL_PORT = _env_int('MAIL_PORT', 25)
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') == '1'
+    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL') == '1'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@volunteer-matching.local')
+    MAIL_MAX_EMAILS = _env_int('MAIL_MAX_EMAILS', None)  # Messages per SMTP connection before reconnecting
+    MAIL_DIGEST_SECONDS = _env_int('MAIL_DIGEST_SECONDS', 60)  # Events for one recipient within this window share an email
+    MAIL_BATCH_SIZE = _env_int('MAIL_BATCH_SIZE', 100)  # Recipients per worker batch
+    MAIL_RETRY_SECONDS = _env_int('MAIL_RETRY_SECONDS', 30)  # First retry delay, doubled after every failure
+    MAIL_RETRY_MAX_SECONDS = _env_int('MAIL_RETRY_MAX_SECONDS', 3600)
+    MAIL_MAX_ATTEMPTS = _env_int('MAIL_MAX_ATTEMPTS', 8)  # Then the email is marked failed
+    MAIL_CLAIM_SECONDS = _env_int('MAIL_CLAIM_SECONDS', 300)  # Rows a worker claimed but never recorded are claimed again after this
+    MAIL_POLL_SECONDS = _env_int('MAIL_POLL_SECONDS', 5)  # Worker sleep when the outbox has nothing due
+
+    # Request metrics, exposed at /metrics. Set METRICS_SLOW_REQUEST_MS to log slow requests with their SQL.
+    METRICS_SLOW_REQUEST_MS = _env_int('METRICS_SLOW_REQUEST_MS', None)
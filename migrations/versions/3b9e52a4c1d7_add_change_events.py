@@ -0,0 +1,35 @@
+"""add change events
+
+Revision ID: 3b9e52a4c1d7
+Revises: 6cd7cea9ab78
+Create Date: 2026-10-18 16:32:08.214675
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e52a4c1d7'
+down_revision = '6cd7cea9ab78'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_events',
+    sa.Column('change_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event', sa.String(length=50), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('application_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('change_id')
+    )
+    op.create_index('ix_change_events_user_change', 'change_events', ['user_id', 'change_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_change_events_user_change', table_name='change_events')
+    op.drop_table('change_events')
@@ -0,0 +1,46 @@
+"""add project locations
+
+Revision ID: 5a7c3e91b2d4
+Revises: 8e4f0c2a7d15
+Create Date: 2026-10-18 18:12:09.417335
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a7c3e91b2d4'
+down_revision = '8e4f0c2a7d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('projects', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('projects', sa.Column('longitude', sa.Float(), nullable=True))
+
+    op.execute("""CREATE VIRTUAL TABLE projects_geo USING rtree(
+        project_id, min_lat, max_lat, min_lon, max_lon
+    )""")
+    op.execute("""CREATE TRIGGER projects_geo_insert AFTER INSERT ON projects
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO projects_geo VALUES (new.project_id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""")
+    op.execute("""CREATE TRIGGER projects_geo_delete AFTER DELETE ON projects BEGIN
+        DELETE FROM projects_geo WHERE project_id = old.project_id;
+    END""")
+    op.execute("""CREATE TRIGGER projects_geo_update AFTER UPDATE OF latitude, longitude ON projects BEGIN
+        DELETE FROM projects_geo WHERE project_id = old.project_id;
+        INSERT INTO projects_geo SELECT new.project_id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END""")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS projects_geo_update")
+    op.execute("DROP TRIGGER IF EXISTS projects_geo_delete")
+    op.execute("DROP TRIGGER IF EXISTS projects_geo_insert")
+    op.execute("DROP TABLE IF EXISTS projects_geo")
+    op.drop_column('projects', 'longitude')
+    op.drop_column('projects', 'latitude')
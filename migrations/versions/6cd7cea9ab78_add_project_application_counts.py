@@ -0,0 +1,37 @@
+"""add project application counts
+
+Revision ID: 6cd7cea9ab78
+Revises: d66aa398f57b
+Create Date: 2026-10-18 15:47:52.630917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6cd7cea9ab78'
+down_revision = 'd66aa398f57b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD/DROP COLUMN rather than batch mode: recreating projects would drop the search triggers
+    op.add_column('projects', sa.Column('pending_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('approved_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('projects', sa.Column('rejected_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing applications in one pass
+    op.execute("""
+        UPDATE projects SET
+            pending_count = (SELECT COUNT(*) FROM applications a WHERE a.project_id = projects.project_id AND a.status = 'Pending'),
+            approved_count = (SELECT COUNT(*) FROM applications a WHERE a.project_id = projects.project_id AND a.status = 'Approved'),
+            rejected_count = (SELECT COUNT(*) FROM applications a WHERE a.project_id = projects.project_id AND a.status = 'Rejected')
+    """)
+
+
+def downgrade():
+    op.drop_column('projects', 'rejected_count')
+    op.drop_column('projects', 'approved_count')
+    op.drop_column('projects', 'pending_count')
@@ -0,0 +1,36 @@
+"""add mail outbox
+
+Revision ID: 8e4f0c2a7d15
+Revises: 3b9e52a4c1d7
+Create Date: 2026-10-18 17:05:41.538209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f0c2a7d15'
+down_revision = '3b9e52a4c1d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mail_outbox',
+    sa.Column('outbox_id', sa.Integer(), nullable=False),
+    sa.Column('change_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('outbox_id')
+    )
+    op.create_index('ix_mail_outbox_status_due', 'mail_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_mail_outbox_status_due', table_name='mail_outbox')
+    op.drop_table('mail_outbox')
@@ -0,0 +1,32 @@
+"""add table versions
+
+Revision ID: 9d2b7f4e1a08
+Revises: c4e8a1d2f6b3
+Create Date: 2026-10-18 19:41:17.562093
+
+"""
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2b7f4e1a08'
+down_revision = 'c4e8a1d2f6b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Random start, so the versions (and ETags) of another database are never repeated
+    op.bulk_insert(table_versions, [{'name': 'projects', 'version': secrets.randbits(62)}])
+
+
+def downgrade():
+    op.drop_table('table_versions')
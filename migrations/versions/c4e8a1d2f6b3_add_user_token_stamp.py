@@ -0,0 +1,25 @@
+"""add user token stamp
+
+Revision ID: c4e8a1d2f6b3
+Revises: 5a7c3e91b2d4
+Create Date: 2026-10-18 19:02:44.108216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1d2f6b3'
+down_revision = '5a7c3e91b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing users get 0, which is what tokens issued before the stamp existed are checked against
+    op.add_column('users', sa.Column('token_stamp', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('users', 'token_stamp')
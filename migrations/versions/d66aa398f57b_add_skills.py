@@ -0,0 +1,27 @@
+"""add skills to users and projects
+
+Revision ID: d66aa398f57b
+Revises: fc07bac6ea92
+Create Date: 2026-10-18 11:26:05.117840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd66aa398f57b'
+down_revision = 'fc07bac6ea92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD/DROP COLUMN rather than batch mode: recreating projects would drop the search triggers
+    op.add_column('users', sa.Column('skills', sa.Text(), server_default='', nullable=False))
+    op.add_column('projects', sa.Column('skills', sa.Text(), server_default='', nullable=False))
+
+
+def downgrade():
+    op.drop_column('projects', 'skills')
+    op.drop_column('users', 'skills')
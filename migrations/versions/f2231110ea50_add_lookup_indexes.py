@@ -0,0 +1,34 @@
+"""add lookup indexes
+
+Revision ID: f2231110ea50
+Revises: 61b60d691b94
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2231110ea50'
+down_revision = '61b60d691b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicate applications (keeping the oldest one) so the unique index can be built
+    op.execute(
+        "DELETE FROM applications WHERE application_id NOT IN ("
+        "SELECT MIN(application_id) FROM applications GROUP BY user_id, project_id)"
+    )
+
+    op.create_index('ix_applications_user_project', 'applications', ['user_id', 'project_id'], unique=True)
+    op.create_index('ix_applications_project_status', 'applications', ['project_id', 'status'], unique=False)
+    op.create_index('ix_projects_organization_status', 'projects', ['organization_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_projects_organization_status', table_name='projects')
+    op.drop_index('ix_applications_project_status', table_name='applications')
+    op.drop_index('ix_applications_user_project', table_name='applications')
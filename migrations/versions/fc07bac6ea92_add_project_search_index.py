@@ -0,0 +1,42 @@
+"""add project search index
+
+Revision ID: fc07bac6ea92
+Revises: f2231110ea50
+Create Date: 2026-10-18 10:03:27.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc07bac6ea92'
+down_revision = 'f2231110ea50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE projects_fts USING fts5(
+        title, description, content='projects', content_rowid='project_id'
+    )""")
+    op.execute("""CREATE TRIGGER projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.project_id, new.title, new.description);
+    END""")
+    op.execute("""CREATE TRIGGER projects_fts_delete AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description) VALUES ('delete', old.project_id, old.title, old.description);
+    END""")
+    op.execute("""CREATE TRIGGER projects_fts_update AFTER UPDATE OF title, description ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description) VALUES ('delete', old.project_id, old.title, old.description);
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.project_id, new.title, new.description);
+    END""")
+
+    # Index the existing projects in one pass
+    op.execute("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS projects_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS projects_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS projects_fts_insert")
+    op.execute("DROP TABLE IF EXISTS projects_fts")
@@ -0,0 +1,74 @@
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.models import READ_BIND_KEY, db
+from models.sqlite_profile import apply_sqlite_profile, read_only_pragmas
+
+# Async DBAPI driver used for each synchronous backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_url(url):
+    """The async driver equivalent of a synchronous engine URL."""
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+class AsyncDatabase:
+    """Async engines and sessions mirroring an app's Flask-SQLAlchemy engines.
+
+    Each configured engine (the primary and the optional read bind) gets an async
+    twin on the same database with the same pool options and SQLite profile, so
+    async handlers share the models, the data and the session events of the
+    synchronous routes.
+
+    In-memory SQLite databases are private to their connection, so they cannot
+    be shared with an async engine; `enabled` is False for them and the
+    synchronous routes serve every request.
+    """
+
+    def __init__(self, app=None):
+        self.engines = {}
+        self.sessionmakers = {}
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def enabled(self):
+        return None in self.engines
+
+    def init_app(self, app):
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        self.engines = {}
+        self.sessionmakers = {}
+        with app.app_context():
+            for key, engine in db.engines.items():
+                if engine.dialect.name == 'sqlite' and engine.url.database in (None, '', ':memory:'):
+                    continue
+                if key is None:
+                    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+                else:
+                    options = {name: value for name, value in binds[key].items() if name != 'url'}
+                async_engine = create_async_engine(async_url(engine.url), **options)
+                pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+                apply_sqlite_profile(async_engine.sync_engine, read_only_pragmas(pragmas) if key == READ_BIND_KEY else pragmas)
+                self.engines[key] = async_engine
+                self.sessionmakers[key] = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def session(self, read=False):
+        """An AsyncSession on the read engine when `read` is set and one is configured, else on the primary."""
+        key = READ_BIND_KEY if read and READ_BIND_KEY in self.sessionmakers else None
+        async with self.sessionmakers[key]() as session:
+            yield session
+
+    async def dispose(self):
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+async_db = AsyncDatabase()
@@ -1,8 +1,59 @@
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import DDL, bindparam, event, func, insert, literal, or_, select, update
 from werkzeug.security import generate_password_hash, check_password_hash
+from services.passwords import current_hash_method
+
+# Bind key of the engine that serves read-only requests (configured in SQLALCHEMY_BINDS)
+READ_BIND_KEY = 'read'
+
+# HTTP methods whose handlers only read
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class RoutingSession(FlaskSession):
+    """Session that sends read-only requests to the read engine and everything else to the primary.
+
+    A request reads from the read engine when its method is in READ_METHODS, a
+    read engine is configured, and the session has not flushed any changes yet.
+    After the first flush every later query in the same request goes to the
+    primary, so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self.info.get('wrote') and not self._flushing \
+                and has_request_context() and request.method in READ_METHODS:
+            engine = self._db.engines.get(READ_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    session.info['wrote'] = True
+
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def normalize_skills(skills):
+    """Normalizes a list (or comma separated string) of skills/tags to a sorted,
+    de-duplicated list of lowercase tags."""
+    if not skills:
+        return []
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    return sorted({str(skill).strip().lower() for skill in skills if str(skill).strip()})
+
+def new_token_stamp():
+    """A random 31-bit stamp; random rather than a counter so a reused user id never matches an old token."""
+    return secrets.randbits(31)
 
 # User Model
 class User(db.Model):
@@ -13,6 +64,9 @@ class User(db.Model):
     email = db.Column(db.String(100), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)  # Store hashed password
     role = db.Column(db.String(50), nullable=False)  # volunteer or organization
+    skills = db.Column(db.Text, nullable=False, default='', server_default='')  # Comma separated skills/interests
+    # Embedded in every access token; replacing it revokes the user's existing tokens (see routes/auth.py)
+    token_stamp = db.Column(db.Integer, nullable=False, default=new_token_stamp, server_default='0')
 
     # Relationship to projects (for organizations)
     projects = db.relationship('Project', backref='organization', lazy=True, cascade="all, delete-orphan")
@@ -20,39 +74,172 @@ class User(db.Model):
     # Relationship to applications (for volunteers)
     applications = db.relationship('Application', backref='applicant', lazy=True, cascade="all, delete-orphan")
 
-    def __init__(self, name, email, password, role):
+    def __init__(self, name, email, password, role, skills=None, password_hash=None):
         self.name = name
         self.email = email
-        self.password = generate_password_hash(password)  # Hash password
+        # Routes pass a hash computed in the hashing pool; otherwise hash here
+        self.password = password_hash or generate_password_hash(password, method=current_hash_method())
         self.role = role
+        self.skill_list = skills
+
+    def revoke_tokens(self):
+        """Invalidates every access token issued to the user so far."""
+        self.token_stamp = new_token_stamp()
 
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
+    @property
+    def skill_list(self):
+        return self.skills.split(',') if self.skills else []
+
+    @skill_list.setter
+    def skill_list(self, skills):
+        self.skills = ','.join(normalize_skills(skills))
+
 
 # Project Model
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        db.Index('ix_projects_organization_status', 'organization_id', 'status'),  # Organization views filtered by status
+    )
 
     project_id = db.Column(db.Integer, primary_key=True)  # Primary Key
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     organization_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)  # Foreign Key to User (Organization)
     status = db.Column(db.String(50), nullable=False, default='Pending')  # Example statuses: Pending, Active, Completed
+    skills = db.Column(db.Text, nullable=False, default='', server_default='')  # Comma separated skills/tags wanted
+    latitude = db.Column(db.Float, nullable=True)  # Location in decimal degrees, indexed in projects_geo
+    longitude = db.Column(db.Float, nullable=True)
+
+    # Applicant counts by status, kept exact by adjust_application_counts()
+    pending_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    approved_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rejected_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationship to applications
     applications = db.relationship('Application', backref='project', lazy=True, cascade="all, delete-orphan")
 
-    def __init__(self, title, description, organization_id, status='Pending'):
+    def __init__(self, title, description, organization_id, status='Pending', skills=None, latitude=None, longitude=None):
         self.title = title
         self.description = description
         self.organization_id = organization_id
         self.status = status
+        self.skill_list = skills
+        self.latitude = latitude
+        self.longitude = longitude
+
+    @property
+    def skill_list(self):
+        return self.skills.split(',') if self.skills else []
+
+    @skill_list.setter
+    def skill_list(self, skills):
+        self.skills = ','.join(normalize_skills(skills))
+
+
+# Full-text index over project titles and descriptions (SQLite FTS5).
+# It is an external content table, so the triggers keep it in step with every
+# insert, update and delete on projects.
+PROJECT_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+        title, description, content='projects', content_rowid='project_id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.project_id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description) VALUES ('delete', old.project_id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF title, description ON projects BEGIN
+        INSERT INTO projects_fts(projects_fts, rowid, title, description) VALUES ('delete', old.project_id, old.title, old.description);
+        INSERT INTO projects_fts(rowid, title, description) VALUES (new.project_id, new.title, new.description);
+    END""",
+]
+
+for statement in PROJECT_SEARCH_DDL:
+    event.listen(Project.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Project.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS projects_fts').execute_if(dialect='sqlite'))
+
+# Spatial index over project locations (SQLite R*Tree), one point box per
+# located project. The triggers keep it in step with projects, so every write
+# path (ORM, bulk statements, cascades) maintains it.
+PROJECT_GEO_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS projects_geo USING rtree(
+        project_id, min_lat, max_lat, min_lon, max_lon
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS projects_geo_insert AFTER INSERT ON projects
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO projects_geo VALUES (new.project_id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS projects_geo_delete AFTER DELETE ON projects BEGIN
+        DELETE FROM projects_geo WHERE project_id = old.project_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS projects_geo_update AFTER UPDATE OF latitude, longitude ON projects BEGIN
+        DELETE FROM projects_geo WHERE project_id = old.project_id;
+        INSERT INTO projects_geo SELECT new.project_id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END""",
+]
+
+for statement in PROJECT_GEO_DDL:
+    event.listen(Project.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Project.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS projects_geo').execute_if(dialect='sqlite'))
+
+
+# Version stamps of tables whose responses are cached (see services/response_cache.py)
+class TableVersion(db.Model):
+    """One row per versioned table, bumped in the same transaction as every change to it.
+
+    Being in the database, the version is the same in every worker process and
+    survives restarts. It starts at a random value, so a recreated database
+    never repeats the versions (and ETags) of an earlier one.
+    """
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+
+VERSIONED_TABLES = ('projects',)
+
+
+@event.listens_for(TableVersion.__table__, 'after_create')
+def _insert_table_versions(target, connection, **kw):
+    connection.execute(target.insert(), [{'name': name, 'version': secrets.randbits(62)} for name in VERSIONED_TABLES])
+
+
+_SELECT_TABLE_VERSION = select(TableVersion.version).where(TableVersion.name == bindparam('name'))
+
+
+def table_version(name):
+    """The current version of a table.
+
+    Runs on the session's connection, so a read request asks the read engine,
+    but as a plain Core statement: this is read on every cached request and the
+    ORM execution path would cost more than the lookup itself.
+    """
+    return db.session.connection().execute(_SELECT_TABLE_VERSION, {'name': name}).scalar()
+
+
+def bump_table_version(connection, name):
+    """Increments a table's version on `connection`, inside the caller's transaction."""
+    connection.execute(update(TableVersion).where(TableVersion.name == name).values(version=TableVersion.version + 1))
+
+
+# Statuses an application can be in
+APPLICATION_STATUSES = ('Pending', 'Approved', 'Rejected')
 
 
 # Application Model
 class Application(db.Model):
     __tablename__ = 'applications'
+    __table_args__ = (
+        db.Index('ix_applications_user_project', 'user_id', 'project_id', unique=True),  # One application per volunteer and project
+        db.Index('ix_applications_project_status', 'project_id', 'status'),  # Applicants of a project by status
+    )
 
     application_id = db.Column(db.Integer, primary_key=True)  # Primary Key
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)  # Foreign Key to User (Volunteer)
@@ -63,3 +250,154 @@ class Application(db.Model):
         self.user_id = user_id
         self.project_id = project_id
         self.status = status
+
+
+# Project counter column for each application status
+APPLICATION_COUNT_COLUMNS = {
+    'Pending': 'pending_count',
+    'Approved': 'approved_count',
+    'Rejected': 'rejected_count',
+}
+
+
+def _count_applications(status, *criteria):
+    """Correlated subquery counting the current project's applications that match the criteria."""
+    return select(func.count()).where(
+        Application.project_id == Project.project_id, Application.status == status, *criteria
+    ).scalar_subquery()
+
+
+def adjust_application_counts(delta, *criteria):
+    """Adds `delta` times the matching applications to the counters of their projects.
+
+    Runs as one UPDATE with correlated subqueries inside the caller's transaction,
+    so the counts are computed from the rows as they are at that moment. Call it
+    with +1 after inserting applications (or after changing their status) and with
+    -1 before deleting them (or before changing their status).
+    """
+    projects = Project.__table__
+    db.session.execute(
+        update(projects)
+        .where(projects.c.project_id.in_(select(Application.project_id).where(*criteria)))
+        .values({
+            column: projects.c[column] + delta * _count_applications(status, *criteria)
+            for status, column in APPLICATION_COUNT_COLUMNS.items()
+        })
+    )
+
+
+def recount_application_counts():
+    """Recomputes every project's counters from the applications table.
+
+    Returns the (project_id, stored counts, actual counts) of the projects that had drifted.
+    """
+    actual = {
+        status: _count_applications(status).label(column)
+        for status, column in APPLICATION_COUNT_COLUMNS.items()
+    }
+    stored = [Project.__table__.c[column] for column in APPLICATION_COUNT_COLUMNS.values()]
+    drifted = db.session.execute(
+        select(Project.project_id, *stored, *actual.values())
+        .where(or_(*[column != actual[status] for status, column in zip(APPLICATION_COUNT_COLUMNS, stored)]))
+    ).all()
+
+    db.session.execute(update(Project.__table__).values({
+        column: _count_applications(status) for status, column in APPLICATION_COUNT_COLUMNS.items()
+    }))
+    db.session.commit()
+
+    width = len(APPLICATION_COUNT_COLUMNS)
+    return [(row[0], tuple(row[1:1 + width]), tuple(row[1 + width:])) for row in drifted]
+
+
+# Change Event Model: append-only log of changes users are told about through /changes
+class ChangeEvent(db.Model):
+    __tablename__ = 'change_events'
+
+    change_id = db.Column(db.Integer, primary_key=True)  # Primary Key, also the /changes cursor
+    user_id = db.Column(db.Integer, nullable=False)  # Recipient (no foreign key: the log outlives deleted rows)
+    event = db.Column(db.String(50), nullable=False)  # One of CHANGE_EVENTS
+    project_id = db.Column(db.Integer, nullable=False)
+    application_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(50), nullable=True)  # Application status, or project status for project.* events
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        db.Index('ix_change_events_user_change', 'user_id', 'change_id'),  # A user's events after a cursor
+    )
+
+
+CHANGE_EVENTS = (
+    'application.created',  # To the organization: someone applied
+    'application.canceled',  # To the organization: an applicant withdrew
+    'application.status',  # To the volunteer: their application was reviewed
+    'project.updated',  # To the applicants: a project they applied to changed
+    'project.deleted',  # To the applicants: a project they applied to is gone
+)
+
+
+def record_application_changes(event, recipient, *criteria, status=Application.status):
+    """Appends one `event` per application matching `criteria` to the change log.
+
+    `recipient` is Application.user_id (notify the applicant) or
+    Project.organization_id (notify the project's organization). Runs as one
+    INSERT ... SELECT in the caller's transaction, like adjust_application_counts,
+    so the events commit or roll back together with the change itself. Call it
+    after inserting or updating applications and before deleting them.
+
+    The recipients are remembered on the session; services/change_feed.py wakes
+    their waiting /changes requests once the transaction commits. With
+    MAIL_ENABLED, events in MAIL_EVENTS are also queued in the mail outbox in
+    the same transaction.
+    """
+    table = ChangeEvent.__table__
+    changes = db.session.execute(
+        insert(table).from_select(
+            ['user_id', 'event', 'project_id', 'application_id', 'status'],
+            select(recipient, literal(event), Application.project_id, Application.application_id, status)
+            .join_from(Application, Project, Project.project_id == Application.project_id)
+            .where(*criteria)
+        ).returning(table.c.change_id, table.c.user_id)
+    ).all()
+    db.session.info.setdefault('changed_users', set()).update(user_id for _, user_id in changes)
+
+    if changes and event in MAIL_EVENTS and has_app_context() and current_app.config.get('MAIL_ENABLED'):
+        queue_mail(changes)
+
+
+# Mail Outbox Model: change events waiting to be emailed by the mail worker (services/mail_outbox.py)
+class MailOutbox(db.Model):
+    __tablename__ = 'mail_outbox'
+
+    outbox_id = db.Column(db.Integer, primary_key=True)  # Primary Key
+    change_id = db.Column(db.Integer, nullable=False)  # The change event to report
+    user_id = db.Column(db.Integer, nullable=False)  # Recipient
+    status = db.Column(db.String(20), nullable=False, default='pending')  # One of 'pending', 'sending' (claimed by a worker), 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # Failed delivery attempts so far
+    next_attempt_at = db.Column(db.DateTime, nullable=False)  # Not sent before this time (digest window, backoff); claim expiry while 'sending'
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_mail_outbox_status_due', 'status', 'next_attempt_at'),  # The worker's due rows
+    )
+
+
+# Change events that are also sent by email
+MAIL_EVENTS = (
+    'application.created',
+    'application.status',
+)
+
+
+def queue_mail(changes):
+    """Queues an email for each (change_id, user_id) in the caller's transaction.
+
+    Rows become due after MAIL_DIGEST_SECONDS, so events for the same recipient
+    arriving within that window go out together as one digest.
+    """
+    due = datetime.utcnow() + timedelta(seconds=current_app.config.get('MAIL_DIGEST_SECONDS', 0))
+    db.session.execute(insert(MailOutbox.__table__), [
+        {'change_id': change_id, 'user_id': user_id, 'status': 'pending', 'attempts': 0, 'next_attempt_at': due}
+        for change_id, user_id in changes
+    ])
@@ -0,0 +1,67 @@
+from sqlalchemy import select, text
+
+from models.models import db, Application, ChangeEvent, MailOutbox, Project
+
+
+def route_queries():
+    """Representative statements issued by the routes on the hot lookup paths."""
+    return {
+        # apply_for_project / cancel_application duplicate check
+        'application by user and project': select(Application).where(
+            Application.user_id == 1, Application.project_id == 1
+        ),
+        # get_user_applications
+        'applications of a user': select(Application.application_id).join(
+            Project, Project.project_id == Application.project_id
+        ).where(Application.user_id == 1).order_by(Application.application_id),
+        # Applicants of a project, also used when a project's applications are deleted
+        'applications of a project by status': select(Application.application_id).where(
+            Application.project_id == 1, Application.status == 'Pending'
+        ),
+        # get_changes
+        'change events of a user after a cursor': select(ChangeEvent.change_id).where(
+            ChangeEvent.user_id == 1, ChangeEvent.change_id > 0
+        ).order_by(ChangeEvent.change_id),
+        # MailOutboxWorker.claim
+        'due mail outbox rows': select(MailOutbox.user_id).where(
+            MailOutbox.status.in_(('pending', 'sending')), MailOutbox.next_attempt_at <= '2026-01-01'
+        ),
+        # find_nearby (GET /projects/nearby), one bounding box through the projects_geo R*Tree
+        'located projects in a bounding box': text(
+            'SELECT p.project_id, p.latitude, p.longitude FROM projects_geo g '
+            'JOIN projects p ON p.project_id = g.project_id '
+            'WHERE g.max_lat >= -1.5 AND g.min_lat <= -1.0 AND g.max_lon >= 36.5 AND g.min_lon <= 37.0'
+        ),
+        # get_all_projects?organization_id=&status=
+        'projects of an organization by status': select(Project.project_id).where(
+            Project.organization_id == 1, Project.status == 'Active'
+        ),
+    }
+
+
+def explain(statement):
+    """Returns the EXPLAIN QUERY PLAN detail lines for a statement."""
+    compiled = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+
+def is_constrained_virtual_scan(line):
+    _, found, index = line.partition('VIRTUAL TABLE INDEX ')
+    return bool(found) and bool(index.partition(':')[2])
+
+
+def check_query_plans():
+    """Explains every route query and reports whether it avoids a full table scan.
+
+    Returns a list of (name, plan, uses_index) tuples.
+    """
+    results = []
+    for name, statement in route_queries().items():
+        plan = explain(statement)
+        # A bare "SCAN <table>" line means SQLite walks the whole table; a virtual
+        # table scan with constraints ("VIRTUAL TABLE INDEX 2:D1B0...") uses its index
+        uses_index = not any(line.startswith('SCAN') and 'USING' not in line and not is_constrained_virtual_scan(line)
+                             for line in plan)
+        results.append((name, plan, uses_index))
+    return results
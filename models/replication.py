@@ -0,0 +1,33 @@
+import sqlite3
+import time
+
+
+def copy_database(primary_path, replica_path):
+    """Copies a consistent snapshot of a SQLite database over the replica with the online backup API.
+
+    The primary stays writable while the copy runs; readers of the replica wait
+    on their busy timeout while the pages are swapped in.
+    """
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def replicate(primary_path, replica_path, interval, once=False):
+    """Keeps a SQLite replica in step with the primary by copying it every `interval` seconds.
+
+    This stands in for real streaming replication (e.g. Litestream or a
+    PostgreSQL hot standby) so READ_DATABASE_URL can be exercised locally;
+    the replica lags the primary by up to one interval.
+    """
+    while True:
+        started = time.perf_counter()
+        copy_database(primary_path, replica_path)
+        yield time.perf_counter() - started
+        if once:
+            return
+        time.sleep(interval)
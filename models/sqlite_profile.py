@@ -0,0 +1,28 @@
+from sqlalchemy import event
+
+
+def apply_sqlite_profile(engine, pragmas):
+    """Runs `PRAGMA name = value` for each entry on every new connection of a SQLite engine.
+
+    Does nothing for other databases or when no pragmas are configured.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    statements = [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def read_only_pragmas(pragmas):
+    """The profile for a read-only engine: no journal mode change, and writes refused."""
+    pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    pragmas['query_only'] = 'ON'
+    return pragmas
@@ -1,27 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.models import db, Application, User, Project
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models.models import db, Application, Project, User, APPLICATION_STATUSES, adjust_application_counts, record_application_changes
+from routes.auth import current_user_id, role_required
+from routes.pagination import get_page_args, split_page
+from services.serialization import APPLICANT_SCHEMA, APPLIED_PROJECT_SCHEMA
 
 application_routes = Blueprint('application_routes', __name__)
 
 # route for volunteer to apply for a project    
 @application_routes.route('/projects/<int:project_id>/apply', methods=['POST'])
-@jwt_required()
+@role_required('volunteer', {"success": False, "message": "Only volunteers can apply for projects."})
 def apply_for_project(project_id):
     """Allows a logged-in volunteer to apply for a project."""
     
     # Get the current user ID from the JWT token
-    user_id = get_jwt_identity()
-    
-    # Fetch the user details
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({"success": False, "message": "User not found."}), 404
-
-    # Ensure the user has the role of 'volunteer'
-    if user.role != 'volunteer':
-        return jsonify({"success": False, "message": "Only volunteers can apply for projects."}), 403
+    user_id = current_user_id()
 
     # Check if the project exists
     project = Project.query.get(project_id)
@@ -38,72 +32,65 @@ def apply_for_project(project_id):
     # Create a new application
     new_application = Application(user_id=user_id, project_id=project_id)
     db.session.add(new_application)
+    db.session.flush()
+    adjust_application_counts(1, Application.application_id == new_application.application_id)
+    record_application_changes('application.created', Project.organization_id, Application.application_id == new_application.application_id)
     db.session.commit()
 
     return jsonify({"success": True, "message": "Application submitted successfully!"}), 201
 
 
 @application_routes.route('/user/applications', methods=['GET'])
-@jwt_required()
+@role_required('volunteer', {"success": False, "message": "Only volunteers can view their applications."})
 def get_user_applications():
-    """Fetches all projects that the logged-in volunteer has applied to."""
+    """Fetches one page of the projects that the logged-in volunteer has applied to.
+
+    Supports `cursor`/`limit` pagination on application_id and an optional
+    `status` filter on the application status.
+    """
     
     # Get the current user ID from the JWT token
-    user_id = get_jwt_identity()
-    
-    # Fetch the user details
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({"success": False, "message": "User not found."}), 404
+    user_id = current_user_id()
+
+    cursor, limit, error = get_page_args({"success": False})
+    if error:
+        return error
+    status = request.args.get('status')
 
-    # Ensure the user has the role of 'volunteer'
-    if user.role != 'volunteer':
-        return jsonify({"success": False, "message": "Only volunteers can view their applications."}), 403
+    # Fetch the applications together with their projects in a single query
+    query = db.session.query(*APPLIED_PROJECT_SCHEMA.columns()).join(Project, Project.project_id == Application.project_id).filter(Application.user_id == user_id)
 
-    # Fetch all the applications for the logged-in user
-    applications = Application.query.filter_by(user_id=user_id).all()
+    if cursor is not None:
+        query = query.filter(Application.application_id > cursor)
+    if status:
+        query = query.filter(Application.status == status)
+
+    rows = query.order_by(Application.application_id).limit(limit + 1).all()
+    rows, next_cursor = split_page(rows, limit, 'application_id')
 
     # If no applications exist
-    if not applications:
+    if not rows and cursor is None:
         return jsonify({"success": False, "message": "No applications found."}), 404
 
     # Prepare a list of projects the user has applied to
-    applied_projects = []
-    for application in applications:
-        project = Project.query.get(application.project_id)
-        if project:
-            applied_projects.append({
-                "project_id": project.project_id,  # Correctly using project.project_id
-                "project_title": project.title,
-                "project_description": project.description,
-                "project_status": project.status
-            })
+    to_dict = APPLIED_PROJECT_SCHEMA.row_encoder()
+    applied_projects = [to_dict(row) for row in rows]
 
     return jsonify({
         "success": True,
         "message": "Fetched applied projects successfully.",
-        "data": applied_projects
+        "data": applied_projects,
+        "next_cursor": next_cursor
     }), 200
 
 
 @application_routes.route('/projects/<int:project_id>/cancel', methods=['DELETE'])
-@jwt_required()
+@role_required('volunteer', {"success": False, "message": "Only volunteers can cancel applications."})
 def cancel_application(project_id):
     """Allows a logged-in volunteer to cancel their application for a project."""
     
     # Get the current user ID from the JWT token
-    user_id = get_jwt_identity()
-    
-    # Fetch the user details
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({"success": False, "message": "User not found."}), 404
-
-    # Ensure the user has the role of 'volunteer'
-    if user.role != 'volunteer':
-        return jsonify({"success": False, "message": "Only volunteers can cancel applications."}), 403
+    user_id = current_user_id()
 
     # Check if the application exists
     application = Application.query.filter_by(user_id=user_id, project_id=project_id).first()
@@ -112,7 +99,215 @@ def cancel_application(project_id):
         return jsonify({"success": False, "message": "Application not found."}), 404
 
     # Delete the application
+    adjust_application_counts(-1, Application.application_id == application.application_id)
+    record_application_changes('application.canceled', Project.organization_id, Application.application_id == application.application_id)
     db.session.delete(application)
     db.session.commit()
 
     return jsonify({"success": True, "message": "Application canceled successfully!"}), 200
+
+
+MAX_BATCH_SIZE = 100
+
+
+def get_batch_project_ids():
+    """Reads and de-duplicates the `project_ids` list of a batch request.
+
+    Returns (project_ids, error_response).
+    """
+    data = request.get_json(silent=True) or {}
+    project_ids = data.get("project_ids")
+
+    if not isinstance(project_ids, list) or not project_ids or not all(type(pid) is int for pid in project_ids):
+        return None, (jsonify({"success": False, "message": "project_ids must be a non-empty list of project ids."}), 400)
+    if len(project_ids) > MAX_BATCH_SIZE:
+        return None, (jsonify({"success": False, "message": f"At most {MAX_BATCH_SIZE} projects can be sent at once."}), 400)
+
+    # Keep the request order but drop repeats
+    return list(dict.fromkeys(project_ids)), None
+
+
+@application_routes.route('/applications/batch', methods=['POST'])
+@role_required('volunteer', {"success": False, "message": "Only volunteers can apply for projects."})
+def batch_apply():
+    """Applies the logged-in volunteer to several projects in one transaction."""
+
+    user_id = current_user_id()
+    project_ids, error = get_batch_project_ids()
+    if error:
+        return error
+
+    # Validate every project with two set-based queries
+    existing_projects = {pid for (pid,) in db.session.query(Project.project_id).filter(Project.project_id.in_(project_ids))}
+    already_applied = {pid for (pid,) in db.session.query(Application.project_id).filter(
+        Application.user_id == user_id, Application.project_id.in_(project_ids)
+    )}
+
+    results = []
+    new_applications = []
+    for project_id in project_ids:
+        if project_id not in existing_projects:
+            results.append({"project_id": project_id, "success": False, "message": "Project not found."})
+        elif project_id in already_applied:
+            results.append({"project_id": project_id, "success": False, "message": "You have already applied for this project."})
+        else:
+            new_applications.append({"user_id": user_id, "project_id": project_id, "status": "Pending"})
+            results.append({"project_id": project_id, "success": True, "message": "Application submitted successfully!"})
+
+    if new_applications:
+        try:
+            # One executemany INSERT for the whole batch
+            db.session.execute(Application.__table__.insert(), new_applications)
+            criteria = (Application.user_id == user_id, Application.project_id.in_(
+                [application["project_id"] for application in new_applications]
+            ))
+            adjust_application_counts(1, *criteria)
+            record_application_changes('application.created', Project.organization_id, *criteria)
+            db.session.commit()
+        except IntegrityError:
+            # Another request applied for one of these projects in the meantime
+            db.session.rollback()
+            return jsonify({"success": False, "message": "Applications changed while applying, please retry."}), 409
+
+    return jsonify({
+        "success": bool(new_applications),
+        "message": f"Applied for {len(new_applications)} of {len(project_ids)} projects.",
+        "results": results
+    }), 200
+
+
+@application_routes.route('/applications/batch', methods=['DELETE'])
+@role_required('volunteer', {"success": False, "message": "Only volunteers can cancel applications."})
+def batch_cancel():
+    """Cancels the logged-in volunteer's applications for several projects in one transaction."""
+
+    user_id = current_user_id()
+    project_ids, error = get_batch_project_ids()
+    if error:
+        return error
+
+    applied = {pid for (pid,) in db.session.query(Application.project_id).filter(
+        Application.user_id == user_id, Application.project_id.in_(project_ids)
+    )}
+
+    # Remove them all with one set-based DELETE
+    if applied:
+        criteria = (Application.user_id == user_id, Application.project_id.in_(applied))
+        adjust_application_counts(-1, *criteria)
+        record_application_changes('application.canceled', Project.organization_id, *criteria)
+        Application.query.filter(*criteria).delete(synchronize_session=False)
+        db.session.commit()
+
+    results = [
+        {"project_id": project_id, "success": True, "message": "Application canceled successfully!"}
+        if project_id in applied else
+        {"project_id": project_id, "success": False, "message": "Application not found."}
+        for project_id in project_ids
+    ]
+
+    return jsonify({
+        "success": bool(applied),
+        "message": f"Canceled {len(applied)} of {len(project_ids)} applications.",
+        "results": results
+    }), 200
+
+
+def get_owned_project(project_id):
+    """Loads a project and checks that it belongs to the logged-in organization.
+
+    Returns (project, error_response).
+    """
+    project = Project.query.get(project_id)
+    if not project:
+        return None, (jsonify({"success": False, "message": "Project not found."}), 404)
+
+    if project.organization_id != current_user_id():
+        return None, (jsonify({"success": False, "message": "Unauthorized: You can only manage applications for your own projects."}), 403)
+
+    return project, None
+
+
+@application_routes.route('/projects/<int:project_id>/applications', methods=['GET'])
+@role_required('organization', {"success": False, "message": "Only organizations can view applicants."})
+def get_project_applications(project_id):
+    """Lists one page of the applicants to one of the organization's projects.
+
+    Supports `cursor`/`limit` pagination on application_id and an optional
+    `status` filter.
+    """
+    project, error = get_owned_project(project_id)
+    if error:
+        return error
+
+    cursor, limit, error = get_page_args({"success": False})
+    if error:
+        return error
+    status = request.args.get('status')
+
+    # Applications joined with their applicants in one query
+    query = db.session.query(*APPLICANT_SCHEMA.columns()).join(User, User.user_id == Application.user_id).filter(Application.project_id == project_id)
+
+    if cursor is not None:
+        query = query.filter(Application.application_id > cursor)
+    if status:
+        query = query.filter(Application.status == status)
+
+    rows = query.order_by(Application.application_id).limit(limit + 1).all()
+    rows, next_cursor = split_page(rows, limit, 'application_id')
+
+    to_dict = APPLICANT_SCHEMA.row_encoder()
+    applicants = [to_dict(row) for row in rows]
+
+    return jsonify({
+        "success": True,
+        "message": "Fetched applicants successfully.",
+        "data": applicants,
+        "next_cursor": next_cursor
+    }), 200
+
+
+@application_routes.route('/projects/<int:project_id>/applications', methods=['PATCH'])
+@role_required('organization', {"success": False, "message": "Only organizations can review applications."})
+def review_project_applications(project_id):
+    """Sets the status of many applications to one of the organization's projects.
+
+    Expects {"application_ids": [...], "status": "Approved" | "Rejected" | "Pending"}.
+    """
+    project, error = get_owned_project(project_id)
+    if error:
+        return error
+
+    data = request.get_json(silent=True) or {}
+    application_ids = data.get("application_ids")
+    status = data.get("status")
+
+    if status not in APPLICATION_STATUSES:
+        return jsonify({"success": False, "message": f"status must be one of: {', '.join(APPLICATION_STATUSES)}."}), 400
+    if not isinstance(application_ids, list) or not application_ids or not all(type(aid) is int for aid in application_ids):
+        return jsonify({"success": False, "message": "application_ids must be a non-empty list of application ids."}), 400
+    if len(application_ids) > MAX_BATCH_SIZE:
+        return jsonify({"success": False, "message": f"At most {MAX_BATCH_SIZE} applications can be reviewed at once."}), 400
+
+    # One set-based UPDATE, scoped to this project so other projects' applications are never touched.
+    # The counters move the applications out of their old status and into the new one.
+    criteria = (Application.project_id == project_id, Application.application_id.in_(application_ids))
+    adjust_application_counts(-1, *criteria)
+    updated = db.session.execute(
+        update(Application)
+        .where(*criteria)
+        .values(status=status)
+        .returning(Application.application_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    adjust_application_counts(1, *criteria)
+    record_application_changes('application.status', Application.user_id, *criteria)
+    db.session.commit()
+
+    not_found = sorted(set(application_ids) - set(updated))
+
+    return jsonify({
+        "success": bool(updated),
+        "message": f"Updated {len(updated)} of {len(set(application_ids))} applications to {status}.",
+        "updated": sorted(updated),
+        "not_found": not_found
+    }), 200
@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from models.async_session import async_db
+
+# Flask endpoint name -> async view, filled in by @async_view
+async_views = {}
+
+
+def async_view(endpoint):
+    """Registers an async implementation of a Flask endpoint for the ASGI entry point.
+
+    The async view runs inside a normal Flask request context and must return
+    exactly what the synchronous view of the same endpoint returns.
+    """
+    def decorator(fn):
+        async_views[endpoint] = fn
+        return fn
+    return decorator
+
+
+def build_environ(scope, body):
+    """A WSGI environ for an ASGI HTTP scope and its complete request body."""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'SERVER_NAME': scope['server'][0] if scope.get('server') else 'localhost',
+        'SERVER_PORT': str(scope['server'][1]) if scope.get('server') else '80',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncDispatcher:
+    """ASGI application serving a Flask app, with async views for selected endpoints.
+
+    Requests for an endpoint registered with @async_view are handled on the event
+    loop: the Flask request context, before/after request hooks and error
+    handlers all run as usual, but the view awaits its database queries
+    (through async_db) and its password hashing instead of blocking a thread.
+    The before_request hooks are synchronous and may do I/O (the rate limiter's
+    SQLite store), so they run on the thread pool, in the request's context.
+    Every other request is passed to the unchanged WSGI app on a pool of
+    ASGI_SYNC_THREADS worker threads.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=app.config.get('ASGI_SYNC_THREADS', 32),
+                                           thread_name_prefix='wsgi')
+        async_db.init_app(app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        environ = build_environ(scope, await read_body(receive))
+        view = None
+        if async_db.enabled:
+            try:
+                endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+                view = async_views.get(endpoint)
+            except Exception:
+                pass  # Routing errors are answered by the WSGI app
+        if view is None:
+            return await self.call_wsgi(environ, send)
+
+        response = await self.dispatch(environ, view)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    async def dispatch(self, environ, view):
+        """Flask's wsgi_app/full_dispatch_request, awaiting the view."""
+        app = self.app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            ctx.push()
+            try:
+                loop = asyncio.get_running_loop()
+                rv = await loop.run_in_executor(self.executor, contextvars.copy_context().run, app.preprocess_request)
+                if rv is None:
+                    rv = await view(**ctx.request.view_args)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.finalize_request(rv)
+        except Exception as e:
+            error = e
+            return app.handle_exception(e)
+        finally:
+            ctx.pop(error)
+
+    async def call_wsgi(self, environ, send):
+        """Runs the WSGI app on the thread pool, relaying its (possibly streamed) body as it is produced."""
+        loop = asyncio.get_running_loop()
+        messages = asyncio.Queue()
+
+        def put(message):
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+
+        def start_response(status, headers, exc_info=None):
+            put({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+            })
+
+        def run():
+            try:
+                body = self.app(environ, start_response)
+                try:
+                    for chunk in body:
+                        if chunk:
+                            put({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                finally:
+                    if hasattr(body, 'close'):
+                        body.close()
+            finally:
+                put({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+        future = loop.run_in_executor(self.executor, run)
+        while True:
+            message = await messages.get()
+            await send(message)
+            if message['type'] == 'http.response.body' and not message['more_body']:
+                break
+        await future
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return body
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
@@ -0,0 +1,118 @@
+import jwt
+from flask import g, jsonify, request
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+from sqlalchemy import select
+
+from models.async_session import async_db
+from models.models import User
+from routes.async_dispatch import async_view
+from routes.auth import cache_identity, current_user_id, identity_cache, identity_claims, load_identity
+from services.passwords import needs_rehash, password_hasher
+
+# Async twins of the views in user_routes.py, served by asgi.py. Responses must
+# stay identical to the synchronous views.
+
+@async_view("user_routes.register_user")
+async def register_user():
+    data = request.get_json()
+    name = data.get("name")
+    email = data.get("email")
+    password = data.get("password")
+    role = data.get("role")
+    skills = data.get("skills")  # Optional list of skills/interests
+
+    if not name or not email or not password or not role:
+        return jsonify({"error": "All fields (name, email, password, role) are required."}), 400
+
+    async with async_db.session() as session:
+        existing_user = await session.scalar(select(User).filter_by(email=email).limit(1))
+        if existing_user:
+            return jsonify({"error": "A user with this email already exists."}), 400
+
+        password_hash = await password_hasher.hash_async(password)
+
+        try:
+            new_user = User(name=name, email=email, password=None, role=role, skills=skills, password_hash=password_hash)
+            session.add(new_user)
+            await session.commit()
+
+            return jsonify({
+                "message": "User registered successfully!",
+                "user_id": new_user.user_id
+            }), 201
+        except Exception as e:
+            await session.rollback()
+            return jsonify({"error": "An error occurred while registering the user.", "details": str(e)}), 500
+
+@async_view("user_routes.login_user")
+async def login_user():
+    data = request.get_json()
+    email = data.get("email")
+    password = data.get("password")
+
+    if not email or not password:
+        return jsonify({"error": "Email and password are required."}), 400
+
+    async with async_db.session() as session:
+        user = await session.scalar(select(User).filter_by(email=email).limit(1))
+        if not user:
+            return jsonify({"error": "User not found."}), 404
+
+        if not await password_hasher.verify_async(user.password, password):
+            return jsonify({"error": "Invalid password."}), 401
+
+        # Transparently upgrade hashes made with outdated parameters
+        if needs_rehash(user.password):
+            user.password = await password_hasher.hash_async(password)
+            await session.commit()
+
+        access_token = create_access_token(identity=str(user.user_id), additional_claims=identity_claims(user))
+        cache_identity(user)  # The token's first requests are checked without a query
+
+    return jsonify({
+        "message": "Login successful!",
+        "access_token": access_token
+    }), 200
+
+def peek_token_subject():
+    """The user id in the request's bearer token, read without verifying the token.
+
+    None when there is no bearer token or it cannot be parsed.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None
+    try:
+        return int(jwt.decode(token, options={'verify_signature': False})['sub'])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return None
+
+async def preload_identity():
+    """Loads the identity of the token's user over async_db, ahead of verify_jwt_in_request.
+
+    The token check (routes.auth.token_revoked) reads it from g.preloaded_identity,
+    so it never queries the database on the event loop. The token is only peeked
+    at here; verify_jwt_in_request still validates it before anything is returned.
+    """
+    user_id = peek_token_subject()
+    if user_id is None:
+        return
+    entry = identity_cache.get(user_id)
+    if entry is None:
+        async with async_db.session(read=True) as session:
+            user = await session.get(User, user_id)
+        entry = cache_identity(user) if user else None
+    g.preloaded_identity = (user_id, entry)
+
+@async_view("user_routes.fetch_user_details")
+async def fetch_user_details():
+    await preload_identity()
+    verify_jwt_in_request()
+
+    # Snapshot of the user from the JWT identity, as loaded above
+    entry = load_identity(current_user_id())
+    if entry is None:
+        return jsonify({"error": "User not found."}), 404
+
+    # Return user details (excluding sensitive data like password)
+    return jsonify(entry[0]), 200
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, has_app_context, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from models.models import READ_METHODS, User, db
+from services.serialization import USER_SCHEMA
+
+IDENTITY_CACHE_SIZE = 1024
+
+# Seconds a cached identity is trusted by read requests. Other worker processes
+# do not see invalidations, so this bounds how long they accept a revoked token.
+IDENTITY_CACHE_TTL = 30
+
+
+def identity_claims(user):
+    """Additional JWT claims embedded at login so handlers can authorize without a query.
+
+    `stamp` is the user's token_stamp; a token whose stamp no longer matches has
+    been revoked (see token_revoked).
+    """
+    return {'role': user.role, 'stamp': user.token_stamp}
+
+
+class IdentityCache:
+    """Bounded LRU cache of user identity snapshots and token stamps keyed by user id.
+
+    Snapshots are plain dicts rather than ORM objects so they can be shared
+    across requests and sessions. Entries older than `ttl` seconds count as misses.
+    """
+
+    def __init__(self, maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """Returns (identity, token_stamp), or None."""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] > self.ttl:
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return entry[0], entry[1]
+
+    def put(self, user_id, identity, token_stamp):
+        with self.lock:
+            self.entries[user_id] = (identity, token_stamp, time.monotonic())
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def identity_snapshot(user):
+    """The user's public fields as cached and returned by /details."""
+    return USER_SCHEMA.object_encoder()(user)
+
+
+def cache_identity(user):
+    """Caches the user's snapshot and token stamp and returns them as (identity, token_stamp)."""
+    entry = (identity_snapshot(user), user.token_stamp)
+    identity_cache.put(user.user_id, *entry)
+    return entry
+
+
+def load_identity(user_id, fresh=False):
+    """Returns (identity, token_stamp) for a user, or None if the user no longer exists.
+
+    Served from the identity cache unless `fresh`; the database is only queried on a miss.
+    An identity an async view loaded for this request ahead of the token check
+    (g.preloaded_identity, see routes/async_user_routes.py) is used as is.
+    """
+    preloaded = g.get('preloaded_identity') if has_app_context() else None
+    if preloaded is not None and preloaded[0] == user_id:
+        return preloaded[1]
+
+    entry = None if fresh else identity_cache.get(user_id)
+    if entry is None:
+        user = db.session.get(User, user_id)
+        if not user:
+            identity_cache.invalidate(user_id)
+            return None
+        entry = cache_identity(user)
+    return entry
+
+
+def current_user_id():
+    """The id of the authenticated user, taken from the JWT identity."""
+    return int(get_jwt_identity())
+
+
+def get_current_identity():
+    """Returns a dict with the authenticated user's public fields, or None if the user no longer exists."""
+    entry = load_identity(current_user_id())
+    return entry[0] if entry else None
+
+
+def token_revoked(jwt_header, jwt_payload):
+    """JWTManager.token_in_blocklist_loader: rejects the tokens of deleted users and
+    tokens whose stamp has been replaced (User.revoke_tokens).
+
+    Read requests check against the identity cache. Writes always read the user's
+    current stamp, so a token revoked in another worker process can never write.
+    Tokens issued before stamps existed carry none and are checked as stamp 0.
+    """
+    entry = load_identity(int(jwt_payload['sub']), fresh=request.method not in READ_METHODS)
+    return entry is None or entry[1] != jwt_payload.get('stamp', 0)
+
+
+def current_role():
+    """The authenticated user's role, read from the token claims when present."""
+    claims = get_jwt()
+    if 'role' in claims:
+        return claims['role']
+
+    # Token issued before the role claim existed
+    identity = get_current_identity()
+    return identity['role'] if identity else None
+
+
+def role_required(role, error):
+    """Requires a valid JWT whose user has the given role.
+
+    `error` is the JSON body returned with a 403 when the role does not match,
+    so each route keeps its own error message.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            if current_role() != role:
+                return jsonify(error), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,111 @@
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select
+
+from models.models import db, ChangeEvent
+from routes.auth import current_user_id
+from routes.pagination import get_page_args
+from routes.streaming import format_sse
+from services.change_feed import change_notifier
+from services.serialization import CHANGE_EVENT_SCHEMA
+
+change_routes = Blueprint('change_routes', __name__)
+
+# Longest a long-poll request may wait for new events
+MAX_WAIT_SECONDS = 30
+
+# Comment line sent on an idle event stream so proxies keep the connection open
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def load_changes(user_id, since, limit):
+    """The user's events after `since`, oldest first.
+
+    Always read from the primary: the notifier wakes a waiting request as soon as
+    an event commits there, before a read replica may have caught up. Ends the
+    transaction afterwards so no connection is held while the request waits.
+    """
+    query = select(*CHANGE_EVENT_SCHEMA.columns()).where(
+        ChangeEvent.user_id == user_id, ChangeEvent.change_id > since
+    ).order_by(ChangeEvent.change_id).limit(limit)
+    rows = db.session.execute(query, bind_arguments={'bind': db.engine}).all()
+    db.session.close()
+
+    to_dict = CHANGE_EVENT_SCHEMA.row_encoder()
+    return [to_dict(row) for row in rows]
+
+
+@change_routes.route('/changes', methods=['GET'])
+@jwt_required()
+def get_changes():
+    """Returns the logged-in user's change events after a cursor.
+
+    Volunteers are told when their applications are reviewed and when projects
+    they applied to change; organizations when someone applies to or withdraws
+    from their projects (see CHANGE_EVENTS in models/models.py).
+
+    Query parameters:
+        since: change_id of the last event already seen (default 0); event
+            stream clients may send the Last-Event-ID header instead
+        limit: maximum events per response (capped at routes.pagination.MAX_PAGE_SIZE)
+        wait: long-poll; when there are no new events, hold the request up to
+            this many seconds (at most MAX_WAIT_SECONDS) until one arrives
+        stream: 'sse' (or `Accept: text/event-stream`) keeps the connection open
+            and pushes events as Server-Sent Events
+    """
+    user_id = current_user_id()
+    since = request.args.get('since', type=int)
+    if since is None:
+        since = request.headers.get('Last-Event-ID', 0, type=int)
+    _, limit, error = get_page_args()
+    if error:
+        return error
+
+    if request.args.get('stream') == 'sse' or request.accept_mimetypes.best == 'text/event-stream':
+        return stream_changes(user_id, since, limit)
+
+    wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_WAIT_SECONDS)
+    deadline = time.monotonic() + wait
+    while True:
+        # Read the version before querying so a commit in between still wakes us
+        version = change_notifier.version(user_id)
+        events = load_changes(user_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            break
+        change_notifier.wait(user_id, version, remaining)
+
+    return jsonify({'events': events, 'next_cursor': events[-1]['change_id'] if events else since}), 200
+
+
+def stream_changes(user_id, since, limit):
+    """Pushes the user's events as Server-Sent Events until CHANGE_STREAM_SECONDS have passed.
+
+    Each message carries the change_id as its id, so a reconnecting browser
+    resumes from Last-Event-ID.
+    """
+    deadline = time.monotonic() + current_app.config.get('CHANGE_STREAM_SECONDS', 300)
+
+    def generate():
+        cursor = since
+        yield 'retry: 3000\n\n'
+        while True:
+            version = change_notifier.version(user_id)
+            events = load_changes(user_id, cursor, limit)
+            for change in events:
+                yield format_sse(change, event=change['event'], id=change['change_id'])
+            if events:
+                cursor = events[-1]['change_id']
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if events:
+                continue  # There may be more than one batch waiting
+            if not change_notifier.wait(user_id, version, min(SSE_HEARTBEAT_SECONDS, remaining)):
+                yield ': keep-alive\n\n'
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
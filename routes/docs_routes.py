@@ -0,0 +1,39 @@
+import hashlib
+import threading
+
+from flask import Blueprint, Response, render_template, request
+
+docs_routes = Blueprint("docs_routes", __name__)
+
+
+class DocsPage:
+    """The API documentation page, rendered once per process.
+
+    Rendering happens on the first request, or up front in create_app when the
+    app is preloaded so forked workers share the bytes. The strong ETag lets
+    services/compression.py compress the page once per encoding.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rendered = None
+
+    def get(self):
+        """Returns (html, etag)."""
+        if self.rendered is None:
+            with self.lock:
+                if self.rendered is None:
+                    html = render_template("index.html").encode()
+                    self.rendered = (html, hashlib.sha1(html).hexdigest()[:16])
+        return self.rendered
+
+
+docs_page = DocsPage()
+
+# API documentation
+@docs_routes.route("/")
+def index():
+    html, etag = docs_page.get()
+    response = Response(html, mimetype="text/html")
+    response.set_etag(etag)
+    return response.make_conditional(request)
@@ -0,0 +1,39 @@
+from flask import jsonify, request
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def get_page_args(error_body=None):
+    """Reads the `cursor` and `limit` query parameters shared by paginated routes.
+
+    Returns (cursor, limit, error). The limit defaults to DEFAULT_PAGE_SIZE and
+    is capped at MAX_PAGE_SIZE. `error` is a 400 response when limit is not a
+    positive integer or cursor is not an integer (with `error_body`, e.g.
+    {"success": False}, merged into its JSON), and None otherwise.
+    """
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit')
+    try:
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        return None, None, (jsonify({**(error_body or {}), 'message': 'cursor must be an integer'}), 400)
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return None, None, (jsonify({**(error_body or {}), 'message': 'limit must be a positive integer'}), 400)
+    return cursor, min(limit, MAX_PAGE_SIZE), None
+
+
+def split_page(rows, limit, key):
+    """Trims a query result fetched with `limit + 1` rows to one page.
+
+    Returns the page and the cursor for the next page, or None when this is the
+    last page.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, getattr(rows[-1], key)
+    return rows, None
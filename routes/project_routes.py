@@ -1,117 +1,362 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.models import db, User, Project  # Import models
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from models.models import db, Application, Project, record_application_changes  # Import models
+from routes.auth import current_user_id, role_required
+from routes.pagination import get_page_args, split_page
+from routes.streaming import STREAM_BATCH_SIZE, stream_json_list, stream_ndjson, wants_stream
+from services.response_cache import cached_project_response
+from services.serialization import PROJECT_SCHEMA
 
 project_routes = Blueprint('projects', __name__)
 
+def parse_coordinates(latitude, longitude):
+    """Returns (latitude, longitude) as floats, or None unless both are numbers
+    within range (latitude -90..90, longitude -180..180)."""
+    if isinstance(latitude, bool) or isinstance(longitude, bool):
+        return None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if -90 <= latitude <= 90 and -180 <= longitude <= 180:  # Also rejects nan
+        return latitude, longitude
+    return None
+
+def read_location(data):
+    """The (latitude, longitude) of a project request body: (None, None) when both
+    are missing or null (no location), or None when they are invalid."""
+    if data.get('latitude') is None and data.get('longitude') is None:
+        return None, None
+    return parse_coordinates(data.get('latitude'), data.get('longitude'))
+
+INVALID_LOCATION = 'latitude and longitude must be given together, within -90..90 and -180..180'
+
 @project_routes.route('/projects', methods=['POST'])
-@jwt_required()  # Require authentication
+@role_required('organization', {'message': 'Unauthorized: Only organizations can create projects'})
 def create_project():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'organization':
-        return jsonify({'message': 'Unauthorized: Only organizations can create projects'}), 403
-    
     data = request.get_json()
     title = data.get('title')
     description = data.get('description')
 
     if not title or not description:
         return jsonify({'message': 'Title and description are required'}), 400
+
+    # The location is optional
+    location = read_location(data)
+    if location is None:
+        return jsonify({'message': INVALID_LOCATION}), 400
     
-    new_project = Project(title=title, description=description, organization_id=user.user_id)
+    new_project = Project(title=title, description=description, organization_id=current_user_id(), skills=data.get('skills'),
+                          latitude=location[0], longitude=location[1])
     db.session.add(new_project)
     db.session.commit()
     
     return jsonify({'message': 'Project created successfully', 'project_id': new_project.project_id}), 201
 
 @project_routes.route('/projects/<int:project_id>', methods=['PUT'])
-@jwt_required()
+@role_required('organization', {'message': 'Unauthorized: Only organizations can update projects'})
 def update_project(project_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'organization':
-        return jsonify({'message': 'Unauthorized: Only organizations can update projects'}), 403
-    
     project = Project.query.get(project_id)
     if not project:
         return jsonify({'message': 'Project not found'}), 404
     
-    if project.organization_id != user.user_id:
+    if project.organization_id != current_user_id():
         return jsonify({'message': 'Unauthorized: You can only update your own projects'}), 403
     
     data = request.get_json()
     project.title = data.get('title', project.title)
     project.description = data.get('description', project.description)
     project.status = data.get('status', project.status)
-    
+    if 'skills' in data:
+        project.skill_list = data['skills']
+    if 'latitude' in data or 'longitude' in data:
+        # Both null removes the location
+        location = read_location(data)
+        if location is None:
+            return jsonify({'message': INVALID_LOCATION}), 400
+        project.latitude, project.longitude = location
+
+    # Tell the applicants, with the new status
+    db.session.flush()
+    record_application_changes('project.updated', Application.user_id, Application.project_id == project_id, status=Project.status)
     db.session.commit()
     return jsonify({'message': 'Project updated successfully', 'project_id': project.project_id}), 200
 
 @project_routes.route('/projects/<int:project_id>', methods=['DELETE'])
-@jwt_required()
+@role_required('organization', {'success': False, 'message': 'Unauthorized: Only organizations can delete projects'})
 def delete_project(project_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'organization':
-        return jsonify({'success': False, 'message': 'Unauthorized: Only organizations can delete projects'}), 403
-    
     project = Project.query.get(project_id)
     if not project:
         return jsonify({'success': False, 'message': 'Project not found'}), 404
     
-    if project.organization_id != user.user_id:
+    if project.organization_id != current_user_id():
         return jsonify({'success': False, 'message': 'Unauthorized: You can only delete your own projects'}), 403
     
+    # Its applications are deleted with it; tell the applicants first
+    record_application_changes('project.deleted', Application.user_id, Application.project_id == project_id, status=Project.status)
     db.session.delete(project)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Project deleted successfully'}), 200
 
+# Columns a client may request through the `fields` query parameter
+PROJECT_FIELDS = PROJECT_SCHEMA.fields
+
+# Columns returned by the full-text search
+SEARCH_FIELDS = ('project_id', 'title', 'description', 'organization_id', 'status')
+
 # New route to fetch all projects (Accessible to any authenticated user)
 @project_routes.route('/projects', methods=['GET'])
 @jwt_required()
+@cached_project_response()
 def get_all_projects():
-    projects = Project.query.all()
-    
+    """Returns one page of projects, ordered by project_id.
+
+    Query parameters:
+        cursor: only return projects with a project_id greater than this value
+        limit: page size (capped at routes.pagination.MAX_PAGE_SIZE)
+        status, organization_id: optional filters
+        fields: comma separated list of columns to return
+        stream: 'json' or 'ndjson' streams every matching project (after the
+            cursor) instead of one page; `Accept: application/x-ndjson` also
+            selects ndjson
+    """
+    cursor, limit, error = get_page_args()
+    if error:
+        return error
+    stream = wants_stream(request)
+    status = request.args.get('status')
+    organization_id = request.args.get('organization_id', type=int)
+    fields = request.args.get('fields')
+
+    if fields:
+        requested = dict.fromkeys(name.strip() for name in fields.split(',') if name.strip())
+        unknown = [name for name in requested if name not in PROJECT_FIELDS]
+        if unknown:
+            return jsonify({'message': f"Unknown fields: {', '.join(unknown)}"}), 400
+        # Schema order, without repeats: reordered or repeated lists share one encoder
+        names = [name for name in PROJECT_FIELDS if name in requested]
+    else:
+        names = list(PROJECT_FIELDS)
+
+    # project_id is always selected (last, after the encoded fields) since it is the pagination key
+    columns = PROJECT_SCHEMA.columns(names)
+    if 'project_id' not in names:
+        columns.append(Project.project_id)
+
+    # Only load the selected columns instead of full Project objects
+    query = db.session.query(*columns)
+    if cursor is not None:
+        query = query.filter(Project.project_id > cursor)
+    if status:
+        query = query.filter(Project.status == status)
+    if organization_id is not None:
+        query = query.filter(Project.organization_id == organization_id)
+
+    to_dict = PROJECT_SCHEMA.row_encoder(names)
+
+    if stream:
+        # Walk the cursor in batches and encode as we go so memory stays flat
+        projects = (to_dict(row) for row in query.order_by(Project.project_id).yield_per(STREAM_BATCH_SIZE))
+        if stream == 'ndjson':
+            return stream_ndjson(projects)
+        return stream_json_list('projects', projects, next_cursor=None)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(Project.project_id).limit(limit + 1).all()
+    rows, next_cursor = split_page(rows, limit, 'project_id')
+
+    project_list = [to_dict(row) for row in rows]
+
+    return jsonify({'projects': project_list, 'next_cursor': next_cursor}), 200
+
+def to_match_query(text):
+    """Turns free text into an FTS5 query that matches every word, quoting each one
+    so user input can never be parsed as FTS5 syntax."""
+    words = text.split()
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in words)
+
+MAX_RECOMMENDATIONS = 50
+
+DEFAULT_NEARBY_RADIUS_KM = 25
+MAX_NEARBY_RADIUS_KM = 1000
+
+# Full-text search over project titles and descriptions
+@project_routes.route('/projects/search', methods=['GET'])
+@jwt_required()
+def search_projects():
+    """Returns projects matching `q`, best matches first (bm25).
+
+    Query parameters:
+        q: search text (required)
+        status: optional status filter
+        cursor, limit: pagination; the cursor is the next_cursor of the previous page
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'message': 'The search query q is required'}), 400
+
+    offset, limit, error = get_page_args()
+    if error:
+        return error
+    offset = max(offset or 0, 0)
+    status = request.args.get('status')
+
+    sql = """
+        SELECT p.project_id, p.title, p.description, p.organization_id, p.status
+        FROM projects_fts
+        JOIN projects p ON p.project_id = projects_fts.rowid
+        WHERE projects_fts MATCH :query
+    """
+    params = {'query': to_match_query(q), 'limit': limit + 1, 'offset': offset}
+    if status:
+        sql += ' AND p.status = :status'
+        params['status'] = status
+    sql += ' ORDER BY bm25(projects_fts) LIMIT :limit OFFSET :offset'
+
+    rows = db.session.execute(db.text(sql), params).all()
+    next_cursor = offset + limit if len(rows) > limit else None
+
+    to_dict = PROJECT_SCHEMA.row_encoder(SEARCH_FIELDS)
+    project_list = [to_dict(row) for row in rows[:limit]]
+
+    return jsonify({'projects': project_list, 'next_cursor': next_cursor}), 200
+
+# Projects near a point, nearest first
+@project_routes.route('/projects/nearby', methods=['GET'])
+@jwt_required()
+def get_nearby_projects():
+    """Returns the projects within `radius` km of (lat, lon), nearest first.
+
+    Query parameters:
+        lat, lon: the point, in decimal degrees (required)
+        radius: search radius in km (default DEFAULT_NEARBY_RADIUS_KM, at most MAX_NEARBY_RADIUS_KM)
+        status: optional status filter
+        cursor, limit: pagination; the cursor is the next_cursor of the previous page
+    """
+    # The distance computation (and numpy) is loaded on the first nearby search
+    from services.geo import find_nearby
+
+    if request.args.get('lat') is None or request.args.get('lon') is None:
+        return jsonify({'message': 'lat and lon are required'}), 400
+    point = parse_coordinates(request.args.get('lat'), request.args.get('lon'))
+    if point is None:
+        return jsonify({'message': 'lat must be within -90..90 and lon within -180..180'}), 400
+    radius = request.args.get('radius', DEFAULT_NEARBY_RADIUS_KM, type=float)
+    if not 0 < radius <= MAX_NEARBY_RADIUS_KM:
+        return jsonify({'message': f'radius must be greater than 0 and at most {MAX_NEARBY_RADIUS_KM} km'}), 400
+
+    offset, limit, error = get_page_args()
+    if error:
+        return error
+    offset = max(offset or 0, 0)
+
+    # Fetch one extra match to know whether another page exists
+    ids, distances = find_nearby(*point, radius, offset + limit + 1, request.args.get('status'))
+    next_cursor = offset + limit if len(ids) > offset + limit else None
+    ids, distances = ids[offset:offset + limit], distances[offset:offset + limit]
+
+    # Load the page in one query and keep the distance order
+    rows = {}
+    if ids:
+        rows = {row.project_id: row for row in db.session.query(*PROJECT_SCHEMA.columns()).filter(Project.project_id.in_(ids))}
+
+    to_dict = PROJECT_SCHEMA.row_encoder()
     project_list = [
-        {
-            'project_id': project.project_id,
-            'title': project.title,
-            'description': project.description,
-            'organization_id': project.organization_id,
-            'status': project.status
-        } 
-        for project in projects
+        {**to_dict(rows[project_id]), 'distance_km': round(distance, 3)}
+        for project_id, distance in zip(ids, distances)
+        if project_id in rows
     ]
-    
-    return jsonify({'projects': project_list}), 200
+
+    return jsonify({'projects': project_list, 'next_cursor': next_cursor}), 200
 
 @project_routes.route('/projects/<int:project_id>', methods=['GET'])
-@jwt_required()
+@role_required('organization', {'message': 'Unauthorized: Only organizations can view their projects'})
+@cached_project_response(vary=current_user_id)
 def get_project(project_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'organization':
-        return jsonify({'message': 'Unauthorized: Only organizations can view their projects'}), 403
-
     # Fetch the specific project
-    project = Project.query.filter_by(project_id=project_id, organization_id=user.user_id).first()
+    project = Project.query.filter_by(project_id=project_id, organization_id=current_user_id()).first()
 
     if not project:
         return jsonify({'message': 'Project not found or unauthorized access'}), 404
 
-    project_data = {
-        'project_id': project.project_id,
-        'title': project.title,
-        'description': project.description,
-        'organization_id': project.organization_id,
-        'status': project.status
-    }
+    return jsonify(PROJECT_SCHEMA.object_encoder()(project)), 200
+
+
+
+# Project recommendations for the logged-in volunteer
+@project_routes.route('/user/recommendations', methods=['GET'])
+@role_required('volunteer', {'message': 'Unauthorized: Only volunteers can get recommendations'})
+def get_recommendations():
+    """Returns the open projects that best match the volunteer's skills.
+
+    Query parameters:
+        limit: number of projects to return (top-k, capped at MAX_RECOMMENDATIONS)
+    """
+    # The matcher (and numpy) is loaded on the first recommendation, or up front when the app is preloaded
+    from services.matching import matching_engine
+
+    k = min(max(request.args.get('limit', 10, type=int), 1), MAX_RECOMMENDATIONS)
+    matches = matching_engine.recommend(current_user_id(), k)
+
+    # Load the matched projects in one query and keep the ranking order
+    projects = {}
+    if matches:
+        matched_ids = [project_id for project_id, _ in matches]
+        projects = {project.project_id: project for project in Project.query.filter(Project.project_id.in_(matched_ids))}
 
-    return jsonify(project_data), 200
+    to_dict = PROJECT_SCHEMA.object_encoder()
+    recommendations = [
+        {**to_dict(projects[project_id]), 'score': round(score, 4)}
+        for project_id, score in matches
+        if project_id in projects
+    ]
+
+    return jsonify({'recommendations': recommendations}), 200
+
+# Applicant counts for the logged-in organization's projects
+@project_routes.route('/organization/dashboard', methods=['GET'])
+@role_required('organization', {'message': 'Unauthorized: Only organizations can view their dashboard'})
+def get_organization_dashboard():
+    """Returns per-project applicant counts by status, plus totals.
+
+    Reads only the counter columns on projects (no scan of applications).
+    Supports `cursor`/`limit` pagination over the projects.
+    """
+    organization_id = current_user_id()
+    cursor, limit, error = get_page_args()
+    if error:
+        return error
+    counters = (Project.pending_count, Project.approved_count, Project.rejected_count)
 
+    query = db.session.query(Project.project_id, Project.title, Project.status, *counters).filter(
+        Project.organization_id == organization_id
+    )
+    if cursor is not None:
+        query = query.filter(Project.project_id > cursor)
+    rows = query.order_by(Project.project_id).limit(limit + 1).all()
+    rows, next_cursor = split_page(rows, limit, 'project_id')
+
+    totals = db.session.query(*[func.coalesce(func.sum(counter), 0) for counter in counters]).filter(
+        Project.organization_id == organization_id
+    ).one()
+
+    projects = [
+        {
+            'project_id': row.project_id,
+            'title': row.title,
+            'status': row.status,
+            'applications': {
+                'pending': row.pending_count,
+                'approved': row.approved_count,
+                'rejected': row.rejected_count
+            }
+        }
+        for row in rows
+    ]
 
+    return jsonify({
+        'projects': projects,
+        'totals': {'pending': totals[0], 'approved': totals[1], 'rejected': totals[2]},
+        'next_cursor': next_cursor
+    }), 200
@@ -0,0 +1,58 @@
+from flask import Response, current_app, stream_with_context
+
+# Rows fetched from the database cursor at a time while streaming
+STREAM_BATCH_SIZE = 1000
+
+
+def stream_json_list(key, items, **extra):
+    """Streams `{key: [item, ...], **extra}` as JSON without building the list in memory.
+
+    `items` is any iterable of JSON serializable objects, typically a generator
+    over a query executed with yield_per.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '{' + dumps(key) + ': ['
+        first = True
+        for item in items:
+            yield dumps(item) if first else ', ' + dumps(item)
+            first = False
+        yield ']'
+        for name, value in extra.items():
+            yield ', ' + dumps(name) + ': ' + dumps(value)
+        yield '}\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def stream_ndjson(items):
+    """Streams items as newline delimited JSON, one object per line."""
+    dumps = current_app.json.dumps
+
+    def generate():
+        for item in items:
+            yield dumps(item) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def format_sse(data, event=None, id=None):
+    """One Server-Sent Events message with a JSON `data` payload."""
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {current_app.json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def wants_stream(request):
+    """Returns 'ndjson', 'json' or None depending on the `stream` parameter and Accept header."""
+    stream = request.args.get('stream')
+    if stream in ('json', 'ndjson'):
+        return stream
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        return 'ndjson'
+    return None
@@ -1,10 +1,35 @@
+import math
+
 from flask import Blueprint, jsonify, request
-from models.models import User, db
-from werkzeug.security import check_password_hash, generate_password_hash
+from models.models import Application, ChangeEvent, MailOutbox, Project, User, db, adjust_application_counts, record_application_changes
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from routes.auth import cache_identity, get_current_identity, identity_cache, identity_claims
+from services.passwords import HashingPoolFull, needs_rehash, password_hasher
+from services.rate_limit import rate_limiter
 
 user_routes = Blueprint("user_routes", __name__)
 
+# Unauthenticated endpoints that hash a password on every call
+RATE_LIMITED_ENDPOINTS = ("user_routes.register_user", "user_routes.login_user")
+
+# Throttle credential attempts per client IP and per email before any hashing happens
+@user_routes.before_request
+def throttle_credential_attempts():
+    if request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+
+    data = request.get_json(silent=True)
+    email = data.get("email") if isinstance(data, dict) else None
+    retry_after = rate_limiter.check(request.remote_addr, email)
+    if retry_after:
+        return jsonify({"error": "Too many attempts, please retry later."}), 429, {"Retry-After": str(math.ceil(retry_after))}
+
+# Password hashing runs in a bounded pool; tell clients to retry when it is saturated
+@user_routes.errorhandler(HashingPoolFull)
+def hashing_pool_full(error):
+    db.session.rollback()
+    return jsonify({"error": "The server is busy, please retry shortly."}), 503, {"Retry-After": "1"}
+
 # User registration route
 @user_routes.route("/register", methods=["POST"])
 def register_user():
@@ -13,6 +38,7 @@ def register_user():
     email = data.get("email")
     password = data.get("password")
     role = data.get("role")
+    skills = data.get("skills")  # Optional list of skills/interests
 
     if not name or not email or not password or not role:
         return jsonify({"error": "All fields (name, email, password, role) are required."}), 400
@@ -21,8 +47,10 @@ def register_user():
     if existing_user:
         return jsonify({"error": "A user with this email already exists."}), 400
 
+    password_hash = password_hasher.hash(password)
+
     try:
-        new_user = User(name=name, email=email, password=password, role=role)
+        new_user = User(name=name, email=email, password=None, role=role, skills=skills, password_hash=password_hash)
         db.session.add(new_user)
         db.session.commit()
 
@@ -48,10 +76,16 @@ def login_user():
     if not user:
         return jsonify({"error": "User not found."}), 404
 
-    if not check_password_hash(user.password, password):
+    if not password_hasher.verify(user.password, password):
         return jsonify({"error": "Invalid password."}), 401
 
-    access_token = create_access_token(identity=str(user.user_id))
+    # Transparently upgrade hashes made with outdated parameters
+    if needs_rehash(user.password):
+        user.password = password_hasher.hash(password)
+        db.session.commit()
+
+    access_token = create_access_token(identity=str(user.user_id), additional_claims=identity_claims(user))
+    cache_identity(user)  # The token's first requests are checked without a query
 
     return jsonify({
         "message": "Login successful!",
@@ -69,19 +103,13 @@ def logout_user():
 @user_routes.route("/details", methods=["GET"])
 @jwt_required()  # Require valid JWT token
 def fetch_user_details():
-    user_id = get_jwt_identity()  # Get the user ID from the JWT token
-    user = User.query.filter_by(user_id=user_id).first()
+    identity = get_current_identity()  # Cached snapshot of the user from the JWT identity
 
-    if not user:
+    if not identity:
         return jsonify({"error": "User not found."}), 404
 
     # Return user details (excluding sensitive data like password)
-    return jsonify({
-        "user_id": user.user_id,
-        "name": user.name,
-        "email": user.email,
-        "role": user.role
-    }), 200
+    return jsonify(identity), 200
 
 # Update user route
 @user_routes.route("/update", methods=["PUT"])
@@ -96,14 +124,23 @@ def update_user():
     data = request.get_json()
     name = data.get("name")
     password = data.get("password")
+    skills = data.get("skills")
 
     if name:
         user.name = name
     if password:
-        user.password = generate_password_hash(password)  # Hash the password
+        user.password = password_hasher.hash(password)  # Hash the password
+        user.revoke_tokens()  # Sessions opened with the old password end here
+    if skills is not None:
+        user.skill_list = skills
 
     try:
         db.session.commit()
+        identity_cache.invalidate(user.user_id)
+        if password:
+            # The caller's own token was revoked too; hand it a new one
+            access_token = create_access_token(identity=str(user.user_id), additional_claims=identity_claims(user))
+            return jsonify({"message": "User updated successfully!", "access_token": access_token}), 200
         return jsonify({"message": "User updated successfully!"}), 200
     except Exception as e:
         db.session.rollback()
@@ -123,8 +160,16 @@ def delete_user():
         return jsonify({"error": "User not found."}), 404
 
     try:
+        # The user's applications (and an organization's projects) are deleted with them;
+        # take them off their projects' counters and tell the other side first
+        adjust_application_counts(-1, Application.user_id == user.user_id)
+        record_application_changes('application.canceled', Project.organization_id, Application.user_id == user.user_id)
+        record_application_changes('project.deleted', Application.user_id, Project.organization_id == user.user_id, status=Project.status)
+        ChangeEvent.query.filter_by(user_id=user.user_id).delete(synchronize_session=False)
+        MailOutbox.query.filter_by(user_id=user.user_id).delete(synchronize_session=False)
         db.session.delete(user)  # Delete the user
         db.session.commit()
+        identity_cache.invalidate(user.user_id)
         return jsonify({"message": "User account deleted successfully!"}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,88 +1,226 @@
-import os
-from flask import Flask
-from models.models import db, User, Project, Application  # Ensure this imports correctly from your models package
+import random
+import time
 
-# Create the Flask app
-app = Flask(__name__)
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from werkzeug.security import generate_password_hash
 
-# Set the correct database path
-base_dir = os.path.abspath(os.path.dirname(__file__))  # Directory of seed.py
-db_path = os.path.join(base_dir, "instance", "app.db")  # Path to app.db in instance/
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+from models.models import db, User, Project, Application, PROJECT_GEO_DDL, PROJECT_SEARCH_DDL, bump_table_version, recount_application_counts
+from services.passwords import current_hash_method
 
-# Initialize the database
-db.init_app(app)
+# Every seeded user gets this password; it is hashed once and the hash reused
+SEED_PASSWORD = "password123"
 
-def seed_data():
-    """Seed the database with initial data."""
-    with app.app_context():
+CHUNK_SIZE = 10000
+
+FIRST_NAMES = ["Sophia", "John", "Olivia", "David", "Emily", "Michael", "Isabella", "James", "Lily", "Matthew",
+               "Nathaniel", "Laura", "Daniel", "Grace", "Robert", "Charlotte", "Lucas", "Ava", "Amina", "Kevin"]
+LAST_NAMES = ["Turner", "Patterson", "Carter", "Bennett", "Rodriguez", "Clark", "Martinez", "Anderson", "Moore", "Lee",
+              "Green", "Gomez", "Young", "Wells", "King", "Harris", "Foster", "Walker", "Johnson", "Otieno"]
+SKILLS = ["teaching", "coding", "first aid", "cooking", "driving", "fundraising", "gardening", "construction",
+          "translation", "design", "writing", "photography", "counseling", "logistics", "event planning",
+          "animal care", "tutoring", "data entry", "marketing", "music"]
+CAUSES = ["Community Park", "Animal Shelter", "Food Bank", "Coding Bootcamp", "Urban Farming", "Disaster Relief",
+          "Literacy", "Senior Care", "Beach", "Youth Mentoring", "Clean Water", "Health Outreach"]
+ACTIVITIES = ["Cleanup", "Support", "Drive", "Workshop", "Initiative", "Fundraiser", "Campaign", "Program"]
+SENTENCES = [
+    "Volunteers will help organize and run activities for the local community.",
+    "No prior experience is needed and training is provided on the first day.",
+    "We are looking for reliable people who can commit a few hours every week.",
+    "The program runs on weekends and finishes with a celebration for all participants.",
+    "Materials, meals and transport to the site are covered by the organization.",
+    "This project supports families who have been affected by recent hardship.",
+    "Participants will work in small teams led by an experienced coordinator.",
+    "Your contribution makes a lasting difference to the people we serve.",
+]
+# Projects are scattered around these cities (latitude, longitude); some have no location
+CITIES = [(-1.2921, 36.8219), (-4.0435, 39.6682), (-0.0917, 34.7680), (-0.3031, 36.0800), (0.5143, 35.2698),
+          (-0.4167, 36.9500), (0.0463, 37.6559), (-3.2192, 40.1169), (3.1191, 35.5973), (-1.5177, 37.2634)]
+CITY_SPREAD = 0.3  # Degrees of jitter around a city (about 33 km)
+PROJECT_STATUSES = ["Active", "Active", "Pending", "Completed"]
+APPLICATION_STATUSES = ["Pending", "Pending", "Approved", "Rejected"]
+
+
+def generate_users(rng, count, start_id, password_hash):
+    """Yields user rows; every tenth user is an organization."""
+    for user_id in range(start_id, start_id + count):
+        yield {
+            "user_id": user_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"user{user_id}@example.org",
+            "password": password_hash,
+            "role": "organization" if user_id % 10 == 0 else "volunteer",
+            "skills": ",".join(sorted(rng.sample(SKILLS, rng.randint(1, 4)))),
+        }
+
+
+def generate_location(rng):
+    """A (latitude, longitude) near one of CITIES, or (None, None) for one project in ten."""
+    if rng.random() < 0.1:
+        return None, None
+    latitude, longitude = rng.choice(CITIES)
+    return (round(latitude + rng.uniform(-CITY_SPREAD, CITY_SPREAD), 6),
+            round(longitude + rng.uniform(-CITY_SPREAD, CITY_SPREAD), 6))
+
+
+def generate_projects(rng, count, start_id, organization_ids, location_rng):
+    for project_id in range(start_id, start_id + count):
+        latitude, longitude = generate_location(location_rng)
+        yield {
+            "project_id": project_id,
+            "title": f"{rng.choice(CAUSES)} {rng.choice(ACTIVITIES)} #{project_id}",
+            "description": " ".join(rng.sample(SENTENCES, rng.randint(2, 5))),
+            "organization_id": rng.choice(organization_ids),
+            "status": rng.choice(PROJECT_STATUSES),
+            "skills": ",".join(sorted(rng.sample(SKILLS, rng.randint(1, 3)))),
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+
+
+def generate_applications(rng, count, start_id, volunteer_ids, project_ids):
+    """Yields applications for distinct (volunteer, project) pairs."""
+    count = min(count, len(volunteer_ids) * len(project_ids))
+    seen = set()
+    application_id = start_id
+    while len(seen) < count:
+        pair = (rng.choice(volunteer_ids), rng.choice(project_ids))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        yield {
+            "application_id": application_id,
+            "user_id": pair[0],
+            "project_id": pair[1],
+            "status": rng.choice(APPLICATION_STATUSES),
+        }
+        application_id += 1
+
+
+def bulk_insert(table, rows):
+    """Inserts rows in executemany chunks inside one transaction and returns the row count."""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            db.session.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        total += len(chunk)
+    db.session.commit()
+    return total
+
+
+def suspend_project_indexes():
+    """Drops the projects_fts and projects_geo triggers so bulk inserts skip per-row indexing.
+
+    Returns False when there are no such indexes (e.g. not SQLite).
+    """
+    if db.engine.dialect.name != "sqlite":
+        return False
+    exists = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+    )).first()
+    if not exists:
+        return False
+    for trigger in ("projects_fts_insert", "projects_fts_delete", "projects_fts_update",
+                    "projects_geo_insert", "projects_geo_delete", "projects_geo_update"):
+        db.session.execute(db.text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    return True
+
+
+def resume_project_indexes():
+    """Rebuilds projects_fts and projects_geo in one pass each and restores their triggers."""
+    db.session.execute(db.text("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')"))
+    db.session.execute(db.text("DELETE FROM projects_geo"))
+    db.session.execute(db.text(
+        "INSERT INTO projects_geo SELECT project_id, latitude, latitude, longitude, longitude FROM projects "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    ))
+    for statement in PROJECT_SEARCH_DDL[1:] + PROJECT_GEO_DDL[1:]:
+        db.session.execute(db.text(statement))
+    db.session.commit()
+
+
+def next_id(column):
+    return (db.session.query(func.max(column)).scalar() or 0) + 1
+
+
+def seed_database(users=20, projects=10, applications=10, seed=0, drop=True):
+    """Generates deterministic synthetic data and bulk loads it.
+
+    The same arguments (and an empty database) always produce the same rows.
+    """
+    rng = random.Random(seed)
+
+    if drop:
         # Drop all tables and recreate them for a fresh start
         db.drop_all()
         db.create_all()
 
-        # Seed Users (Organizations & Volunteers)
-        users = [
-            User(name="Sophia Turner", email="sophia.turner@greenearth.org", password="volunteerpass123", role="volunteer"),
-            User(name="John Patterson", email="john.patterson@techforgood.org", password="techpass987", role="organization"),
-            User(name="Olivia Carter", email="olivia.carter@helpinghands.com", password="communitylove456", role="volunteer"),
-            User(name="David Bennett", email="david.bennett@ecoalliance.org", password="greenworld321", role="organization"),
-            User(name="Emily Rodriguez", email="emily.rodriguez@animalrights.org", password="petlovers789", role="volunteer"),
-            User(name="Michael Clark", email="michael.clark@codingforkids.org", password="codingpass567", role="organization"),
-            User(name="Isabella Martinez", email="isabella.martinez@childcarefoundation.org", password="helpingkids234", role="volunteer"),
-            User(name="James Anderson", email="james.anderson@disasterrelief.com", password="reliefpass123", role="organization"),
-            User(name="Lily Moore", email="lily.moore@foodbank.org", password="givingfood456", role="volunteer"),
-            User(name="Matthew Lee", email="matthew.lee@unitedglobal.org", password="peaceforall987", role="organization"),
-            # Additional Organizations to ensure there are 10
-            User(name="Nathaniel Green", email="nathaniel.green@restoreearth.org", password="earthkeeper123", role="organization"),
-            User(name="Laura Gomez", email="laura.gomez@techskillsforgood.com", password="skillsfortech789", role="organization"),
-            User(name="Daniel Young", email="daniel.young@healthforall.org", password="healthforall123", role="organization"),
-            User(name="Sophia Wells", email="sophia.wells@communitycare.org", password="carecommunity987", role="organization"),
-            User(name="Robert King", email="robert.king@greeninitiative.org", password="greenlife456", role="organization"),
-            # Additional Volunteers to ensure there are 10
-            User(name="Charlotte Harris", email="charlotte.harris@volunteer.org", password="charitypass123", role="volunteer"),
-            User(name="Daniel Foster", email="daniel.foster@volunteerhelp.com", password="volunteerpass456", role="volunteer"),
-            User(name="Grace Walker", email="grace.walker@humanity.org", password="helpinghand123", role="volunteer"),
-            User(name="Lucas Walker", email="lucas.walker@helpinghands.com", password="makingadifference789", role="volunteer"),
-            User(name="Ava Johnson", email="ava.johnson@communitycare.org", password="givinglove234", role="volunteer"),
-        ]
-        
-        db.session.add_all(users)
-        db.session.commit()
-
-        # Fetch organization users to assign them projects
-        organizations = User.query.filter_by(role="organization").all()
-
-        # Seed Projects (Owned by Organizations)
-        projects = [
-            Project(title="Community Park Cleanup", description="Organizing a weekend cleanup drive in the local park to keep it beautiful and safe for families.", organization_id=organizations[0].user_id, status="Active"),
-            Project(title="Tech for Good: Coding Bootcamp", description="Providing coding workshops for underprivileged youth in urban communities to create job opportunities in the tech industry.", organization_id=organizations[1].user_id, status="Pending"),
-            Project(title="Green Energy Solutions", description="Promoting renewable energy projects and education about sustainable energy solutions to reduce environmental impact.", organization_id=organizations[2].user_id, status="Active"),
-            Project(title="Urban Farming Initiative", description="Building community gardens in urban areas to promote healthy eating and sustainable living practices.", organization_id=organizations[3].user_id, status="Pending"),
-            Project(title="Animal Shelter Support", description="Volunteering and fundraising for local animal shelters to help them care for abandoned animals and improve their facilities.", organization_id=organizations[4].user_id, status="Completed"),
-            Project(title="Coding for All: Computer Literacy", description="A series of workshops aimed at teaching basic computer literacy to senior citizens and people with disabilities.", organization_id=organizations[5].user_id, status="Active"),
-            Project(title="Childhood Education Access", description="An outreach program providing educational materials and mentoring services to children from disadvantaged families.", organization_id=organizations[6].user_id, status="Active"),
-            Project(title="Disaster Relief Fundraising", description="Organizing fundraisers and donation drives to support victims of natural disasters worldwide.", organization_id=organizations[7].user_id, status="Pending"),
-            Project(title="Feeding the Homeless", description="A regular program that prepares and delivers nutritious meals to homeless individuals in the local community.", organization_id=organizations[8].user_id, status="Active"),
-            Project(title="Global Peace Education", description="Campaigns and initiatives designed to foster peace and conflict resolution skills for people in conflict zones.", organization_id=organizations[9].user_id, status="Completed"),
-        ]
-        
-        db.session.add_all(projects)
-        db.session.commit()
-
-        # Fetch volunteers to assign them applications
-        volunteers = User.query.filter_by(role="volunteer").all()
-        projects = Project.query.all()
-
-        # Seed Applications (Volunteers applying for projects)
-        applications = []
-        for i in range(min(len(volunteers), len(projects))):  # Avoid index out of range
-            applications.append(Application(user_id=volunteers[i].user_id, project_id=projects[i].project_id, status="Pending"))
-
-        db.session.add_all(applications)
-        db.session.commit()
+    password_hash = generate_password_hash(SEED_PASSWORD, method=current_hash_method())
+    timings = {}
+
+    started = time.perf_counter()
+    first_user_id = next_id(User.user_id)
+    bulk_insert(User.__table__, generate_users(rng, users, first_user_id, password_hash))
+    timings["users"] = time.perf_counter() - started
+
+    user_ids = range(first_user_id, first_user_id + users)
+    organization_ids = [user_id for user_id in user_ids if user_id % 10 == 0]
+    volunteer_ids = [user_id for user_id in user_ids if user_id % 10 != 0]
+
+    if projects and not organization_ids:
+        raise click.UsageError("At least 10 users are needed to seed projects (every tenth user is an organization).")
+
+    started = time.perf_counter()
+    first_project_id = next_id(Project.project_id)
+    indexes_suspended = suspend_project_indexes()
+    # Locations come from their own generator so the other columns are the same as before they existed
+    location_rng = random.Random(f"{seed}:locations")
+    bulk_insert(Project.__table__, generate_projects(rng, projects, first_project_id, organization_ids, location_rng))
+    if indexes_suspended:
+        resume_project_indexes()
+    # Bulk inserts bypass the ORM; invalidate cached project responses explicitly
+    bump_table_version(db.session.connection(), "projects")
+    db.session.commit()
+    timings["projects"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    project_ids = range(first_project_id, first_project_id + projects)
+    if volunteer_ids and project_ids:
+        bulk_insert(Application.__table__, generate_applications(
+            rng, applications, next_id(Application.application_id), volunteer_ids, project_ids
+        ))
+        # Bulk inserts bypass the counter updates; fill the counters in one pass
+        recount_application_counts()
+    timings["applications"] = time.perf_counter() - started
+
+    return timings
+
+
+@click.command("seed")
+@click.option("--users", default=20, show_default=True, help="Number of users (every tenth is an organization).")
+@click.option("--projects", default=10, show_default=True, help="Number of projects.")
+@click.option("--applications", default=10, show_default=True, help="Number of applications.")
+@click.option("--seed", "seed", default=0, show_default=True, help="Random seed; the same seed gives the same data.")
+@click.option("--drop/--no-drop", default=True, show_default=True, help="Drop and recreate all tables first.")
+@with_appcontext
+def seed_command(users, projects, applications, seed, drop):
+    """Seed the database with synthetic users, projects and applications."""
+    timings = seed_database(users, projects, applications, seed, drop)
+    for table, seconds in timings.items():
+        click.echo(f"{table:<13} {seconds:8.2f}s")
+    click.echo(f"Database seeded successfully! All users have the password '{SEED_PASSWORD}'.")
 
-        print("Database seeded successfully!")
 
 if __name__ == "__main__":
-    seed_data()
+    from app import create_app
+
+    with create_app().app_context():
+        seed_database()
+        print("Database seeded successfully!")
@@ -0,0 +1,56 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class ChangeNotifier:
+    """Wakes requests waiting on /changes when new change events are committed for their user.
+
+    Every user has a version number that is bumped after a transaction that
+    recorded events for them commits. A waiter reads the version before it
+    queries the change log and then waits until the version moves on, so an
+    event committed between its query and its wait is never missed. Waiting
+    requests never poll the database; they only query again once woken.
+
+    The notifier is per process: with several workers, a request only wakes
+    early for changes committed by its own worker and otherwise sees them at
+    the end of its wait.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.versions = {}
+
+    def version(self, user_id):
+        with self.condition:
+            return self.versions.get(user_id, 0)
+
+    def notify(self, user_ids):
+        with self.condition:
+            for user_id in user_ids:
+                self.versions[user_id] = self.versions.get(user_id, 0) + 1
+            self.condition.notify_all()
+
+    def wait(self, user_id, version, timeout):
+        """Blocks until the user's version differs from `version`; returns False on timeout."""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.versions.get(user_id, 0) != version, timeout)
+
+
+change_notifier = ChangeNotifier()
+
+
+# Notify once the transaction that recorded the events commits
+def _notify_changed_users(session):
+    user_ids = session.info.pop('changed_users', None)
+    if user_ids:
+        change_notifier.notify(user_ids)
+
+
+def _discard_changed_users(session, *args):
+    session.info.pop('changed_users', None)
+
+
+event.listen(Session, 'after_commit', _notify_changed_users)
+event.listen(Session, 'after_rollback', _discard_changed_users)
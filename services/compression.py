@@ -0,0 +1,166 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+# Optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json',
+    'application/msgpack',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript',
+])
+
+
+def _gzip(data, config):
+    return gzip.compress(data, config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def _brotli(data, config):
+    return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+
+
+# Content-Encoding -> compressor, in order of preference when the client accepts both equally
+ENCODERS = OrderedDict([('br', _brotli)] if brotli is not None else [])
+ENCODERS['gzip'] = _gzip
+
+
+class Compression:
+    """Compresses response bodies with brotli or gzip, as negotiated by Accept-Encoding.
+
+    Only complete (not streamed) 200 responses of a COMPRESSIBLE_MIMETYPES type
+    and at least COMPRESS_MIN_SIZE bytes are compressed. A response with a
+    strong ETag always has the same body, so its compressed form is kept in a
+    small LRU cache keyed by (ETag, encoding) and reused, so the cached project
+    lists and the docs page are compressed once rather than on every request.
+    A compressed response carries the weak form of the ETag, since its bytes
+    differ from the identity representation; If-None-Match uses weak comparison,
+    so revalidation still works.
+
+    Config:
+        COMPRESS_ENABLED: turn compression off entirely (default True)
+        COMPRESS_MIN_SIZE: smallest body worth compressing, in bytes
+        COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY: compression levels
+        COMPRESS_CACHE_SIZE: compressed bodies kept by ETag
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.counts = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 5)
+        app.config.setdefault('COMPRESS_CACHE_SIZE', 256)
+        app.extensions['compression'] = self
+
+        if app.config['COMPRESS_ENABLED']:
+            app.after_request(self.compress)
+
+    def compress(self, response):
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+
+        config = current_app.config
+        size = response.calculate_content_length()
+        if size is None or size < config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(ENCODERS)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag and not weak else None
+        body = self._get(key) if key else None
+        if body is None:
+            started = time.thread_time()
+            body = ENCODERS[encoding](response.get_data(), config)
+            elapsed = time.thread_time() - started
+            with self.lock:
+                self.cpu_seconds += elapsed
+            if len(body) >= size:
+                return response  # Incompressible; not worth the Content-Encoding
+            if key:
+                self._put(key, body, config['COMPRESS_CACHE_SIZE'])
+            self._count(encoding, 'miss' if key else 'uncached', size, len(body))
+        else:
+            self._count(encoding, 'hit', size, len(body))
+
+        response.set_data(body)
+        response.content_encoding = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _get(self, key):
+        with self.lock:
+            body = self.cache.get(key)
+            if body is not None:
+                self.cache.move_to_end(key)
+            return body
+
+    def _put(self, key, body, maxsize):
+        with self.lock:
+            self.cache[key] = body
+            self.cache.move_to_end(key)
+            while len(self.cache) > maxsize:
+                self.cache.popitem(last=False)
+
+    def _count(self, encoding, cache, size, compressed_size):
+        with self.lock:
+            self.counts[(encoding, cache)] = self.counts.get((encoding, cache), 0) + 1
+            self.bytes_in += size
+            self.bytes_out += compressed_size
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+    def metrics(self):
+        """Prometheus lines for the /metrics endpoint."""
+        with self.lock:
+            counts = dict(self.counts)
+            bytes_in, bytes_out, cpu_seconds, entries = self.bytes_in, self.bytes_out, self.cpu_seconds, len(self.cache)
+        lines = [
+            '# HELP compression_responses_total Compressed responses by encoding and compressed body cache outcome.',
+            '# TYPE compression_responses_total counter',
+        ]
+        for (encoding, cache), count in sorted(counts.items()):
+            lines.append(f'compression_responses_total{{encoding="{encoding}",cache="{cache}"}} {count}')
+        lines += [
+            '# HELP compression_bytes_total Response bytes before and after compression.',
+            '# TYPE compression_bytes_total counter',
+            f'compression_bytes_total{{stage="in"}} {bytes_in}',
+            f'compression_bytes_total{{stage="out"}} {bytes_out}',
+            '# HELP compression_bytes_saved_total Response bytes saved by compression.',
+            '# TYPE compression_bytes_saved_total counter',
+            f'compression_bytes_saved_total {bytes_in - bytes_out}',
+            '# HELP compression_cpu_seconds_total CPU time spent compressing responses.',
+            '# TYPE compression_cpu_seconds_total counter',
+            f'compression_cpu_seconds_total {cpu_seconds:.6f}',
+            '# HELP compression_cache_entries Compressed bodies currently cached by ETag.',
+            '# TYPE compression_cache_entries gauge',
+            f'compression_cache_entries {entries}',
+        ]
+        return lines
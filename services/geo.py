@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+
+from models.models import db
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """Returns the (min_lat, max_lat, min_lon, max_lon) boxes, in degrees, that
+    together contain every point within radius_km of (latitude, longitude).
+
+    The box is split in two when it crosses the antimeridian, and spans every
+    longitude when the circle reaches a pole.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    min_lat = latitude - math.degrees(angle)
+    max_lat = latitude + math.degrees(angle)
+    if min_lat <= -90 or max_lat >= 90:
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+
+    # Widest longitude offset of the circle, reached north of or south of the center latitude.
+    # Just below the pole check the ratio is 1 up to rounding, which must not leave asin's domain.
+    delta = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(latitude)))))
+    min_lon, max_lon = longitude - delta, longitude + delta
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances in km from one point to arrays of points."""
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    half_dlat = (lat2 - lat1) / 2
+    half_dlon = np.radians(longitudes - longitude) / 2
+    a = np.sin(half_dlat) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(half_dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def find_nearby(latitude, longitude, radius_km, count, status=None):
+    """Returns the ids and distances (km) of the `count` projects nearest to
+    (latitude, longitude) within radius_km, nearest first, ties by project_id.
+
+    The projects_geo R*Tree narrows the projects down to those inside the
+    bounding box(es) of the circle; exact distances are then computed for those
+    candidates only, in one vectorized pass.
+    """
+    selects = []
+    params = {}
+    for i, (min_lat, max_lat, min_lon, max_lon) in enumerate(bounding_boxes(latitude, longitude, radius_km)):
+        selects.append(f"""
+            SELECT p.project_id, p.latitude, p.longitude
+            FROM projects_geo g
+            JOIN projects p ON p.project_id = g.project_id
+            WHERE g.max_lat >= :min_lat{i} AND g.min_lat <= :max_lat{i}
+              AND g.max_lon >= :min_lon{i} AND g.min_lon <= :max_lon{i}
+        """ + (' AND p.status = :status' if status else ''))
+        params.update({f'min_lat{i}': min_lat, f'max_lat{i}': max_lat, f'min_lon{i}': min_lon, f'max_lon{i}': max_lon})
+    if status:
+        params['status'] = status
+
+    # The boxes never overlap, so UNION ALL returns every candidate once
+    rows = db.session.execute(db.text(' UNION ALL '.join(selects)), params).all()
+    if not rows:
+        return [], []
+    # Plain tuples; numpy probes Row objects for array attributes, which is slow
+    candidates = np.array([tuple(row) for row in rows], dtype=np.float64)
+    distances = haversine_km(latitude, longitude, candidates[:, 1], candidates[:, 2])
+
+    within = distances <= radius_km
+    ids = candidates[within, 0].astype(np.int64)
+    distances = distances[within]
+    if ids.size > count:
+        # Keep everything up to the count-th smallest distance (ties included) before sorting
+        kth = np.partition(distances, count - 1)[count - 1]
+        keep = distances <= kth
+        ids, distances = ids[keep], distances[keep]
+    order = np.lexsort((ids, distances))[:count]
+    return ids[order].tolist(), distances[order].tolist()
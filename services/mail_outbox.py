@@ -0,0 +1,190 @@
+import smtplib
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from flask_mail import BadHeaderError, Mail, Message
+from sqlalchemy import and_, or_, select, update
+
+from models.models import db, ChangeEvent, MailOutbox, Project, User
+
+# Flask-Mail extension, set up with the MAIL_* settings by MailOutboxWorker
+mail = Mail()
+
+# Failures of a single message; the connection stays usable for the rest of the batch
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError, BadHeaderError)
+
+
+def describe_change(event, application_id, status, title):
+    """One line of a notification email."""
+    title = f'"{title}"' if title else 'a deleted project'
+    if event == 'application.created':
+        return f"New application #{application_id} to {title}."
+    if event == 'application.status':
+        return f"Your application to {title} is now {status}."
+    return f"{event} on {title}."
+
+
+def build_digest(name, email, lines):
+    """One email reporting all of a recipient's queued changes."""
+    if len(lines) == 1:
+        subject = lines[0]
+    else:
+        subject = f"{len(lines)} updates on Volunteer Matching"
+    body = f"Hi {name},\n\n" + ''.join(f"- {line}\n" for line in lines) + "\nVolunteer Matching\n"
+    return Message(subject=subject, recipients=[email], body=body)
+
+
+class MailOutboxWorker:
+    """Sends the emails queued in the mail_outbox table.
+
+    Every batch claims up to MAIL_BATCH_SIZE recipients that have a due row,
+    folds all of each recipient's pending rows (due or still inside the digest
+    window) into one email, and sends the batch over a single SMTP connection.
+    Sent rows are marked 'sent'. Rows whose email failed are retried after
+    MAIL_RETRY_SECONDS, doubling with each attempt up to
+    MAIL_RETRY_MAX_SECONDS, and marked 'failed' after MAIL_MAX_ATTEMPTS.
+
+    Claiming moves the rows to 'sending' in one UPDATE ... RETURNING that is
+    committed before anything is sent, so several workers (`flask mail-worker`)
+    can drain the same outbox without sending an email twice. The claim is a
+    lease: next_attempt_at becomes its expiry, MAIL_CLAIM_SECONDS later, and the
+    rows of a worker that died before recording its batch are claimed again
+    once it has passed. Requests only insert outbox rows, so sending mail never
+    adds to their latency.
+    """
+
+    def __init__(self, app):
+        if 'mail' not in app.extensions:
+            mail.init_app(app)
+        config = app.config
+        self.batch_size = config.get('MAIL_BATCH_SIZE', 100)
+        self.retry_seconds = config.get('MAIL_RETRY_SECONDS', 30)
+        self.retry_max_seconds = config.get('MAIL_RETRY_MAX_SECONDS', 3600)
+        self.max_attempts = config.get('MAIL_MAX_ATTEMPTS', 8)
+        self.claim_seconds = config.get('MAIL_CLAIM_SECONDS', 300)
+
+    def claim(self, now):
+        """Claims the rows of the next batch of recipients with something due. Returns their outbox_ids.
+
+        A recipient is due when it has a due 'pending' row or a 'sending' row
+        whose lease has expired. All of its pending rows are claimed with them,
+        including those still inside the digest window.
+        """
+        claimable = or_(MailOutbox.status == 'pending',
+                        and_(MailOutbox.status == 'sending', MailOutbox.next_attempt_at <= now))
+        recipients = (
+            select(MailOutbox.user_id)
+            .where(MailOutbox.status.in_(('pending', 'sending')), MailOutbox.next_attempt_at <= now)
+            .group_by(MailOutbox.user_id)
+            .order_by(MailOutbox.user_id)
+            .limit(self.batch_size)
+        )
+        # The status check is part of the UPDATE, so a row another worker claimed in the meantime is skipped
+        claimed = db.session.execute(
+            update(MailOutbox)
+            .where(claimable, MailOutbox.user_id.in_(recipients))
+            .values(status='sending', next_attempt_at=now + timedelta(seconds=self.claim_seconds))
+            .returning(MailOutbox.outbox_id)
+        ).scalars().all()
+        db.session.commit()
+        return claimed
+
+    def load_batch(self, now):
+        """Claims the next batch (see claim) and returns its rows, grouped per recipient."""
+        claimed = self.claim(now)
+        if not claimed:
+            return []
+        rows = db.session.execute(
+            select(MailOutbox.outbox_id, MailOutbox.user_id, MailOutbox.attempts, User.name, User.email,
+                   ChangeEvent.event, ChangeEvent.application_id, ChangeEvent.status, Project.title)
+            .outerjoin(User, User.user_id == MailOutbox.user_id)
+            .outerjoin(ChangeEvent, ChangeEvent.change_id == MailOutbox.change_id)
+            .outerjoin(Project, Project.project_id == ChangeEvent.project_id)
+            .where(MailOutbox.outbox_id.in_(claimed))
+            .order_by(MailOutbox.user_id, MailOutbox.outbox_id)
+        ).all()
+        return [list(group) for _, group in groupby(rows, key=lambda row: row.user_id)]
+
+    def drain(self):
+        """Sends one batch. Returns the number of (sent, retried, failed) outbox rows."""
+        now = datetime.utcnow()
+        digests = self.load_batch(now)
+        if not digests:
+            db.session.rollback()
+            return 0, 0, 0
+
+        sent, retry, gone = [], [], []
+        deliverable = []
+        for rows in digests:
+            lines = [describe_change(row.event, row.application_id, row.status, row.title)
+                     for row in rows if row.event is not None]
+            if rows[0].email is None or not lines:
+                gone.extend(rows)  # The recipient or the events were deleted after the email was queued
+            else:
+                deliverable.append((rows, build_digest(rows[0].name, rows[0].email, lines)))
+
+        handled = 0
+        try:
+            with mail.connect() as connection:
+                for rows, message in deliverable:
+                    try:
+                        connection.send(message)
+                    except MESSAGE_ERRORS as e:
+                        retry.extend((row, repr(e)) for row in rows)
+                    else:
+                        sent.extend(rows)
+                    handled += 1
+        except OSError as e:  # smtplib errors are OSErrors too
+            # Connecting failed or the connection dropped: retry every email not yet handed over
+            for rows, _ in deliverable[handled:]:
+                retry.extend((row, repr(e)) for row in rows)
+        finally:
+            self.record(now, sent, retry, gone)
+
+        retried = sum(1 for row, _ in retry if row.attempts + 1 < self.max_attempts)
+        return len(sent), retried, len(retry) - retried + len(gone)
+
+    def record(self, now, sent, retry, gone):
+        """Stores the outcome of a batch in one transaction."""
+        if sent:
+            db.session.execute(
+                update(MailOutbox)
+                .where(MailOutbox.outbox_id.in_([row.outbox_id for row in sent]))
+                .values(status='sent', sent_at=now)
+            )
+        if gone:
+            db.session.execute(
+                update(MailOutbox)
+                .where(MailOutbox.outbox_id.in_([row.outbox_id for row in gone]))
+                .values(status='failed', last_error='recipient or change event no longer exists')
+            )
+        if retry:
+            db.session.execute(update(MailOutbox), [
+                {
+                    'outbox_id': row.outbox_id,
+                    'attempts': row.attempts + 1,
+                    'status': 'pending' if row.attempts + 1 < self.max_attempts else 'failed',
+                    'next_attempt_at': now + timedelta(seconds=self.backoff(row.attempts + 1)),
+                    'last_error': error,
+                }
+                for row, error in retry
+            ])
+        db.session.commit()
+
+    def backoff(self, attempts):
+        return min(self.retry_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+
+    def run(self, poll_seconds, once=False):
+        """Drains the outbox until it has nothing due, then polls every `poll_seconds`.
+
+        Yields the (sent, retried, failed) counts of every batch that did something.
+        """
+        while True:
+            counts = self.drain()
+            if any(counts):
+                yield counts
+                continue  # A full batch may mean more is due
+            if once:
+                return
+            time.sleep(poll_seconds)
@@ -0,0 +1,179 @@
+import threading
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.models import db, User, Project
+
+# Project statuses that can still take volunteers
+OPEN_STATUSES = ('Pending', 'Active')
+
+
+class FeatureMatrix:
+    """Row-per-entity matrix of L2 normalized tag vectors.
+
+    Rows are addressed by entity id. Capacity (rows and columns) grows by
+    doubling, and rows freed by `remove` are reused, so updates never rebuild
+    the whole matrix.
+    """
+
+    def __init__(self, rows=64, columns=64):
+        self.vectors = np.zeros((rows, columns), dtype=np.float32)
+        self.active = np.zeros(rows, dtype=bool)  # Rows that take part in matching
+        self.ids = np.zeros(rows, dtype=np.int64)
+        self.row_of = {}
+        self.free_rows = []
+        self.next_row = 0
+
+    def ensure_columns(self, columns):
+        if columns > self.vectors.shape[1]:
+            grown = np.zeros((self.vectors.shape[0], max(columns, self.vectors.shape[1] * 2)), dtype=np.float32)
+            grown[:, :self.vectors.shape[1]] = self.vectors
+            self.vectors = grown
+
+    def _allocate_row(self):
+        if self.free_rows:
+            return self.free_rows.pop()
+        if self.next_row == self.vectors.shape[0]:
+            rows = self.vectors.shape[0] * 2
+            self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors)])
+            self.active = np.concatenate([self.active, np.zeros(rows - self.active.size, dtype=bool)])
+            self.ids = np.concatenate([self.ids, np.zeros(rows - self.ids.size, dtype=np.int64)])
+        self.next_row += 1
+        return self.next_row - 1
+
+    def upsert(self, entity_id, columns, active=True):
+        row = self.row_of.get(entity_id)
+        if row is None:
+            row = self._allocate_row()
+            self.row_of[entity_id] = row
+            self.ids[row] = entity_id
+
+        self.vectors[row] = 0
+        if columns:
+            self.vectors[row, columns] = 1.0 / np.sqrt(len(columns))
+        self.active[row] = active and bool(columns)
+
+    def remove(self, entity_id):
+        row = self.row_of.pop(entity_id, None)
+        if row is not None:
+            self.vectors[row] = 0
+            self.active[row] = False
+            self.free_rows.append(row)
+
+    def vector(self, entity_id):
+        row = self.row_of.get(entity_id)
+        return None if row is None else self.vectors[row]
+
+
+class MatchingEngine:
+    """In-process volunteer to project matcher.
+
+    Volunteers and projects are kept as tag vectors in two FeatureMatrix
+    instances sharing one tag vocabulary. The matrices are loaded from the
+    database once and then kept current through SQLAlchemy session events.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forgets all vectors; they are reloaded from the database on next use."""
+        with self.lock:
+            self.vocabulary = {}
+            self.volunteers = FeatureMatrix()
+            self.projects = FeatureMatrix()
+            self.loaded = False
+
+    def _columns(self, skills):
+        for skill in skills:
+            if skill not in self.vocabulary:
+                self.vocabulary[skill] = len(self.vocabulary)
+        columns = len(self.vocabulary)
+        self.volunteers.ensure_columns(columns)
+        self.projects.ensure_columns(columns)
+        return [self.vocabulary[skill] for skill in skills]
+
+    def _load(self):
+        for user_id, skills in db.session.query(User.user_id, User.skills).filter(User.role == 'volunteer'):
+            self.volunteers.upsert(user_id, self._columns(skills.split(',') if skills else []))
+        for project_id, skills, status in db.session.query(Project.project_id, Project.skills, Project.status):
+            self.projects.upsert(project_id, self._columns(skills.split(',') if skills else []), status in OPEN_STATUSES)
+        self.loaded = True
+
+    def ensure_loaded(self):
+        with self.lock:
+            if not self.loaded:
+                self._load()
+
+    def apply_changes(self, changes):
+        """Applies (kind, id, skills, status, deleted) tuples collected from a committed session."""
+        with self.lock:
+            if not self.loaded:
+                return
+            for kind, entity_id, skills, status, deleted in changes:
+                if kind == 'volunteer':
+                    if deleted:
+                        self.volunteers.remove(entity_id)
+                    else:
+                        self.volunteers.upsert(entity_id, self._columns(skills))
+                elif deleted:
+                    self.projects.remove(entity_id)
+                else:
+                    self.projects.upsert(entity_id, self._columns(skills), status in OPEN_STATUSES)
+
+    def recommend(self, user_id, k=10):
+        """Returns up to k (project_id, score) pairs for a volunteer, best first."""
+        self.ensure_loaded()
+        with self.lock:
+            vector = self.volunteers.vector(user_id)
+            if vector is None or k < 1:
+                return []
+
+            # Cosine similarity against every project in one matrix-vector product
+            scores = self.projects.vectors @ vector
+            scores[~self.projects.active] = 0
+            candidates = np.flatnonzero(scores > 0)
+            if candidates.size == 0:
+                return []
+
+            if candidates.size > k:
+                candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+            best = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(int(self.projects.ids[row]), float(scores[row])) for row in best]
+
+
+matching_engine = MatchingEngine()
+
+
+# Keep the engine current: collect changed volunteers and projects on flush
+# and apply them once the transaction commits.
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault('matching_changes', [])
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Project):
+            changes.append(('project', obj.project_id, obj.skill_list, obj.status, False))
+        elif isinstance(obj, User) and obj.role == 'volunteer':
+            changes.append(('volunteer', obj.user_id, obj.skill_list, None, False))
+    for obj in session.deleted:
+        if isinstance(obj, Project):
+            changes.append(('project', obj.project_id, None, None, True))
+        elif isinstance(obj, User):
+            changes.append(('volunteer', obj.user_id, None, None, True))
+
+
+def _apply_changes(session):
+    changes = session.info.pop('matching_changes', None)
+    if changes:
+        matching_engine.apply_changes(changes)
+
+
+def _discard_changes(session, *args):
+    session.info.pop('matching_changes', None)
+
+
+event.listen(Session, 'after_flush', _collect_changes)
+event.listen(Session, 'after_commit', _apply_changes)
+event.listen(Session, 'after_rollback', _discard_changes)
@@ -0,0 +1,176 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class EndpointStats:
+    __slots__ = ('statuses', 'buckets', 'latency_sum', 'count', 'sql_queries', 'sql_seconds')
+
+    def __init__(self):
+        self.statuses = {}  # (method, status) -> count
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket is +Inf
+        self.latency_sum = 0.0
+        self.count = 0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Instrumentation:
+    """Records per-endpoint request counts, latency, status codes and SQL usage.
+
+    SQL statements are counted through SQLAlchemy engine events and attributed to
+    the request that issued them. Everything is exported at /metrics in the
+    Prometheus text format.
+
+    Config:
+        METRICS_ENABLED: turn the request hooks off entirely (default True)
+        METRICS_SLOW_REQUEST_MS: when set, requests slower than this are logged
+            together with the SQL statements they ran
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.collectors = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SLOW_REQUEST_MS', None)
+        app.extensions['instrumentation'] = self
+        app.add_url_rule('/metrics', 'metrics', self.export)
+
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        _listen_for_sql()
+
+    def register_collector(self, collector):
+        """Adds a callable returning extra Prometheus lines to every /metrics export."""
+        self.collectors.append(collector)
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_queries = 0
+        g.metrics_sql_seconds = 0.0
+        # Only keep the statements themselves when the slow request log is on
+        g.metrics_statements = [] if current_app.config['METRICS_SLOW_REQUEST_MS'] else None
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            key = (request.method, response.status_code)
+            stats.statuses[key] = stats.statuses.get(key, 0) + 1
+            stats.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            stats.latency_sum += elapsed
+            stats.count += 1
+            stats.sql_queries += g.metrics_sql_queries
+            stats.sql_seconds += g.metrics_sql_seconds
+
+        slow_ms = current_app.config['METRICS_SLOW_REQUEST_MS']
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            current_app.logger.warning(
+                "Slow request %s %s took %.1fms with %d SQL statements (%.1fms):\n%s",
+                request.method, request.path, elapsed * 1000, g.metrics_sql_queries,
+                g.metrics_sql_seconds * 1000, '\n'.join(g.metrics_statements)
+            )
+        return response
+
+    def export(self):
+        """Serves the collected metrics in the Prometheus text exposition format."""
+        lines = [
+            '# HELP http_requests_total Requests handled, by endpoint, method and status code.',
+            '# TYPE http_requests_total counter',
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for endpoint, stats in endpoints:
+                for (method, status), count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP http_request_duration_seconds Request latency by endpoint.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for endpoint, stats in endpoints:
+                label = _escape(endpoint)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), stats.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{label}"}} {stats.latency_sum:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{label}"}} {stats.count}')
+
+            lines += [
+                '# HELP http_request_sql_queries_total SQL statements issued while handling requests.',
+                '# TYPE http_request_sql_queries_total counter',
+            ]
+            lines += [f'http_request_sql_queries_total{{endpoint="{_escape(endpoint)}"}} {stats.sql_queries}'
+                      for endpoint, stats in endpoints]
+            lines += [
+                '# HELP http_request_sql_seconds_total Time spent executing SQL while handling requests.',
+                '# TYPE http_request_sql_seconds_total counter',
+            ]
+            lines += [f'http_request_sql_seconds_total{{endpoint="{_escape(endpoint)}"}} {stats.sql_seconds:.6f}'
+                      for endpoint, stats in endpoints]
+
+        for collector in self.collectors:
+            lines += collector()
+
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_sql_queries' in g:
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_started')
+    if not started or not has_request_context():
+        return
+    g.metrics_sql_queries += 1
+    g.metrics_sql_seconds += time.perf_counter() - started.pop()
+    if g.metrics_statements is not None:
+        g.metrics_statements.append(statement)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = exception_context.connection.info.get('metrics_query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+_sql_listeners_installed = False
+
+
+def _listen_for_sql():
+    """Installs the engine-wide SQL listeners once per process."""
+    global _sql_listeners_installed
+    if not _sql_listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _sql_listeners_installed = True
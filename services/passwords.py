@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256'
+DEFAULT_HASH_ITERATIONS = 600000
+
+# werkzeug's scrypt defaults (n, r, p), used when the method string leaves them out
+SCRYPT_DEFAULTS = (2 ** 15, 8, 1)
+
+
+class HashingPoolFull(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+
+def normalize_hash_method(method):
+    """The full form of a werkzeug method string, as stored in front of a hash.
+
+    'scrypt' becomes 'scrypt:32768:8:1' and 'pbkdf2' or 'pbkdf2:sha256' get
+    werkzeug's defaults filled in, so configured and stored parameters compare
+    equal. Raises ValueError for strings werkzeug cannot hash with.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if len(args) not in (0, 3):
+            raise ValueError(f"'{method}': scrypt takes no parameters or n:r:p")
+        n, r, p = (int(arg) for arg in args) if args else SCRYPT_DEFAULTS
+        return f"scrypt:{n}:{r}:{p}"
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError(f"'{method}': pbkdf2 takes at most hash_name:iterations")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"'{method}': unsupported password hash method")
+
+
+def configured_hash_method(config):
+    """The normalized method for PASSWORD_HASH_METHOD; PASSWORD_HASH_ITERATIONS applies
+    to pbkdf2 unless the method names its own iteration count."""
+    method = config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    name, _, hash_name = method.partition(':')
+    if name == 'pbkdf2' and hash_name.count(':') == 0:
+        method = f"pbkdf2:{hash_name or 'sha256'}:{config.get('PASSWORD_HASH_ITERATIONS', DEFAULT_HASH_ITERATIONS)}"
+    return normalize_hash_method(method)
+
+
+def check_hash_config(config):
+    """Fails at startup, not on the first registration, when the configured method is unusable."""
+    try:
+        method = configured_hash_method(config)
+        name, *args = method.split(':')
+        if name == 'pbkdf2':
+            hashlib.pbkdf2_hmac(args[0], b'', b'', 1)  # Unknown digests raise here
+            if int(args[1]) < 1:
+                raise ValueError('iterations must be positive')
+        else:
+            n, r, p = map(int, args)
+            if n < 2 or n & (n - 1) or r < 1 or p < 1:
+                raise ValueError('scrypt needs n a power of 2 and positive r and p')
+    except ValueError as error:
+        raise ValueError(f"Invalid PASSWORD_HASH_METHOD / PASSWORD_HASH_ITERATIONS: {error}") from None
+    return method
+
+
+def current_hash_method():
+    """The werkzeug method string built from PASSWORD_HASH_METHOD and PASSWORD_HASH_ITERATIONS."""
+    if has_app_context():
+        return configured_hash_method(current_app.config)
+    return configured_hash_method({})
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with a different method or parameters than configured."""
+    try:
+        return normalize_hash_method(password_hash.split('$', 1)[0]) != current_hash_method()
+    except ValueError:
+        return True  # Not a format this werkzeug produces
+
+
+class PasswordHasher:
+    """Runs password hashing and verification in a bounded process pool.
+
+    The pool keeps the CPU heavy key derivation off the request threads. At most
+    PASSWORD_HASH_QUEUE_DEPTH operations may be pending at once; beyond that
+    HashingPoolFull is raised so the caller can answer 503 instead of queueing.
+    With PASSWORD_HASH_WORKERS set to 0 the work runs inline on the caller's thread.
+    The *_async variants await the same pool from an event loop (see asgi.py).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+        self.pid = None
+
+    def _pool(self):
+        with self.lock:
+            # A forked worker cannot reuse its parent's pool
+            if self.pid != os.getpid():
+                self.executor = None
+                workers = _config('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+                if workers > 0:
+                    self.executor = ProcessPoolExecutor(max_workers=workers)
+                self.slots = threading.BoundedSemaphore(_config('PASSWORD_HASH_QUEUE_DEPTH', 64))
+                self.pid = os.getpid()
+            return self.executor, self.slots
+
+    def _run(self, fn, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise HashingPoolFull()
+        try:
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    async def _run_async(self, fn, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise HashingPoolFull()
+        try:
+            # Without a process pool the default thread pool keeps the event loop free
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, current_hash_method())
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    async def hash_async(self, password):
+        return await self._run_async(generate_password_hash, password, current_hash_method())
+
+    async def verify_async(self, password_hash, password):
+        return await self._run_async(check_password_hash, password_hash, password)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+            self.pid = None
+
+
+password_hasher = PasswordHasher()
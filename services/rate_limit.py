@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+
+RATE_LIMIT_MAX_KEYS = 100000
+
+# (burst, refills per minute) when the config has no RATE_LIMIT_PER_IP / RATE_LIMIT_PER_EMAIL
+DEFAULT_PER_IP = (20, 30)
+DEFAULT_PER_EMAIL = (5, 5)
+
+# Seconds between sweeps of refilled buckets out of the shared SQLite store
+SQLITE_SWEEP_SECONDS = 60
+
+
+class MemoryBucketStore:
+    """Token buckets of one process, as key -> (tokens, updated, full_at) tuples in LRU order.
+
+    A bucket left alone until `full_at` has refilled completely and is no
+    different from a new one, so every check drops such buckets from the least
+    recently used end. At most `max_keys` buckets are kept; under a flood of
+    distinct keys the oldest are dropped early, which only ever makes a limit
+    more lenient.
+    """
+
+    def __init__(self, max_keys=RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def take(self, key, capacity, rate):
+        """Takes a token from the bucket; returns 0 when allowed, else the seconds until a token is available."""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.pop(key, None)
+            tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / rate
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+            buckets = self.buckets
+            while buckets:
+                oldest = next(iter(buckets.values()))
+                if oldest[2] > now and len(buckets) <= self.max_keys:
+                    break
+                buckets.popitem(last=False)
+                self.evictions += 1
+            return retry_after
+
+    def size(self):
+        return len(self.buckets)
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file, shared by every worker process that opens it.
+
+    A check is one UPSERT whose WHERE clause only lets it take a token when one
+    is available, so concurrent processes never overdraw a bucket; only a
+    denied check reads the bucket back to compute Retry-After. Refilled buckets
+    are swept every SQLITE_SWEEP_SECONDS. Buckets are disposable, so the file
+    runs without fsync.
+    """
+
+    TAKE = """
+        INSERT INTO rate_limit_buckets (key, tokens, updated, full_at)
+        VALUES (:key, :capacity - 1, :now, :now + 1 / :rate)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+            updated = :now,
+            full_at = :now + (:capacity + 1 - min(:capacity, tokens + (:now - updated) * :rate)) / :rate
+        WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+        RETURNING tokens
+    """
+    PEEK = "SELECT min(:capacity, tokens + (:now - updated) * :rate) FROM rate_limit_buckets WHERE key = :key"
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.swept = 0.0
+        self.evictions = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        connection = self._connection()
+        if now - self.swept > SQLITE_SWEEP_SECONDS:
+            self._sweep(connection, now)
+
+        if connection.execute(self.TAKE, params).fetchone() is not None:
+            return 0
+        tokens = connection.execute(self.PEEK, params).fetchone()[0]
+        return max(1 - tokens, 0) / rate
+
+    def _sweep(self, connection, now):
+        with self.lock:
+            if now - self.swept <= SQLITE_SWEEP_SECONDS:
+                return
+            self.swept = now
+            self.evictions += connection.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,)).rowcount
+
+    def size(self):
+        return self._connection().execute("SELECT count(*) FROM rate_limit_buckets").fetchone()[0]
+
+
+class RateLimiter:
+    """Per client IP and per email token buckets for the credential endpoints.
+
+    Each limit is a (burst, per minute) pair from the config: a bucket holds up
+    to `burst` attempts and refills at `per minute`. Buckets live in memory,
+    per process, unless RATE_LIMIT_STORE names a SQLite file shared by the
+    workers. RATE_LIMIT_ENABLED=False turns every check into a no-op.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.store = None
+        self.pid = None
+        self.counts = {}
+
+    def _store(self, config):
+        if self.pid == os.getpid():
+            return self.store
+        with self.lock:
+            # A forked worker opens its own store (and SQLite connections)
+            if self.pid != os.getpid():
+                path = config.get('RATE_LIMIT_STORE')
+                self.store = SQLiteBucketStore(path) if path else MemoryBucketStore(config.get('RATE_LIMIT_MAX_KEYS', RATE_LIMIT_MAX_KEYS))
+                self.pid = os.getpid()
+            return self.store
+
+    def check(self, ip, email=None):
+        """Takes a token from the IP's bucket and, when given, the email's.
+
+        Returns 0 when the attempt may proceed, else the seconds to wait.
+        """
+        config = current_app.config if has_app_context() else {}
+        if not config.get('RATE_LIMIT_ENABLED', True):
+            return 0
+        store = self._store(config)
+        retry_after = self._take(store, 'ip', ip, config.get('RATE_LIMIT_PER_IP', DEFAULT_PER_IP))
+        if not retry_after and email:
+            retry_after = self._take(store, 'email', str(email).strip().lower(),
+                                     config.get('RATE_LIMIT_PER_EMAIL', DEFAULT_PER_EMAIL))
+        return retry_after
+
+    def _take(self, store, name, value, limit):
+        burst, per_minute = limit
+        retry_after = store.take(f"{name}:{value}", burst, per_minute / 60)
+        key = (name, 'limited' if retry_after else 'allowed')
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+        return retry_after
+
+    def reset(self):
+        with self.lock:
+            self.store = None
+            self.pid = None
+            self.counts = {}
+
+    def metrics(self):
+        """Prometheus lines for the /metrics endpoint."""
+        with self.lock:
+            counts = dict(self.counts)
+            store = self.store
+        lines = [
+            '# HELP rate_limit_checks_total Rate limit checks on the credential endpoints.',
+            '# TYPE rate_limit_checks_total counter',
+        ]
+        for (name, result), count in sorted(counts.items()):
+            lines.append(f'rate_limit_checks_total{{limit="{name}",result="{result}"}} {count}')
+        lines += [
+            '# HELP rate_limit_buckets Token buckets currently held by the rate limiter.',
+            '# TYPE rate_limit_buckets gauge',
+            f'rate_limit_buckets {store.size() if store is not None else 0}',
+            '# HELP rate_limit_evictions_total Refilled or overflowing token buckets dropped.',
+            '# TYPE rate_limit_evictions_total counter',
+            f'rate_limit_evictions_total {store.evictions if store is not None else 0}',
+        ]
+        return lines
+
+
+rate_limiter = RateLimiter()
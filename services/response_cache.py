@@ -0,0 +1,149 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.models import Project, bump_table_version, table_version
+
+RESPONSE_CACHE_SIZE = 512
+
+
+class ResponseCache:
+    """Bounded LRU cache of serialized responses.
+
+    Each entry remembers the projects table version it was rendered at, so an entry
+    from an older version counts as a miss and is replaced.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'not_modified': self.not_modified,
+                'size': len(self.entries),
+            }
+
+    def metrics(self):
+        """Prometheus lines for the /metrics endpoint."""
+        stats = self.stats()
+        return [
+            '# HELP response_cache_events_total Project response cache lookups and evictions.',
+            '# TYPE response_cache_events_total counter',
+            f'response_cache_events_total{{event="hit"}} {stats["hits"]}',
+            f'response_cache_events_total{{event="miss"}} {stats["misses"]}',
+            f'response_cache_events_total{{event="eviction"}} {stats["evictions"]}',
+            f'response_cache_events_total{{event="not_modified"}} {stats["not_modified"]}',
+            '# HELP response_cache_entries Responses currently held in the project response cache.',
+            '# TYPE response_cache_entries gauge',
+            f'response_cache_entries {stats["size"]}',
+        ]
+
+
+project_response_cache = ResponseCache()
+
+
+def cached_project_response(vary=None):
+    """Caches a GET handler's 200 responses under the current projects table version.
+
+    The version is read from the table_versions row (one primary key lookup per
+    request), so every worker process and every restart agrees on it.
+
+    The cache key is the endpoint, its view arguments, the query string, the
+    preferred Accept type and whatever `vary()` returns (e.g. the user id for per-user responses). Responses
+    carry a strong ETag derived from that key and the version, so a matching
+    If-None-Match is answered with 304 before the handler or the database is touched.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                request.accept_mimetypes.best,  # The representation may depend on Accept
+                vary() if vary else None,
+            )
+            version = table_version('projects')
+            etag = hashlib.blake2b(repr((key, version)).encode(), digest_size=12).hexdigest()
+
+            # Weak comparison, as If-None-Match requires; compressed responses carry the weak ETag
+            if request.if_none_match.contains_weak(etag):
+                with project_response_cache.lock:
+                    project_response_cache.not_modified += 1
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            cached = project_response_cache.get(key, version)
+            if cached is not None:
+                body, mimetype, vary_header = cached
+                response = Response(body, status=200, mimetype=mimetype)
+                if vary_header:
+                    response.headers['Vary'] = vary_header
+            else:
+                response = make_response(fn(*args, **kwargs))
+                # Streamed bodies are never buffered into the cache
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                project_response_cache.put(key, version, (response.get_data(), response.mimetype, response.headers.get('Vary')))
+
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+
+# Bump the version in the same transaction as the first flush that touches a project,
+# so the new version becomes visible exactly when the change commits
+def _bump_project_version(session, flush_context):
+    if session.info.get('project_version_bumped'):
+        return
+    if any(isinstance(obj, Project) for obj in session.new | session.dirty | session.deleted):
+        bump_table_version(session.connection(), 'projects')
+        session.info['project_version_bumped'] = True
+
+
+def _end_transaction(session, *args):
+    session.info.pop('project_version_bumped', None)
+
+
+event.listen(Session, 'after_flush', _bump_project_version)
+event.listen(Session, 'after_commit', _end_transaction)
+event.listen(Session, 'after_rollback', _end_transaction)
@@ -0,0 +1,193 @@
+import threading
+from collections import OrderedDict
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from models.models import Application, ChangeEvent, Project, User
+
+# Optional fast backends; without them the stdlib json module is used and
+# MessagePack is not offered
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Encoders kept per schema; callers pass fields in schema order, so this covers the field lists in use
+ENCODER_CACHE_SIZE = 64
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def split_skills(value):
+    """The stored comma separated skills column as a list (same as Model.skill_list)."""
+    return value.split(',') if value else []
+
+
+class Field:
+    """One output field of a schema: the column it is read from and an optional conversion."""
+
+    __slots__ = ('column', 'convert')
+
+    def __init__(self, column, convert=None):
+        self.column = column
+        self.convert = convert
+
+
+class Schema:
+    """Declarative output shape of a model (or a join) with prebuilt encoders.
+
+    Fields are declared once as `name=Field(column)`. `columns(names)` gives the
+    labelled columns to select, and `row_encoder(names)` builds a function that
+    turns a row selected with exactly those columns (in that order) into a dict,
+    reading the row positionally instead of going through `row._mapping`;
+    `object_encoder` reads the attributes of a loaded ORM object instead.
+    Encoders are built once per field list and kept in a bounded LRU cache.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.encoders = OrderedDict()
+        self.lock = threading.Lock()
+
+    def names(self, names=None):
+        return tuple(self.fields) if names is None else tuple(names)
+
+    def columns(self, names=None):
+        return [self.fields[name].column.label(name) for name in self.names(names)]
+
+    def row_encoder(self, names=None):
+        return self._encoder('row', self.names(names))
+
+    def object_encoder(self, names=None):
+        return self._encoder('object', self.names(names))
+
+    def _encoder(self, kind, names):
+        key = (kind, names)
+        with self.lock:
+            encoder = self.encoders.get(key)
+            if encoder is not None:
+                self.encoders.move_to_end(key)
+                return encoder
+        encoder = self._build(kind, names)
+        with self.lock:
+            self.encoders[key] = encoder
+            while len(self.encoders) > ENCODER_CACHE_SIZE:
+                self.encoders.popitem(last=False)
+        return encoder
+
+    def _build(self, kind, names):
+        fields = [self.fields[name] for name in names]  # KeyError for unknown names
+        converters = [(index, field.convert) for index, field in enumerate(fields) if field.convert is not None]
+        keys = [field.column.key for field in fields]
+
+        if kind == 'object':
+            def values(obj):
+                return [getattr(obj, key) for key in keys]
+        else:
+            values = list  # Extra trailing columns (e.g. a pagination key) are dropped by zip
+
+        def encode(row):
+            row = values(row)
+            for index, convert in converters:
+                row[index] = convert(row[index])
+            return dict(zip(names, row))
+        return encode
+
+
+USER_SCHEMA = Schema(
+    user_id=Field(User.user_id),
+    name=Field(User.name),
+    email=Field(User.email),
+    role=Field(User.role),
+    skills=Field(User.skills, split_skills),
+)
+
+PROJECT_SCHEMA = Schema(
+    project_id=Field(Project.project_id),
+    title=Field(Project.title),
+    description=Field(Project.description),
+    organization_id=Field(Project.organization_id),
+    status=Field(Project.status),
+    skills=Field(Project.skills, split_skills),
+    latitude=Field(Project.latitude),
+    longitude=Field(Project.longitude),
+)
+
+# A volunteer's application joined with its project (GET /user/applications)
+APPLIED_PROJECT_SCHEMA = Schema(
+    application_id=Field(Application.application_id),
+    application_status=Field(Application.status),
+    project_id=Field(Project.project_id),
+    project_title=Field(Project.title),
+    project_description=Field(Project.description),
+    project_status=Field(Project.status),
+)
+
+# An application joined with its applicant (GET /projects/<id>/applications)
+APPLICANT_SCHEMA = Schema(
+    application_id=Field(Application.application_id),
+    status=Field(Application.status),
+    user_id=Field(User.user_id),
+    name=Field(User.name),
+    email=Field(User.email),
+)
+
+# An entry of the change log (GET /changes)
+CHANGE_EVENT_SCHEMA = Schema(
+    change_id=Field(ChangeEvent.change_id),
+    event=Field(ChangeEvent.event),
+    project_id=Field(ChangeEvent.project_id),
+    application_id=Field(ChangeEvent.application_id),
+    status=Field(ChangeEvent.status),
+    created_at=Field(ChangeEvent.created_at, isoformat),
+)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson when it is installed and negotiates MessagePack.
+
+    Output is compact JSON with sorted keys and the default provider's
+    `default` conversions, so `jsonify` bodies match the default provider's
+    except that non-ASCII text is written as UTF-8 instead of \\u escapes.
+    Debug mode pretty printing and calls with custom json.dumps options fall
+    back to the stdlib encoder.
+
+    When msgpack is installed, `jsonify` answers clients that prefer
+    application/msgpack with a MessagePack body.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson(obj).decode()
+
+    def _orjson(self, obj):
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        if msgpack is not None and has_request_context():
+            if request.accept_mimetypes.best_match([self.mimetype, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+                response = self._app.response_class(msgpack.packb(obj, default=self.default), mimetype=MSGPACK_MIMETYPE)
+                response.vary.add('Accept')
+                return response
+
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            response = super().response(obj)
+        else:
+            response = self._app.response_class(self._orjson(obj) + b'\n', mimetype=self.mimetype)
+        if msgpack is not None:
+            response.vary.add('Accept')
+        return response
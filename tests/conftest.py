@@ -0,0 +1,80 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from models.models import db
+from routes.auth import identity_cache, identity_claims
+from services.matching import matching_engine
+from services.response_cache import project_response_cache
+
+
+def create_test_app(database_path, **settings):
+    """The application on the SQLite database at database_path, with the process-wide caches emptied.
+
+    `settings` override the test configuration (e.g. SQLALCHEMY_BINDS for a read replica).
+    """
+    app = create_app(**{
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{database_path}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'SQLALCHEMY_BINDS': {},
+        'JWT_SECRET_KEY': 'test-secret-key-of-sufficient-length',
+        'PASSWORD_HASH_ITERATIONS': 1000,
+        'PASSWORD_HASH_WORKERS': 0,
+        'RATE_LIMIT_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'PRELOAD_APP': False,
+        **settings,
+    })
+    identity_cache.clear()
+    project_response_cache.clear()
+    matching_engine.reset()
+    with app.app_context():
+        db.create_all(bind_key=None)  # Only the primary; a read replica is a copy of it
+    return app
+
+
+def dispose_engines(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The application on a fresh SQLite database."""
+    app = create_test_app(tmp_path / 'test.db')
+    yield app
+    dispose_engines(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def bearer(user):
+    """Authorization header with a token issued the way /login issues it."""
+    return {'Authorization': 'Bearer ' + create_access_token(identity=str(user.user_id), additional_claims=identity_claims(user))}
+
+
+class StatementCounter:
+    """Counts the SQL statements sent to the app's engines while active."""
+
+    def __init__(self, app):
+        with app.app_context():
+            self.engines = list(db.engines.values())
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._on_execute)
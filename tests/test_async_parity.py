@@ -0,0 +1,231 @@
+"""The ASGI entry point must answer every route exactly as the WSGI app does.
+
+Each case seeds one database, copies it, and sends the same request to the
+WSGI app (through the Flask test client) on one copy and to AsyncDispatcher
+(as asgi.py serves it) on the other. Endpoints with an async view run it;
+every other request goes through the dispatcher's thread pool bridge. Every
+case starts with a cold identity cache (create_test_app empties it), so the
+token checks load the user from the database.
+"""
+import asyncio
+import json
+import shutil
+import threading
+
+import pytest
+
+from models.async_session import async_db
+from models.models import db, Application, Project, User
+from routes.async_dispatch import AsyncDispatcher
+from routes.auth import identity_cache
+from services.rate_limit import rate_limiter
+from tests.conftest import StatementCounter, bearer, create_test_app, dispose_engines
+import routes.async_user_routes  # Registers the async views
+
+VOLUNTEER = {'email': 'volunteer@example.org', 'password': 'volunteer-password'}
+ORGANIZATION = {'email': 'org@example.org', 'password': 'org-password'}
+
+# (method, path, JSON body, who sends it: None, 'volunteer', 'organization', 'deleted' (a user deleted
+# after the token was issued) or 'forged')
+CASES = [
+    ('GET', '/', None, None),
+    ('POST', '/register', {'name': 'New', 'email': 'new@example.org', 'password': 'pw', 'role': 'volunteer'}, None),
+    ('POST', '/register', {'name': 'Taken', 'email': VOLUNTEER['email'], 'password': 'pw', 'role': 'volunteer'}, None),
+    ('POST', '/register', {'name': 'New'}, None),
+    ('POST', '/login', VOLUNTEER, None),
+    ('POST', '/login', {**VOLUNTEER, 'password': 'wrong'}, None),
+    ('POST', '/login', {**VOLUNTEER, 'email': 'nobody@example.org'}, None),
+    ('POST', '/login', {'email': VOLUNTEER['email']}, None),
+    ('POST', '/logout', None, 'volunteer'),
+    ('GET', '/details', None, 'volunteer'),
+    ('GET', '/details', None, None),
+    ('GET', '/details', None, 'forged'),
+    ('GET', '/details', None, 'deleted'),
+    ('POST', '/projects', {'title': 'New', 'description': 'Description'}, 'deleted'),
+    ('PUT', '/update', {'name': 'Renamed'}, 'volunteer'),
+    ('PUT', '/update', {'password': 'new-password'}, 'volunteer'),
+    ('DELETE', '/delete', None, 'volunteer'),
+    ('GET', '/projects', None, 'volunteer'),
+    ('GET', '/projects?limit=1&status=Active', None, 'volunteer'),
+    ('POST', '/projects', {'title': 'New', 'description': 'Description', 'status': 'Active'}, 'organization'),
+    ('POST', '/projects', {'title': 'New', 'description': 'Description', 'status': 'Active'}, 'volunteer'),
+    ('POST', '/projects', {'title': 'New'}, 'organization'),
+    ('GET', '/projects/1', None, 'organization'),
+    ('GET', '/projects/99', None, 'organization'),
+    ('PUT', '/projects/1', {'title': 'Updated', 'status': 'Active'}, 'organization'),
+    ('PUT', '/projects/99', {'title': 'Updated'}, 'organization'),
+    ('DELETE', '/projects/2', None, 'organization'),
+    ('DELETE', '/projects/1', None, 'volunteer'),
+    ('GET', '/projects/search?q=garden', None, 'volunteer'),
+    ('GET', '/projects/nearby?lat=52.52&lon=13.40&radius=50', None, 'volunteer'),
+    ('GET', '/projects/nearby?lat=52.52', None, 'volunteer'),
+    ('GET', '/user/recommendations', None, 'volunteer'),
+    ('GET', '/organization/dashboard', None, 'organization'),
+    ('POST', '/projects/2/apply', None, 'volunteer'),
+    ('POST', '/projects/1/apply', None, 'volunteer'),
+    ('DELETE', '/projects/1/cancel', None, 'volunteer'),
+    ('DELETE', '/projects/2/cancel', None, 'volunteer'),
+    ('POST', '/applications/batch', {'project_ids': [2]}, 'volunteer'),
+    ('POST', '/applications/batch', {'project_ids': [True]}, 'volunteer'),
+    ('DELETE', '/applications/batch', {'project_ids': [1]}, 'volunteer'),
+    ('GET', '/projects/1/applications', None, 'organization'),
+    ('PATCH', '/projects/1/applications', {'application_ids': [1], 'status': 'Approved'}, 'organization'),
+    ('GET', '/user/applications', None, 'volunteer'),
+    ('GET', '/changes', None, 'volunteer'),
+    ('GET', '/metrics', None, None),
+]
+
+
+def seed(app):
+    with app.app_context():
+        organization = User('Org', ORGANIZATION['email'], ORGANIZATION['password'], 'organization')
+        volunteer = User('Volunteer', VOLUNTEER['email'], VOLUNTEER['password'], 'volunteer', skills=['gardening'])
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        db.session.add_all([
+            Project('Community garden', 'Planting and gardening', organization.user_id, 'Active',
+                    skills=['gardening'], latitude=52.52, longitude=13.40),
+            Project('Food bank', 'Sorting donations', organization.user_id, 'Active',
+                    skills=['logistics'], latitude=52.50, longitude=13.45),
+        ])
+        db.session.commit()
+        db.session.add(Application(volunteer.user_id, 1))
+        db.session.commit()
+
+
+def auth_headers(app, who):
+    if who is None:
+        return {}
+    if who == 'forged':
+        return {'Authorization': 'Bearer not-a-token'}
+    with app.app_context():
+        if who == 'deleted':
+            user = User('Deleted', 'deleted@example.org', 'password', 'organization')
+            db.session.add(user)
+            db.session.commit()
+            headers = bearer(user)
+            db.session.delete(user)
+            db.session.commit()
+            return headers
+        return bearer(User.query.filter_by(role=who).one())
+
+
+def wsgi_request(app, method, path, body, headers):
+    response = app.test_client().open(path, method=method, json=body, headers=headers)
+    return response.status_code, response.content_type, response.get_data()
+
+
+def asgi_request(app, method, path, body, headers):
+    """Sends one request to AsyncDispatcher(app) as an ASGI server would."""
+    dispatcher = AsyncDispatcher(app)
+    path, _, query = path.partition('?')
+    payload = b''
+    headers = dict(headers)
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers.update({'Content-Type': 'application/json', 'Content-Length': str(len(payload))})
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query.encode(),
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers.items()],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        try:
+            await dispatcher(scope, receive, send)
+        finally:
+            await async_db.dispose()
+
+    asyncio.run(run())
+    dispatcher.executor.shutdown()
+
+    start, *bodies = messages
+    response_headers = {name.decode('latin1'): value.decode('latin1') for name, value in start['headers']}
+    return start['status'], response_headers.get('content-type'), b''.join(message['body'] for message in bodies)
+
+
+def normalize(status, content_type, body):
+    """Status, content type and body, parsed when JSON, with the (time dependent) access token masked."""
+    if content_type == 'application/json':
+        body = json.loads(body)
+        if isinstance(body, dict) and 'access_token' in body:
+            body['access_token'] = '<token>'
+    return status, content_type, body
+
+
+@pytest.mark.parametrize('method, path, body, who', CASES,
+                         ids=[f"{method} {path} {who or 'anonymous'} {i}" for i, (method, path, _, who) in enumerate(CASES)])
+def test_asgi_answers_like_wsgi(tmp_path, method, path, body, who):
+    template = create_test_app(tmp_path / 'seeded.db')
+    seed(template)
+    dispose_engines(template)  # Checkpoints the database before it is copied
+
+    answers = []
+    for send in (wsgi_request, asgi_request):
+        database = shutil.copy(tmp_path / 'seeded.db', tmp_path / f'{send.__name__}.db')
+        app = create_test_app(database)
+        try:
+            answers.append(normalize(*send(app, method, path, body, auth_headers(app, who))))
+        finally:
+            dispose_engines(app)
+
+    wsgi, asgi = answers
+    assert asgi == wsgi
+
+
+def test_cases_cover_every_route(app):
+    routes = {(rule.endpoint, method) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    adapter = app.url_map.bind('localhost')
+    covered = {(adapter.match(path.partition('?')[0], method)[0], method) for method, path, _, _ in CASES}
+    assert routes - covered == set()
+
+
+def test_async_details_loads_the_identity_without_blocking_queries(tmp_path):
+    app = create_test_app(tmp_path / 'test.db')
+    seed(app)
+    headers = auth_headers(app, 'volunteer')
+    identity_cache.clear()
+    try:
+        with StatementCounter(app) as counter:
+            status, _, body = asgi_request(app, 'GET', '/details', None, headers)
+        assert status == 200
+        assert json.loads(body)['email'] == VOLUNTEER['email']
+        # The user was loaded over the async engine; the synchronous engine was never used
+        assert counter.count == 0
+    finally:
+        dispose_engines(app)
+
+
+def test_before_request_hooks_run_off_the_event_loop(tmp_path, monkeypatch):
+    app = create_test_app(tmp_path / 'test.db')
+    app.config['RATE_LIMIT_ENABLED'] = True
+    threads = []
+    check = rate_limiter.check
+
+    def recording_check(*args):
+        threads.append(threading.current_thread().name)
+        return check(*args)
+
+    monkeypatch.setattr(rate_limiter, 'check', recording_check)
+    try:
+        status, _, _ = asgi_request(app, 'POST', '/login', {'email': 'nobody@example.org', 'password': 'pw'}, {})
+    finally:
+        rate_limiter.reset()
+        dispose_engines(app)
+    assert status == 404
+    assert len(threads) == 1 and threads[0].startswith('wsgi')
@@ -0,0 +1,62 @@
+from models.models import db, User
+from routes.auth import identity_cache
+from tests.conftest import bearer
+
+
+def create_users():
+    organization = User('Org', 'org@example.org', 'password', 'organization')
+    volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+    db.session.add_all([organization, volunteer])
+    db.session.commit()
+    return organization, volunteer
+
+
+def test_deleted_users_token_is_refused(app, client):
+    with app.app_context():
+        organization, _ = create_users()
+        headers = bearer(organization)
+
+    assert client.get('/details', headers=headers).status_code == 200
+    assert client.delete('/delete', headers=headers).status_code == 200
+
+    response = client.post('/projects', json={'title': 'Title', 'description': 'Description'}, headers=headers)
+    assert response.status_code == 401
+    assert client.get('/projects', headers=headers).status_code == 401
+
+
+def test_deleted_users_token_cannot_write_from_a_stale_cache(app, client):
+    """Another worker process may still have the user cached; writes never trust the cache."""
+    with app.app_context():
+        organization, _ = create_users()
+        headers = bearer(organization)
+        client.get('/details', headers=headers)
+        entry = identity_cache.get(organization.user_id)
+        db.session.delete(organization)
+        db.session.commit()
+        identity_cache.put(organization.user_id, *entry)
+
+    response = client.post('/projects', json={'title': 'Title', 'description': 'Description'}, headers=headers)
+    assert response.status_code == 401
+
+
+def test_password_change_revokes_existing_tokens(app, client):
+    with app.app_context():
+        _, volunteer = create_users()
+        headers = bearer(volunteer)
+
+    response = client.put('/update', json={'password': 'new password'}, headers=headers)
+    assert response.status_code == 200
+    assert client.get('/details', headers=headers).status_code == 401
+
+    new_headers = {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+    assert client.get('/details', headers=new_headers).status_code == 200
+    assert client.post('/login', json={'email': 'volunteer@example.org', 'password': 'new password'}).status_code == 200
+
+
+def test_name_change_keeps_tokens(app, client):
+    with app.app_context():
+        _, volunteer = create_users()
+        headers = bearer(volunteer)
+
+    assert client.put('/update', json={'name': 'Renamed'}, headers=headers).status_code == 200
+    assert client.get('/details', headers=headers).get_json()['name'] == 'Renamed'
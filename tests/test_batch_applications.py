@@ -0,0 +1,46 @@
+import pytest
+
+from models.models import db, Project, User
+from tests.conftest import bearer
+
+
+@pytest.fixture
+def volunteer_headers(app):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        db.session.add(Project('Project', 'Description', organization.user_id, 'Active'))
+        db.session.commit()
+        return bearer(volunteer)
+
+
+@pytest.mark.parametrize('method', ['POST', 'DELETE'])
+@pytest.mark.parametrize('project_ids', [[True], [1, False], ['1'], [1.0], [], None])
+def test_batch_rejects_project_ids_that_are_not_ints(client, volunteer_headers, method, project_ids):
+    response = client.open('/applications/batch', method=method, json={'project_ids': project_ids},
+                           headers=volunteer_headers)
+    assert response.status_code == 400
+    assert 'project_ids' in response.get_json()['message']
+
+
+def test_batch_apply_accepts_int_project_ids(client, volunteer_headers):
+    response = client.post('/applications/batch', json={'project_ids': [1]}, headers=volunteer_headers)
+    assert response.status_code in (200, 201), response.get_json()
+
+
+@pytest.mark.parametrize('application_ids', [[True], [1, False], ['1'], [], None])
+def test_review_rejects_application_ids_that_are_not_ints(app, client, application_ids):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        db.session.add(organization)
+        db.session.commit()
+        db.session.add(Project('Project', 'Description', organization.user_id, 'Active'))
+        db.session.commit()
+        headers = bearer(organization)
+
+    response = client.patch('/projects/1/applications', json={'application_ids': application_ids, 'status': 'Approved'},
+                            headers=headers)
+    assert response.status_code == 400
+    assert 'application_ids' in response.get_json()['message']
@@ -0,0 +1,117 @@
+import shutil
+import threading
+import time
+
+import pytest
+
+from models.models import READ_BIND_KEY, db, Application, Project, User
+from services.change_feed import ChangeNotifier
+from tests.conftest import bearer, create_test_app, dispose_engines
+
+
+def seed(app):
+    """An organization with two projects and a volunteer who applied to the first one."""
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        db.session.add_all([Project(f'Project {i}', 'Description', organization.user_id, 'Active') for i in range(3)])
+        db.session.commit()
+        return bearer(organization), bearer(volunteer)
+
+
+def test_notifier_wakes_only_the_changed_user():
+    notifier = ChangeNotifier()
+    version = notifier.version(1)
+    woken = []
+    waiter = threading.Thread(target=lambda: woken.append(notifier.wait(1, version, 5)))
+    waiter.start()
+
+    notifier.notify([2])
+    assert notifier.wait(1, version, 0.05) is False  # Another user's change does not count
+    started = time.monotonic()
+    notifier.notify([1])
+    waiter.join(5)
+    assert woken == [True]
+    assert time.monotonic() - started < 1
+    assert notifier.version(1) == version + 1
+
+
+def test_notifier_does_not_miss_a_change_before_the_wait():
+    notifier = ChangeNotifier()
+    version = notifier.version(1)
+    notifier.notify([1])  # Committed between the query and the wait
+    assert notifier.wait(1, version, 0) is True
+
+
+def test_long_poll_is_woken_by_a_commit(app, client):
+    organization, volunteer = seed(app)
+    answers = []
+    poll = threading.Thread(target=lambda: answers.append(
+        (client.get('/changes?wait=10', headers=organization).get_json(), time.monotonic())
+    ))
+    poll.start()
+    time.sleep(0.3)
+    started = time.monotonic()
+    assert app.test_client().post('/projects/1/apply', headers=volunteer).status_code == 201
+    poll.join(10)
+
+    body, answered = answers[0]
+    assert [event['event'] for event in body['events']] == ['application.created']
+    assert answered - started < 5
+
+
+@pytest.fixture
+def three_events(app, client):
+    organization, volunteer = seed(app)
+    for project_id in (1, 2, 3):
+        assert client.post(f'/projects/{project_id}/apply', headers=volunteer).status_code == 201
+    return organization
+
+
+def change_ids(response):
+    return [event['change_id'] for event in response.get_json()['events']]
+
+
+def test_since_resumes_after_the_cursor(client, three_events):
+    first = client.get('/changes?limit=2', headers=three_events).get_json()
+    assert [event['change_id'] for event in first['events']] == [1, 2]
+    assert first['next_cursor'] == 2
+    assert change_ids(client.get('/changes?since=2', headers=three_events)) == [3]
+    # Nothing new: the cursor stays where it was
+    assert client.get('/changes?since=3', headers=three_events).get_json() == {'events': [], 'next_cursor': 3}
+
+
+def test_last_event_id_resumes_when_since_is_absent(client, three_events):
+    assert change_ids(client.get('/changes', headers={**three_events, 'Last-Event-ID': '1'})) == [2, 3]
+    assert change_ids(client.get('/changes?since=2', headers={**three_events, 'Last-Event-ID': '1'})) == [3]
+
+
+def test_event_stream_resumes_from_last_event_id(app, client, three_events):
+    app.config['CHANGE_STREAM_SECONDS'] = 0  # Send what is there and end the stream
+    response = client.get('/changes?stream=sse', headers={**three_events, 'Last-Event-ID': '1'})
+    assert response.mimetype == 'text/event-stream'
+    ids = [line.split(': ')[1] for line in response.get_data(as_text=True).splitlines() if line.startswith('id: ')]
+    assert ids == ['2', '3']
+
+
+def test_changes_are_read_from_the_primary_not_a_lagging_replica(tmp_path):
+    app = create_test_app(tmp_path / 'primary.db')
+    organization, volunteer = seed(app)
+    dispose_engines(app)
+    # A replica that has not caught up with anything written from here on
+    shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+
+    app = create_test_app(tmp_path / 'primary.db',
+                          SQLALCHEMY_BINDS={READ_BIND_KEY: {'url': f"sqlite:///{tmp_path / 'replica.db'}"}})
+    try:
+        client = app.test_client()
+        assert client.post('/projects/1/apply', headers=volunteer).status_code == 201
+        with app.app_context():
+            assert Application.query.count() == 1
+
+        body = client.get('/changes?wait=5', headers=organization).get_json()
+        assert [event['event'] for event in body['events']] == ['application.created']
+    finally:
+        dispose_engines(app)
@@ -0,0 +1,146 @@
+"""Nearby search: services/geo.py bounding boxes and find_nearby, GET /projects/nearby and the projects_geo R*Tree."""
+import math
+
+import pytest
+
+from models.models import db, Project, User
+from services.geo import EARTH_RADIUS_KM, bounding_boxes, find_nearby
+from tests.conftest import bearer
+
+
+@pytest.fixture
+def users(app):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        return bearer(organization), bearer(volunteer)
+
+
+def add_projects(app, *locations):
+    """Adds one Active project per (latitude, longitude); returns their ids in order."""
+    with app.app_context():
+        organization = User.query.filter_by(role='organization').one()
+        projects = [Project(f'Project {i}', 'Description', organization.user_id, 'Active', latitude=lat, longitude=lon)
+                    for i, (lat, lon) in enumerate(locations)]
+        db.session.add_all(projects)
+        db.session.commit()
+        return [project.project_id for project in projects]
+
+
+def nearby(client, volunteer, lat, lon, radius, **params):
+    query = '&'.join(f'{name}={value}' for name, value in {'lat': lat, 'lon': lon, 'radius': radius, **params}.items())
+    response = client.get(f'/projects/nearby?{query}', headers=volunteer)
+    assert response.status_code == 200
+    body = response.get_json()
+    return [project['project_id'] for project in body['projects']], body['next_cursor']
+
+
+def geo_rows(app):
+    with app.app_context():
+        return db.session.execute(db.text('SELECT project_id, min_lat, min_lon FROM projects_geo ORDER BY project_id')).all()
+
+
+def test_bounding_box_of_a_small_circle():
+    [(min_lat, max_lat, min_lon, max_lon)] = bounding_boxes(52.52, 13.40, 10)
+    assert max_lat - 52.52 == pytest.approx(52.52 - min_lat) == pytest.approx(math.degrees(10 / EARTH_RADIUS_KM))
+    assert max_lon - 13.40 == pytest.approx(13.40 - min_lon)
+    # Longitude degrees are shorter away from the equator, so the box is wider than it is tall
+    assert max_lon - min_lon > max_lat - min_lat
+
+
+@pytest.mark.parametrize('longitude', [179.9, -179.9])
+def test_bounding_box_is_split_at_the_antimeridian(longitude):
+    (_, _, east_min, east_max), (_, _, west_min, west_max) = bounding_boxes(10.0, longitude, 50)
+    assert east_max == 180.0 and west_min == -180.0
+    assert 179 < east_min < 180 and -180 < west_max < -179
+    # Both halves together are as wide as the box of the same circle at longitude 0
+    [(_, _, min_lon, max_lon)] = bounding_boxes(10.0, 0.0, 50)
+    assert (east_max - east_min) + (west_max - west_min) == pytest.approx(max_lon - min_lon)
+
+
+@pytest.mark.parametrize('latitude', [89.8, -89.8])
+def test_bounding_box_around_a_pole_spans_every_longitude(latitude):
+    [(min_lat, max_lat, min_lon, max_lon)] = bounding_boxes(latitude, 0.0, 50)
+    assert (min_lon, max_lon) == (-180.0, 180.0)
+    assert (max_lat == 90.0) if latitude > 0 else (min_lat == -90.0)
+
+
+def test_bounding_box_just_below_the_pole():
+    # The circle reaches within rounding of the pole: sin(angle) / cos(latitude) is 1 and the box is 180° wide
+    latitude, radius = 5.897590778697255, 9351.774141196174
+    [(min_lat, max_lat, min_lon, max_lon)] = bounding_boxes(latitude, 0.0, radius)
+    assert max_lat < 90
+    assert (min_lon, max_lon) == pytest.approx((-90.0, 90.0))
+
+    # Every radius between there and the pole check gives a box and no math domain error
+    for radius in (2.0, 5.0, 10.0):
+        latitude = math.nextafter(90 - math.degrees(radius / EARTH_RADIUS_KM), 0)
+        for _ in range(5):
+            for boxes in (bounding_boxes(latitude, 0.0, radius), bounding_boxes(-latitude, 0.0, radius)):
+                assert all(-180 <= min_lon <= max_lon <= 180 for _, _, min_lon, max_lon in boxes)
+            latitude = math.nextafter(latitude, 0)
+
+
+def test_nearby_finds_projects_across_the_antimeridian(app, client, users):
+    _, volunteer = users
+    west, east, far, _ = add_projects(app, (10.0, -179.8), (10.0, 179.7), (10.0, -179.3), (10.0, 170.0))
+
+    ids, _ = nearby(client, volunteer, 10.0, 179.9, 50)
+    assert ids == [east, west]  # ~22 km and ~33 km; `far` is ~88 km away
+    ids, _ = nearby(client, volunteer, 10.0, -179.9, 50)
+    assert ids == [west, east]  # `far` is ~66 km away
+
+
+def test_nearby_finds_projects_across_the_pole(app, client, users):
+    _, volunteer = users
+    same_side, other_side, _ = add_projects(app, (89.93, 90.0), (89.9, -90.0), (89.0, -90.0))
+
+    with app.app_context():
+        ids, distances = find_nearby(89.95, 90.0, 50, 10)
+    assert ids == [same_side, other_side]
+    assert distances == pytest.approx([math.radians(0.02) * EARTH_RADIUS_KM, math.radians(0.15) * EARTH_RADIUS_KM])
+    assert nearby(client, volunteer, 89.95, 90.0, 50)[0] == [same_side, other_side]
+
+
+def test_nearby_orders_ties_by_project_id_and_pages_with_an_offset_cursor(app, client, users):
+    _, volunteer = users
+    far, tie1, near, tie2, tie3 = add_projects(app, (52.60, 13.4), (52.55, 13.4), (52.52, 13.4), (52.55, 13.4), (52.55, 13.4))
+
+    with app.app_context():
+        # The count cuts through the tie; the kept ones are the lowest ids
+        assert find_nearby(52.52, 13.4, 50, 3)[0] == [near, tie1, tie2]
+
+    assert nearby(client, volunteer, 52.52, 13.4, 50) == ([near, tie1, tie2, tie3, far], None)
+    pages = []
+    cursor = 0
+    while cursor is not None:
+        ids, cursor = nearby(client, volunteer, 52.52, 13.4, 50, limit=2, cursor=cursor)
+        pages.append((ids, cursor))
+    assert pages == [([near, tie1], 2), ([tie2, tie3], 4), ([far], None)]
+
+
+def test_projects_geo_follows_updates_and_deletes(app, client, users):
+    organization, volunteer = users
+    project_id, unlocated = add_projects(app, (52.52, 13.40), (None, None))
+    assert [row.project_id for row in geo_rows(app)] == [project_id]
+
+    # Moving the project moves its R*Tree entry
+    response = client.put(f'/projects/{project_id}', headers=organization, json={'latitude': -1.29, 'longitude': 36.82})
+    assert response.status_code == 200
+    [(_, latitude, longitude)] = geo_rows(app)
+    assert (latitude, longitude) == pytest.approx((-1.29, 36.82), abs=1e-4)  # The R*Tree stores 32-bit floats
+    assert nearby(client, volunteer, 52.52, 13.40, 50)[0] == []
+    assert nearby(client, volunteer, -1.29, 36.82, 50)[0] == [project_id]
+
+    # Updates that leave the location alone keep the entry; a location can be added and removed
+    assert client.put(f'/projects/{project_id}', headers=organization, json={'title': 'Renamed'}).status_code == 200
+    assert client.put(f'/projects/{unlocated}', headers=organization, json={'latitude': -1.3, 'longitude': 36.8}).status_code == 200
+    assert [row.project_id for row in geo_rows(app)] == [project_id, unlocated]
+    assert client.put(f'/projects/{unlocated}', headers=organization, json={'latitude': None, 'longitude': None}).status_code == 200
+    assert [row.project_id for row in geo_rows(app)] == [project_id]
+
+    assert client.delete(f'/projects/{project_id}', headers=organization).status_code == 200
+    assert geo_rows(app) == []
+    assert nearby(client, volunteer, -1.29, 36.82, 50)[0] == []
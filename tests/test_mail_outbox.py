@@ -0,0 +1,226 @@
+"""MailOutboxWorker.drain against a stand-in SMTP server (aiosmtpd).
+
+Emails are queued the way the routes queue them: volunteers apply to an
+organization's project (application.created, to the organization) and the
+organization reviews applications (application.status, to the volunteer).
+"""
+import email
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import update
+
+from models.models import db, MailOutbox, Project, User
+from services.mail_outbox import MailOutboxWorker
+from tests.conftest import bearer, create_test_app, dispose_engines
+
+
+class StandInServer:
+    """aiosmtpd handler that keeps accepted messages, refuses `refused` recipients and hangs up on `dropped` ones."""
+
+    def __init__(self):
+        self.messages = []
+        self.refused = set()
+        self.dropped = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return '550 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.dropped.intersection(envelope.rcpt_tos):
+            server.transport.close()  # The connection drops before the message is accepted
+            return '421 Closing connection'
+        self.messages.append((envelope.rcpt_tos, email.message_from_bytes(envelope.content)))
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    controller = Controller(StandInServer(), hostname='127.0.0.1', port=port)
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture
+def app(tmp_path, smtp):
+    app = create_test_app(
+        tmp_path / 'test.db',
+        MAIL_ENABLED=True,
+        MAIL_SERVER=smtp.hostname,
+        MAIL_PORT=smtp.port,
+        MAIL_SUPPRESS_SEND=False,
+        MAIL_DIGEST_SECONDS=0,
+        MAIL_RETRY_SECONDS=30,
+        MAIL_MAX_ATTEMPTS=3,
+    )
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        db.session.add(organization)
+        db.session.add_all([User(f'Volunteer {i}', f'volunteer{i}@example.org', 'password', 'volunteer') for i in (1, 2)])
+        db.session.commit()
+        db.session.add_all([
+            Project('Community garden', 'Planting', organization.user_id, 'Active'),
+            Project('Food bank', 'Sorting donations', organization.user_id, 'Active'),
+        ])
+        db.session.commit()
+    yield app
+    dispose_engines(app)
+
+
+def headers(app, email):
+    with app.app_context():
+        return bearer(User.query.filter_by(email=email).one())
+
+
+def apply(app, email, project_id):
+    response = app.test_client().post(f'/projects/{project_id}/apply', headers=headers(app, email))
+    assert response.status_code == 201
+
+
+def review(app, project_id, status):
+    client = app.test_client()
+    organization = headers(app, 'org@example.org')
+    applications = client.get(f'/projects/{project_id}/applications', headers=organization).get_json()['data']
+    response = client.patch(f'/projects/{project_id}/applications', headers=organization,
+                            json={'application_ids': [a['application_id'] for a in applications], 'status': status})
+    assert response.status_code == 200
+
+
+def drain(app):
+    with app.app_context():
+        return MailOutboxWorker(app).drain()
+
+
+def outbox(app):
+    """Every outbox row as (recipient email, status, attempts, next_attempt_at, last_error), in queue order."""
+    with app.app_context():
+        rows = db.session.execute(
+            db.select(User.email, MailOutbox.status, MailOutbox.attempts, MailOutbox.next_attempt_at, MailOutbox.last_error)
+            .join(User, User.user_id == MailOutbox.user_id)
+            .order_by(MailOutbox.outbox_id)
+        ).all()
+        return [tuple(row) for row in rows]
+
+
+def make_due(app):
+    with app.app_context():
+        db.session.execute(update(MailOutbox).where(MailOutbox.status == 'pending')
+                           .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+
+
+def test_digest_folds_a_recipients_events_into_one_email(app, smtp):
+    apply(app, 'volunteer1@example.org', 1)
+    apply(app, 'volunteer2@example.org', 2)
+
+    assert drain(app) == (2, 0, 0)
+    [(recipients, message)] = smtp.handler.messages
+    assert recipients == ['org@example.org']
+    assert message['Subject'] == '2 updates on Volunteer Matching'
+    body = message.get_payload(decode=True).decode()
+    assert 'New application #1 to "Community garden".' in body
+    assert 'New application #2 to "Food bank".' in body
+    assert [status for _, status, *_ in outbox(app)] == ['sent', 'sent']
+    assert drain(app) == (0, 0, 0)
+
+
+def test_single_event_uses_it_as_the_subject(app, smtp):
+    apply(app, 'volunteer1@example.org', 1)
+
+    assert drain(app) == (1, 0, 0)
+    [(_, message)] = smtp.handler.messages
+    assert message['Subject'] == 'New application #1 to "Community garden".'
+
+
+def test_refused_email_is_retried_with_doubling_backoff(app, smtp):
+    apply(app, 'volunteer1@example.org', 1)
+    review(app, 1, 'Approved')
+    smtp.handler.refused.add('org@example.org')
+
+    # One message of the batch fails; the other still goes out over the same connection
+    before = datetime.utcnow()
+    assert drain(app) == (1, 1, 0)
+    after = datetime.utcnow()
+    assert [recipients for recipients, _ in smtp.handler.messages] == [['volunteer1@example.org']]
+    (_, status, attempts, next_attempt_at, last_error), _ = outbox(app)
+    assert (status, attempts) == ('pending', 1)
+    assert before + timedelta(seconds=30) <= next_attempt_at <= after + timedelta(seconds=30)
+    assert 'SMTPRecipientsRefused' in last_error
+
+    assert drain(app) == (0, 0, 0)  # Not due again yet
+    make_due(app)
+    before = datetime.utcnow()
+    assert drain(app) == (0, 1, 0)
+    after = datetime.utcnow()
+    (_, status, attempts, next_attempt_at, _), _ = outbox(app)
+    assert (status, attempts) == ('pending', 2)
+    assert before + timedelta(seconds=60) <= next_attempt_at <= after + timedelta(seconds=60)
+
+    smtp.handler.refused.clear()
+    make_due(app)
+    assert drain(app) == (1, 0, 0)
+    assert [status for _, status, *_ in outbox(app)] == ['sent', 'sent']
+
+
+def test_email_is_failed_after_max_attempts(app, smtp):
+    apply(app, 'volunteer1@example.org', 1)
+    smtp.handler.refused.add('org@example.org')
+
+    assert drain(app) == (0, 1, 0)
+    make_due(app)
+    assert drain(app) == (0, 1, 0)
+    make_due(app)
+    assert drain(app) == (0, 0, 1)  # The third of MAIL_MAX_ATTEMPTS=3
+    [(_, status, attempts, _, last_error)] = outbox(app)
+    assert (status, attempts) == ('failed', 3)
+    assert 'SMTPRecipientsRefused' in last_error
+
+    make_due(app)
+    assert drain(app) == (0, 0, 0)
+    assert smtp.handler.messages == []
+
+
+def test_dropped_connection_retries_the_rest_of_the_batch(app, smtp):
+    apply(app, 'volunteer1@example.org', 1)
+    apply(app, 'volunteer2@example.org', 1)
+    review(app, 1, 'Approved')  # The batch, in recipient order: org, volunteer1, volunteer2
+    smtp.handler.dropped.add('volunteer1@example.org')
+
+    assert drain(app) == (2, 2, 0)
+    assert [recipients for recipients, _ in smtp.handler.messages] == [['org@example.org']]
+    assert [(email, status, attempts) for email, status, attempts, _, _ in outbox(app)] == [
+        ('org@example.org', 'sent', 0),
+        ('org@example.org', 'sent', 0),
+        ('volunteer1@example.org', 'pending', 1),
+        ('volunteer2@example.org', 'pending', 1),
+    ]
+    assert all('SMTPServerDisconnected' in last_error for *_, last_error in outbox(app)[2:])
+
+    smtp.handler.dropped.clear()
+    make_due(app)
+    assert drain(app) == (2, 0, 0)
+    assert [recipients for recipients, _ in smtp.handler.messages[1:]] == [['volunteer1@example.org'], ['volunteer2@example.org']]
+
+
+def test_claimed_rows_are_not_claimed_again_until_the_lease_expires(app, smtp):
+    apply(app, 'volunteer1@example.org', 1)
+    apply(app, 'volunteer2@example.org', 2)
+    now = datetime.utcnow()
+    with app.app_context():
+        first, second = MailOutboxWorker(app), MailOutboxWorker(app)
+        claimed = first.claim(now)
+        assert len(claimed) == 2
+        assert second.claim(now) == []
+        assert second.drain() == (0, 0, 0)
+        # The first worker died without recording its batch: the rows are claimed again once the lease has passed
+        assert sorted(second.claim(now + timedelta(seconds=first.claim_seconds))) == sorted(claimed)
+    assert smtp.handler.messages == []
@@ -0,0 +1,60 @@
+import pytest
+
+from models.models import db, Application, Project, User
+from tests.conftest import bearer
+
+PAGINATED = [
+    ('/projects', 'volunteer'),
+    ('/projects/search?q=garden', 'volunteer'),
+    ('/projects/nearby?lat=52.52&lon=13.40', 'volunteer'),
+    ('/user/applications', 'volunteer'),
+    ('/changes', 'volunteer'),
+    ('/organization/dashboard', 'organization'),
+    ('/projects/1/applications', 'organization'),
+]
+
+
+@pytest.fixture
+def headers(app):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        db.session.add_all([
+            Project('Community garden', 'Gardening', organization.user_id, 'Active', latitude=52.52, longitude=13.40),
+            Project('Garden cleanup', 'Gardening', organization.user_id, 'Active', latitude=52.53, longitude=13.41),
+        ])
+        db.session.commit()
+        db.session.add_all([Application(volunteer.user_id, 1), Application(volunteer.user_id, 2)])
+        db.session.commit()
+        return {'volunteer': bearer(volunteer), 'organization': bearer(organization)}
+
+
+def with_args(path, args):
+    return path + ('&' if '?' in path else '?') + args
+
+
+@pytest.mark.parametrize('path, who', PAGINATED)
+@pytest.mark.parametrize('args, message', [
+    ('limit=0', 'limit must be a positive integer'),
+    ('limit=-1', 'limit must be a positive integer'),
+    ('limit=abc', 'limit must be a positive integer'),
+    ('cursor=abc', 'cursor must be an integer'),
+])
+def test_invalid_page_args_are_rejected(client, headers, path, who, args, message):
+    response = client.get(with_args(path, args), headers=headers[who])
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
+
+
+@pytest.mark.parametrize('path, who', PAGINATED)
+def test_valid_limits_are_accepted(client, headers, path, who):
+    response = client.get(with_args(path, 'limit=1'), headers=headers[who])
+    assert response.status_code == 200
+    assert client.get(with_args(path, 'limit=100000'), headers=headers[who]).status_code == 200
+
+
+def test_application_routes_keep_their_error_shape(client, headers):
+    body = client.get('/user/applications?limit=0', headers=headers['volunteer']).get_json()
+    assert body == {'success': False, 'message': 'limit must be a positive integer'}
@@ -0,0 +1,55 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models.models import User
+from services.passwords import check_hash_config, configured_hash_method, needs_rehash
+
+
+@pytest.mark.parametrize('method, iterations, expected', [
+    ('pbkdf2:sha256', 600000, 'pbkdf2:sha256:600000'),
+    ('pbkdf2', 1000, 'pbkdf2:sha256:1000'),
+    ('pbkdf2:sha512:5000', 1000, 'pbkdf2:sha512:5000'),
+    ('scrypt', 1000, 'scrypt:32768:8:1'),
+    ('scrypt:16384:8:1', 1000, 'scrypt:16384:8:1'),
+])
+def test_configured_method_is_normalized_and_hashes(method, iterations, expected):
+    config = {'PASSWORD_HASH_METHOD': method, 'PASSWORD_HASH_ITERATIONS': iterations}
+    assert check_hash_config(config) == expected
+    stored = generate_password_hash('password', configured_hash_method(config))
+    assert stored.split('$', 1)[0] == expected
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'pbkdf2', 'pbkdf2:sha256'])
+def test_hashes_made_with_the_configured_method_are_not_rehashed(app, method):
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_ITERATIONS=1000)
+    with app.app_context():
+        stored = generate_password_hash('password', configured_hash_method(app.config))
+        assert not needs_rehash(stored)
+
+
+def test_hashes_with_other_parameters_are_rehashed(app):
+    app.config.update(PASSWORD_HASH_METHOD='pbkdf2:sha256', PASSWORD_HASH_ITERATIONS=1000)
+    with app.app_context():
+        assert needs_rehash(generate_password_hash('password', 'pbkdf2:sha256:2000'))
+        assert needs_rehash(generate_password_hash('password', 'scrypt'))
+        assert needs_rehash('md5$legacy')
+
+
+@pytest.mark.parametrize('method', ['pbkdf2:nosuchdigest', 'scrypt:1000:8:1', 'scrypt:16384', 'bcrypt'])
+def test_unusable_methods_fail_at_startup(method):
+    with pytest.raises(ValueError, match='PASSWORD_HASH_METHOD'):
+        create_app(PASSWORD_HASH_METHOD=method, PRELOAD_APP=False)
+
+
+def test_login_with_scrypt_does_not_rewrite_the_hash(app, client):
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt:1024:8:1'
+    assert client.post('/register', json={
+        'name': 'Volunteer', 'email': 'volunteer@example.org', 'password': 'password', 'role': 'volunteer'
+    }).status_code == 201
+    with app.app_context():
+        stored = User.query.one().password
+    assert stored.startswith('scrypt:1024:8:1$')
+    assert client.post('/login', json={'email': 'volunteer@example.org', 'password': 'password'}).status_code == 200
+    with app.app_context():
+        assert User.query.one().password == stored
@@ -0,0 +1,168 @@
+"""Token bucket stores of services/rate_limit.py, in memory and in a shared SQLite file."""
+import threading
+
+import pytest
+
+from services import rate_limit
+from services.rate_limit import MemoryBucketStore, SQLiteBucketStore, rate_limiter
+from tests.conftest import create_test_app, dispose_engines
+
+
+class Clock:
+    """Stands in for the time module: time() and monotonic() return `now`, moved by advance()."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path, clock):
+    if request.param == 'memory':
+        return MemoryBucketStore()
+    store = SQLiteBucketStore(str(tmp_path / 'rate_limits.db'))
+    store.swept = clock.now  # No sweep unless a test asks for one
+    return store
+
+
+def test_bucket_allows_a_burst_then_refills(store, clock):
+    assert [store.take('ip:1', 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert store.take('ip:1', 3, 1.0) == pytest.approx(1.0)
+
+    clock.advance(1)
+    assert store.take('ip:1', 3, 1.0) == 0
+    assert store.take('ip:1', 3, 1.0) == pytest.approx(1.0)
+
+    # A bucket never holds more than its capacity, however long it was left alone
+    clock.advance(3600)
+    assert [store.take('ip:1', 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert store.take('ip:1', 3, 1.0) > 0
+
+
+def test_retry_after_is_the_time_until_the_next_token(store, clock):
+    assert store.take('email:a', 1, 0.5) == 0
+    assert store.take('email:a', 1, 0.5) == pytest.approx(2.0)
+    clock.advance(0.5)
+    assert store.take('email:a', 1, 0.5) == pytest.approx(1.5)
+    clock.advance(1.5)
+    assert store.take('email:a', 1, 0.5) == 0
+
+
+def test_denied_checks_do_not_overdraw_the_bucket(store, clock):
+    assert store.take('ip:1', 1, 1.0) == 0
+    for _ in range(10):
+        assert store.take('ip:1', 1, 1.0) == pytest.approx(1.0)
+    # Denied checks took nothing, so one second refills the one token
+    clock.advance(1)
+    assert store.take('ip:1', 1, 1.0) == 0
+
+
+def test_buckets_are_independent(store):
+    assert store.take('ip:1', 1, 1.0) == 0
+    assert store.take('ip:1', 1, 1.0) > 0
+    assert store.take('ip:2', 1, 1.0) == 0
+    assert store.size() == 2
+
+
+def test_memory_store_drops_refilled_buckets_from_the_oldest_end(clock):
+    store = MemoryBucketStore()
+    store.take('fast', 1, 1.0)  # Full again after 1s
+    store.take('slow', 1, 0.1)  # Full again after 10s
+    store.take('fast2', 1, 1.0)
+
+    clock.advance(2)
+    store.take('new', 1, 1.0)
+    # 'fast' has refilled and is dropped; 'slow' has not, which stops the sweep before 'fast2'
+    assert list(store.buckets) == ['slow', 'fast2', 'new']
+    assert store.evictions == 1
+
+    clock.advance(10)
+    store.take('new', 1, 1.0)
+    assert list(store.buckets) == ['new']
+    assert store.evictions == 3
+
+
+def test_memory_store_keeps_at_most_max_keys_buckets(clock):
+    store = MemoryBucketStore(max_keys=2)
+    for key in ('a', 'b', 'c'):
+        assert store.take(key, 1, 0.01) == 0
+    assert list(store.buckets) == ['b', 'c']
+    assert store.evictions == 1
+    # A dropped bucket starts over full, so the cap only ever makes a limit more lenient
+    assert store.take('a', 1, 0.01) == 0
+
+    store.take('b', 1, 0.01)  # Moves 'b' to the most recently used end
+    store.take('d', 1, 0.01)
+    assert list(store.buckets) == ['b', 'd']
+
+
+def test_sqlite_store_sweeps_refilled_buckets(tmp_path, clock):
+    store = SQLiteBucketStore(str(tmp_path / 'rate_limits.db'))
+    store.swept = clock.now
+    store.take('fast', 1, 1.0)
+    store.take('slow', 1, 0.001)
+
+    clock.advance(2)
+    store.take('other', 1, 1.0)
+    assert store.size() == 3  # Not swept before SQLITE_SWEEP_SECONDS
+
+    clock.advance(rate_limit.SQLITE_SWEEP_SECONDS)
+    store.take('other', 1, 1.0)
+    # 'fast' and the first 'other' bucket were full again; 'slow' is not for another ~900s
+    keys = {key for key, in store._connection().execute("SELECT key FROM rate_limit_buckets")}
+    assert keys == {'slow', 'other'}
+    assert store.evictions == 2
+
+
+def test_sqlite_store_is_shared_and_never_overdrawn(tmp_path, clock):
+    path = str(tmp_path / 'rate_limits.db')
+    stores = [SQLiteBucketStore(path) for _ in range(2)]  # As two worker processes open it
+    for store in stores:
+        store.swept = clock.now
+    results = []
+
+    def attempt(store):
+        for _ in range(10):
+            results.append(store.take('email:shared', 5, 0.001))
+
+    threads = [threading.Thread(target=attempt, args=(store,)) for store in stores for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 40
+    assert results.count(0) == 5
+    tokens, = stores[0]._connection().execute("SELECT tokens FROM rate_limit_buckets").fetchone()
+    assert tokens == pytest.approx(0)
+
+
+def test_throttled_login_gets_retry_after(tmp_path):
+    app = create_test_app(tmp_path / 'test.db', RATE_LIMIT_ENABLED=True, RATE_LIMIT_PER_EMAIL=(2, 2))
+    rate_limiter.reset()
+    try:
+        client = app.test_client()
+        statuses = [client.post('/login', json={'email': 'a@example.org', 'password': 'pw'}).status_code
+                    for _ in range(2)]
+        response = client.post('/login', json={'email': 'A@example.org ', 'password': 'pw'})
+    finally:
+        rate_limiter.reset()
+        dispose_engines(app)
+    assert statuses == [404, 404]
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
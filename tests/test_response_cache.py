@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+from models.models import db, User
+from tests.conftest import bearer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs one request against the same database in a separate process, as another worker or a restarted server would
+OTHER_PROCESS = """
+import json, sys
+from app import create_app
+settings, method, path, headers, body = json.loads(sys.argv[1])
+response = create_app(**settings).test_client().open(path, method=method, headers=headers, json=body)
+print(json.dumps([response.status_code, response.get_json()]))
+"""
+
+
+def request_in_other_process(app, method, path, headers, body=None):
+    settings = {key: app.config[key] for key in (
+        'SQLALCHEMY_DATABASE_URI', 'SQLALCHEMY_ENGINE_OPTIONS', 'SQLALCHEMY_BINDS', 'JWT_SECRET_KEY',
+        'PASSWORD_HASH_WORKERS', 'METRICS_ENABLED', 'PRELOAD_APP')}
+    output = subprocess.run([sys.executable, '-c', OTHER_PROCESS, json.dumps([settings, method, path, headers, body])],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def create_organization(app):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        db.session.add(organization)
+        db.session.commit()
+        return bearer(organization)
+
+
+def test_etag_is_not_reused_for_other_data_after_a_restart(app, client):
+    headers = create_organization(app)
+    empty = client.get('/projects', headers=headers)
+    assert empty.get_json()['projects'] == []
+    assert client.post('/projects', json={'title': 'Title', 'description': 'Description'}, headers=headers).status_code == 201
+
+    status, body = request_in_other_process(app, 'GET', '/projects', {**headers, 'If-None-Match': empty.headers['ETag']})
+    assert status == 200
+    assert len(body['projects']) == 1
+
+
+def test_stale_cached_bodies_of_another_worker_are_not_served(app, client):
+    headers = create_organization(app)
+    assert client.get('/projects', headers=headers).get_json()['projects'] == []
+
+    status, _ = request_in_other_process(app, 'POST', '/projects', headers, {'title': 'Title', 'description': 'Description'})
+    assert status == 201
+
+    assert len(client.get('/projects', headers=headers).get_json()['projects']) == 1
+
+
+def test_unchanged_projects_revalidate_with_304(app, client):
+    headers = create_organization(app)
+    etag = client.get('/projects', headers=headers).headers['ETag']
+    assert client.get('/projects', headers={**headers, 'If-None-Match': etag}).status_code == 304
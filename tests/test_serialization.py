@@ -0,0 +1,56 @@
+import pytest
+
+from models.models import db, Project, User
+from services.serialization import ENCODER_CACHE_SIZE, PROJECT_SCHEMA, Field, Schema, split_skills
+from tests.conftest import bearer
+
+
+@pytest.fixture
+def headers(app):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        db.session.add(organization)
+        db.session.commit()
+        db.session.add(Project('Garden', 'Gardening', organization.user_id, 'Active', skills=['gardening', 'tools']))
+        db.session.commit()
+        return bearer(organization)
+
+
+def test_row_and_object_encoders_convert_fields(app, headers):
+    names = ('title', 'skills', 'project_id')
+    with app.app_context():
+        row = db.session.query(*PROJECT_SCHEMA.columns(names), Project.status).one()  # Extra trailing column
+        project = db.session.get(Project, 1)
+        expected = {'title': 'Garden', 'skills': ['gardening', 'tools'], 'project_id': 1}
+        assert PROJECT_SCHEMA.row_encoder(names)(row) == expected
+        assert PROJECT_SCHEMA.object_encoder(names)(project) == expected
+
+
+def test_unknown_field_names_raise():
+    with pytest.raises(KeyError):
+        PROJECT_SCHEMA.row_encoder(['nope'])
+
+
+def test_encoder_cache_is_bounded():
+    schema = Schema(skills=Field(Project.skills, split_skills))
+    for size in range(ENCODER_CACHE_SIZE * 2):
+        schema.row_encoder(['skills'] * (size + 1))
+    assert len(schema.encoders) == ENCODER_CACHE_SIZE
+    # The most recently used encoder is kept and reused
+    assert schema.row_encoder(['skills'] * ENCODER_CACHE_SIZE * 2) is schema.row_encoder(['skills'] * ENCODER_CACHE_SIZE * 2)
+
+
+def test_repeated_and_reordered_fields_share_one_encoder(client, headers):
+    client.get('/projects?fields=title', headers=headers)
+    before = len(PROJECT_SCHEMA.encoders)
+    for fields in ('title,title', 'title,,title,title', ' title', 'title,project_id', 'project_id,title,title'):
+        response = client.get(f'/projects?fields={fields}', headers=headers)
+        assert response.status_code == 200
+        assert set(response.get_json()['projects'][0]) == set(fields.replace(' ', '').split(',')) - {''}
+    assert len(PROJECT_SCHEMA.encoders) <= before + 1
+
+
+def test_unknown_fields_are_listed_in_request_order(client, headers):
+    response = client.get('/projects?fields=title,zeta,alpha,zeta', headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Unknown fields: zeta, alpha'
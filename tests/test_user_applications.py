@@ -0,0 +1,58 @@
+from models.models import db, Application, Project, User
+from tests.conftest import StatementCounter, bearer
+
+
+def add_applications(volunteer_id, organization_id, count):
+    projects = [Project(f'Project {i}', 'Description', organization_id, 'Active') for i in range(count)]
+    db.session.add_all(projects)
+    db.session.flush()
+    db.session.add_all(Application(user_id=volunteer_id, project_id=project.project_id) for project in projects)
+    db.session.commit()
+
+
+def statements_for(app, client, path, headers):
+    with StatementCounter(app) as counter:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return counter.count, response.get_json()
+
+
+def test_statement_count_does_not_grow_with_applications(app, client):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        add_applications(volunteer.user_id, organization.user_id, 1)
+        headers = bearer(volunteer)
+        volunteer_id, organization_id = volunteer.user_id, organization.user_id
+
+    client.get('/user/applications', headers=headers)  # Warm the per-process caches
+    one, body = statements_for(app, client, '/user/applications', headers)
+    assert len(body['data']) == 1
+
+    with app.app_context():
+        add_applications(volunteer_id, organization_id, 99)
+    many, body = statements_for(app, client, '/user/applications?limit=200', headers)
+    assert len(body['data']) == 100
+    assert many == one
+
+
+def test_applications_carry_their_status_and_filter_by_it(app, client):
+    with app.app_context():
+        organization = User('Org', 'org@example.org', 'password', 'organization')
+        volunteer = User('Volunteer', 'volunteer@example.org', 'password', 'volunteer')
+        db.session.add_all([organization, volunteer])
+        db.session.commit()
+        add_applications(volunteer.user_id, organization.user_id, 3)
+        Application.query.filter_by(application_id=1).one().status = 'Approved'
+        db.session.commit()
+        headers = bearer(volunteer)
+
+    body = client.get('/user/applications?limit=2', headers=headers).get_json()
+    assert [row['application_status'] for row in body['data']] == ['Approved', 'Pending']
+    assert body['next_cursor'] == 2
+    assert len(client.get('/user/applications?cursor=2', headers=headers).get_json()['data']) == 1
+
+    body = client.get('/user/applications?status=Pending', headers=headers).get_json()
+    assert [row['application_id'] for row in body['data']] == [2, 3]